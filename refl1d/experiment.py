@@ -26,11 +26,15 @@ from .sample.reflectivity import (
     BASE_GUIDE_ANGLE as DEFAULT_THETA_M,
     magnetic_amplitude as reflmag,
     reflectivity_amplitude as reflamp,
+    reflectivity_jacobian as refljac,
 )
 from . import profile
+from .probe.data_loaders.binary import BINARY_EXTENSION, write_probe
 from .probe.probe import PolarizedNeutronProbe, Probe, QProbe, PolarizedQProbe
 from .sample import layers, material
 from .utils import asbytes
+from .utils.timing import NULL_TIMER, StageTimer
+from .utils.workspace import Workspace
 
 
 class WebviewPlotFunction(Protocol):
@@ -47,9 +51,15 @@ class WebviewPlotInfo(TypedDict):
 class ExperimentBase:
     probe = None  # type: Optional[Probe]
     interpolation = 0
+    #: Set to True to have :meth:`save` write the reflectivity curves as a
+    #: binary file (see :mod:`.probe.data_loaders.binary`) instead of text.
+    binary_output = False
     _probe_cache = None
     _substrate = None
     _surface = None
+    _timer = NULL_TIMER
+    _precision = dict(precision="double")
+    _workspace = None  # type: Optional[Workspace]
     _webview_plots: dict[str, WebviewPlotInfo]
 
     def parameters(self):
@@ -109,21 +119,77 @@ class ExperimentBase:
         # print("reseting calculation")
         self._cache = {}
 
+    def enable_timing(self, enable=True):
+        """
+        Record the time spent in each stage of the theory calculation.
+
+        Timing is off by default.  When enabled, a "Timings" table is
+        registered with the webview showing the accumulated times for
+        the model.  Use :meth:`timings` to retrieve the values directly.
+        Enabling timing again clears the previous values.
+        """
+        self._set_timer(StageTimer() if enable else NULL_TIMER)
+        if enable:
+            self.register_webview_plot("Timings", _timing_table, change_with="parameter")
+        else:
+            self._webview_plots.pop("Timings", None)
+
+    def _set_timer(self, timer):
+        self._timer = timer
+
+    def set_precision(self, precision="double", R_floor=1e-8, max_phase=1e3):
+        """
+        Select the floating point precision for the reflectivity kernel.
+
+        Use *precision* "single" for early exploration with DE or DREAM, or
+        for large simulation sweeps, where speed matters more than accuracy.
+        Points with reflectivity below *R_floor*, and stacks where $k_z$
+        times the total thickness exceeds *max_phase* radians, are computed
+        in double precision.  See :func:`.sample.reflectivity.reflectivity_amplitude`.
+
+        Magnetic models are always computed in double precision.  The
+        setting is not saved with the model.
+        """
+        if precision not in ("double", "single"):
+            raise ValueError(f"precision should be 'double' or 'single', not {precision!r}")
+        self._set_precision(dict(precision=precision, R_floor=R_floor, max_phase=max_phase))
+        self.update()
+
+    def _set_precision(self, options):
+        self._precision = options
+
+    def timings(self):
+        """
+        Return the accumulated stage timings as a dictionary of
+        *{stage: {"calls": n, "total": seconds, "mean": seconds}}*.
+
+        The stages are *render* (sample.render), *finalize* (Microslabs
+        finalize, with sub-stages *align*, *interfaces* and *contract*),
+        *kernel* (reflectivity amplitude), *magnitude* (amplitude to
+        reflectivity), *apply_beam* (resolution, intensity and background)
+        and *residuals*.  Stages are only present once they have been
+        evaluated.  The result is empty if timing is not enabled.
+        """
+        return self._timer.summary()
+
     def residuals(self):
         if "residuals" not in self._cache:
             # Trigger reflectivity calculation even if there is no data to
             # compare against so that we can profile simulation code, and
             # so that simulation smoke tests are run more thoroughly.
             QR = self.reflectivity()
-            if (self.probe.polarized and all(x is None or x.R is None for x in self.probe.xs)) or (
-                not self.probe.polarized and self.probe.R is None
-            ):
-                resid = np.zeros(0)
-            else:
-                if self.probe.polarized:
-                    resid = np.hstack([(xs.R - QRi[1]) / xs.dR for xs, QRi in zip(self.probe.xs, QR) if xs is not None])
+            with self._timer("residuals"):
+                if (self.probe.polarized and all(x is None or x.R is None for x in self.probe.xs)) or (
+                    not self.probe.polarized and self.probe.R is None
+                ):
+                    resid = np.zeros(0)
                 else:
-                    resid = (self.probe.R - QR[1]) / self.probe.dR
+                    if self.probe.polarized:
+                        resid = np.hstack(
+                            [(xs.R - QRi[1]) / xs.dR for xs, QRi in zip(self.probe.xs, QR) if xs is not None]
+                        )
+                    else:
+                        resid = (self.probe.R - QR[1]) / self.probe.dR
             self._cache["residuals"] = resid
             # print(("%12s "*4)%("Q", "R", "dR", "Rtheory"))
             # print("\n".join(("%12.6e "*4)%el for el in zip(QR[0], self.probe.R, self.probe.dR, QR[1]))
@@ -196,8 +262,16 @@ class ExperimentBase:
         self.probe.restore_data()
 
     def write_data(self, filename, **kw):
-        """Save simulated data to a file"""
-        self.probe.write_data(filename, **kw)
+        """
+        Save simulated data to a file
+
+        If *filename* ends with :data:`.probe.data_loaders.binary.BINARY_EXTENSION`
+        the probe is written in binary.
+        """
+        if filename.endswith(BINARY_EXTENSION):
+            write_probe(filename, self.probe)
+        else:
+            self.probe.write_data(filename, **kw)
 
     def simulate_data(self, noise=2.0):
         """
@@ -306,13 +380,14 @@ class ExperimentBase:
 
     def save_refl(self, basename):
         # Reflectivity
+        ext = BINARY_EXTENSION if self.binary_output else ".dat"
         theory = self.reflectivity()
         self.probe.save(
-            filename=basename + "-refl.dat", theory=theory, substrate=self._substrate, surface=self._surface
+            filename=basename + "-refl" + ext, theory=theory, substrate=self._substrate, surface=self._surface
         )
         if self.interpolation > 0:
             theory = self.reflectivity(interpolation=self.interpolation)
-            self.probe.save(filename=basename + "-refl-interp.dat", theory=theory)
+            self.probe.save(filename=basename + "-refl-interp" + ext, theory=theory)
 
     def register_webview_plot(
         self, plot_title: str, plot_function: WebviewPlotFunction, change_with: Literal["parameter", "uncertainty"]
@@ -426,6 +501,7 @@ class Experiment(ExperimentBase):
         # num_slabs = len(probe.unique_L) if probe.unique_L is not None else 1
         num_slabs = 1
         self._slabs = profile.Microslabs(num_slabs, dz=dz)
+        self._workspace = self._slabs.workspace = Workspace()
         self._probe_cache = material.ProbeCache(probe)
         self._cache = {}  # Cache calculated profiles/reflectivities
         self.name = name if name is not None else probe.name
@@ -449,6 +525,10 @@ class Experiment(ExperimentBase):
             "probe": self.probe.parameters(),
         }
 
+    def _set_timer(self, timer):
+        self._timer = timer
+        self._slabs.timer = timer
+
     def _render_slabs(self):
         """
         Build a slab description of the model from the individual layers.
@@ -456,8 +536,11 @@ class Experiment(ExperimentBase):
         key = "rendered", self.step_interfaces, self.dA
         if key not in self._cache:
             self._slabs.clear()
-            self.sample.render(self._probe_cache, self._slabs)
-            self._slabs.finalize(step_interfaces=self.step_interfaces, dA=self.dA)
+            self._probe_cache.update()
+            with self._timer("render"):
+                self.sample.render(self._probe_cache, self._slabs)
+            with self._timer("finalize"):
+                self._slabs.finalize(step_interfaces=self.step_interfaces, dA=self.dA)
             # roughness_limit=self.roughness_limit)
             self._cache[key] = True
         return self._slabs
@@ -473,24 +556,29 @@ class Experiment(ExperimentBase):
             sigma = slabs.sigma
             # sigma = slabs.sigma
             calc_q = self.probe.calc_Q
+            # The kernel writes into the workspace, which the next evaluation
+            # reuses, so the cache keeps its own copy of the amplitude.
+            out = self._workspace_buffer("calc_r", (4, len(calc_q)) if slabs.ismagnetic else calc_q.shape)
             # print("calc Q", self.probe.calc_Q)
-            if slabs.ismagnetic:
-                rhoM, thetaM = slabs.rhoM, slabs.thetaM
-                Aguide = self.probe.Aguide.value
-                H = self.probe.H.value
-                calc_r = reflmag(
-                    -calc_q / 2,
-                    depth=w,
-                    rho=rho[0],
-                    irho=irho[0],
-                    rhoM=rhoM,
-                    thetaM=thetaM,
-                    Aguide=Aguide,
-                    H=H,
-                    sigma=sigma,
-                )
-            else:
-                calc_r = reflamp(-calc_q / 2, depth=w, rho=rho, irho=irho, sigma=sigma)
+            with self._timer("kernel"):
+                if slabs.ismagnetic:
+                    rhoM, thetaM = slabs.rhoM, slabs.thetaM
+                    Aguide = self.probe.Aguide.value
+                    H = self.probe.H.value
+                    calc_r = reflmag(
+                        -calc_q / 2,
+                        depth=w,
+                        rho=rho[0],
+                        irho=irho[0],
+                        rhoM=rhoM,
+                        thetaM=thetaM,
+                        Aguide=Aguide,
+                        H=H,
+                        sigma=sigma,
+                        out=out,
+                    )
+                else:
+                    calc_r = reflamp(-calc_q / 2, depth=w, rho=rho, irho=irho, sigma=sigma, out=out, **self._precision)
             if False and np.isnan(calc_r).any():
                 print("w", w)
                 print("rho", rho)
@@ -506,11 +594,18 @@ class Experiment(ExperimentBase):
                 fitted = parameter.varying(pars)
                 print(parameter.summarize(fitted))
                 print("===")
+            if slabs.ismagnetic:
+                calc_r = tuple(r.copy() for r in calc_r)
+            else:
+                calc_r = calc_r.copy()
             self._cache[key] = calc_q, calc_r
             # if np.isnan(calc_q).any(): print("calc_Q contains NaN")
             # if np.isnan(calc_r).any(): print("calc_r contains NaN")
         return self._cache[key]
 
+    def _workspace_buffer(self, name, shape):
+        return None if self._workspace is None else self._workspace.get(name, shape, "D")
+
     def amplitude(self, resolution=False, interpolation=0):
         """
         Calculate reflectivity amplitude at the probe points.
@@ -518,7 +613,8 @@ class Experiment(ExperimentBase):
         key = ("amplitude", resolution, interpolation)
         if key not in self._cache:
             calc_q, calc_r = self._reflamp()
-            res = self.probe.apply_beam(calc_q, calc_r, resolution=resolution, interpolation=interpolation)
+            with self._timer("apply_beam"):
+                res = self.probe.apply_beam(calc_q, calc_r, resolution=resolution, interpolation=interpolation)
             self._cache[key] = res
         return self._cache[key]
 
@@ -531,11 +627,127 @@ class Experiment(ExperimentBase):
         key = ("reflectivity", resolution, interpolation)
         if key not in self._cache:
             calc_q, calc_r = self._reflamp()
-            calc_R = _amplitude_to_magnitude(calc_r, ismagnetic=self.ismagnetic, polarized=self.probe.polarized)
-            res = self.probe.apply_beam(calc_q, calc_R, resolution=resolution, interpolation=interpolation)
+            if self.ismagnetic and self.probe.polarized and resolution and not interpolation:
+                # Magnitude, resolution and beam for all cross sections in one pass
+                with self._timer("apply_beam"):
+                    res = self.probe.apply_beam_magnetic(calc_q, calc_r)
+            else:
+                with self._timer("magnitude"):
+                    calc_R = _amplitude_to_magnitude(calc_r, ismagnetic=self.ismagnetic, polarized=self.probe.polarized)
+                with self._timer("apply_beam"):
+                    res = self.probe.apply_beam(calc_q, calc_R, resolution=resolution, interpolation=interpolation)
             self._cache[key] = res
         return self._cache[key]
 
+    def jacobian(self, pars=None, step=None):
+        """
+        Return the derivative of the residuals with respect to the fitted
+        parameters as an array of shape (len(residuals), len(pars)).
+
+        *pars* defaults to the varying parameters of the model.
+
+        For non-magnetic models built from :class:`.layers.Slab` layers with
+        :class:`.material.SLD` materials, the thickness, interface, rho and
+        irho columns are computed analytically from a single augmented
+        pass through the reflectivity kernel.  The remaining columns use
+        forward differences, with *step* interpreted as in
+        :func:`bumps.lsqerror.jacobian`.  The current parameter values are
+        preserved.
+        """
+        if pars is None:
+            pars = parameter.varying(parameter.unique(self.parameters()))
+        resid = self.residuals()
+        J = np.empty((len(resid), len(pars)))
+        if len(resid) == 0:
+            return J
+
+        roles = self._slab_roles(pars)
+        analytic = [k for k, p in enumerate(pars) if id(p) in roles]
+        if analytic:
+            J[:, analytic] = self._slab_jacobian([roles[id(pars[k])] for k in analytic])
+
+        numeric = [k for k, p in enumerate(pars) if id(p) not in roles]
+        step = 1e-4 if step is None else np.sqrt(step)
+        for k in numeric:
+            p = pars[k]
+            value = p.value
+            h = abs(value) * step if value != 0 else step
+            bounds = getattr(p, "bounds", None)
+            if bounds is not None and value + h > bounds[1]:
+                h = -h  # step backward if forward step is out of bounds
+            p.value = value + h
+            self.update()
+            J[:, k] = (self.residuals() - resid) / h
+            p.value = value
+        if numeric:
+            self.update()
+        return J
+
+    def _slab_roles(self, pars):
+        """
+        Return {id(p): [(kind, index), ...]} for the parameters in *pars*
+        whose only effect on the model is to set slab values, where *kind*
+        is one of depth, sigma, rho or irho.  Parameters which are also used
+        in expressions or elsewhere in the model are excluded.
+        """
+        n = len(self.sample)
+        stack = [self.sample[i] for i in range(n)]
+        if (
+            self.step_interfaces
+            or self.probe.polarized
+            or not all(isinstance(L, layers.Slab) and isinstance(L.material, material.SLD) for L in stack)
+        ):
+            return {}
+        slabs = self._render_slabs()
+        if slabs.ismagnetic or len(slabs.w) != n:
+            return {}
+
+        uses, roles = {}, {}
+        for i, L in enumerate(stack):
+            for kind, p in (
+                ("depth", L.thickness),
+                ("sigma", L.interface),
+                ("rho", L.material.rho),
+                ("irho", L.material.irho),
+            ):
+                uses[id(p)] = uses.get(id(p), 0) + 1
+                # the interface above the surface layer is not used
+                if kind != "sigma" or i < n - 1:
+                    roles.setdefault(id(p), []).append((kind, i))
+
+        tree = parameter.flatten(self.parameters())
+        count, derived = {}, set()
+        for p in tree:
+            count[id(p)] = count.get(id(p), 0) + 1
+            if not getattr(p, "fittable", False):
+                derived.update(id(q) for q in p.parameters() if q is not p)
+        return {
+            id(p): roles.get(id(p), [])
+            for p in pars
+            if id(p) in uses and uses[id(p)] == count.get(id(p), 0) and id(p) not in derived
+        }
+
+    def _slab_jacobian(self, roles):
+        """
+        Chain the kernel derivatives through the beam into residual
+        derivatives for each parameter role list in *roles*.
+        """
+        slabs = self._render_slabs()
+        calc_q = self.probe.calc_Q
+        with self._timer("kernel"):
+            r, *dr = refljac(-calc_q / 2, depth=slabs.w, rho=slabs.rho, irho=slabs.irho, sigma=slabs.sigma)
+        dr = dict(zip(("depth", "sigma", "rho", "irho"), dr))
+        # apply_beam is affine in R, so subtract the response to R = 0
+        _, base = self.probe.apply_beam(calc_q, np.zeros_like(calc_q))
+        J = np.empty((len(base), len(roles)))
+        for k, uses in enumerate(roles):
+            dr_dp = np.zeros_like(r)
+            for kind, index in uses:
+                dr_dp += dr[kind][:, index]
+            dR = 2 * (np.conj(r) * dr_dp).real
+            J[:, k] = self.probe.apply_beam(calc_q, dR)[1] - base
+        return -J / self.probe.dR[:, None]
+
     def smooth_profile(self, dz=0.1):
         """
         Return the scattering potential for the sample.
@@ -722,6 +934,17 @@ class MixedExperiment(ExperimentBase):
         for p in self.parts:
             p.update()
 
+    def _set_timer(self, timer):
+        # The parts share the timer so that the stages accumulate across samples.
+        self._timer = timer
+        for p in self.parts:
+            p._set_timer(timer)
+
+    def _set_precision(self, options):
+        self._precision = options
+        for p in self.parts:
+            p._set_precision(options)
+
     def parameters(self):
         return {
             "samples": [s.parameters() for s in self.samples],
@@ -791,15 +1014,17 @@ class MixedExperiment(ExperimentBase):
                         r[i] = _polarized_nonmagnetic(r[i])
 
             # Add the cross sections
-            if self.coherent:
-                r = np.sum(r, axis=0)
-                R = _amplitude_to_magnitude(r, ismagnetic=ismagnetic, polarized=polarized)
-            else:
-                R = [_amplitude_to_magnitude(ri, ismagnetic=ismagnetic, polarized=polarized) for ri in r]
-                R = np.sum(R, axis=0)
+            with self._timer("magnitude"):
+                if self.coherent:
+                    r = np.sum(r, axis=0)
+                    R = _amplitude_to_magnitude(r, ismagnetic=ismagnetic, polarized=polarized)
+                else:
+                    R = [_amplitude_to_magnitude(ri, ismagnetic=ismagnetic, polarized=polarized) for ri in r]
+                    R = np.sum(R, axis=0)
 
             # Apply resolution
-            res = self.probe.apply_beam(Q, R, resolution=resolution, interpolation=0)
+            with self._timer("apply_beam"):
+                res = self.probe.apply_beam(Q, R, resolution=resolution, interpolation=0)
             self._cache[key] = res
         return self._cache[key]
 
@@ -845,6 +1070,79 @@ def plot_sample(sample, instrument=None, roughness_limit=0):
     experiment.plot()
 
 
+def prepare_points(problem, points):
+    """
+    Prepare the layers of *problem* for evaluation at each of *points*.
+
+    Some layers, such as :class:`.sample.polymer.EndTetheredPolymer`, solve
+    for their profile and cache the solutions.  The solver inputs for every
+    point are gathered using :meth:`.sample.layers.Layer.batch_parameters`
+    and each solver is called once for the whole population, so that the
+    following evaluations of the points reuse the cached solutions.  The
+    problem is returned to its current point afterward.
+
+    This does nothing if no layer in the problem provides a batch solver.
+    """
+    if not _batch_parameters(problem):
+        return
+    saved = problem.getp()
+    batch = {}
+    try:
+        for p in points:
+            problem.setp(p)
+            for solver, inputs in _batch_parameters(problem).items():
+                batch.setdefault(solver, []).extend(inputs)
+    finally:
+        problem.setp(saved)
+    for solver, inputs in batch.items():
+        solver(inputs)
+
+
+def batch_mapper(problem, mapper=None):
+    """
+    Return a mapper for the fitters which calls :func:`prepare_points` on
+    each population before evaluating it with *mapper*.
+
+    The default *mapper* evaluates the points in turn in the current process.
+    Cached solutions are not shared with worker processes, so use this with
+    mappers which evaluate *problem* in the current process.  For example,
+    to fit with DREAM::
+
+        from bumps.fitters import DreamFit, FitDriver
+        driver = FitDriver(DreamFit, problem=problem, mapper=batch_mapper(problem))
+        x, fx = driver.fit()
+    """
+    if mapper is None:
+
+        def mapper(points):
+            return [problem.nllf(p) for p in points]
+
+    def prepared(points):
+        prepare_points(problem, points)
+        return mapper(points)
+
+    return prepared
+
+
+def _batch_parameters(problem):
+    batch = {}
+    for m in problem.models:
+        for part in getattr(m, "parts", [m]):
+            sample = getattr(part, "sample", None)
+            if sample is None:
+                continue
+            for solver, inputs in sample.batch_parameters().items():
+                batch.setdefault(solver, []).extend(inputs)
+    return batch
+
+
+def _timing_table(model, problem):
+    """
+    Webview plot showing the stage timings accumulated by *model*.
+    """
+    return dict(fig_type="table", plotdata=model._timer.to_csv(), exportdata=None)
+
+
 def _polarized_nonmagnetic(r):
     """Convert nonmagnetic data to polarized representation.
 
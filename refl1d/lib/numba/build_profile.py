@@ -32,5 +32,8 @@ MODULE.blend = blend
 
 # BUILD_PROFILE_SIG = 'void(f8[:], f8[:], f8[:], f8[:], f8[:], f8[:,:])'
 # build_profile = numba.njit(BUILD_PROFILE_SIG)(MODULE.build_profile)
+_build_profile_full = numba.njit(cache=True)(MODULE._build_profile_full)
+MODULE._build_profile_full = _build_profile_full
+
 build_profile = numba.njit(cache=True)(MODULE.build_profile)
 MODULE.build_profile = build_profile
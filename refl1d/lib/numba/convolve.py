@@ -8,6 +8,7 @@ MODULE.prange = numba.prange
 convolve_uniform = numba.njit("(f8[:], f8[:], f8[:], f8[:], f8[:])", cache=True, parallel=False)(
     MODULE.convolve_uniform
 )
+MODULE.convolve_uniform = convolve_uniform
 
 convolve_gaussian_point = numba.njit(
     "f8(f8[:], f8[:], i8, i8, f8, f8, f8)",
@@ -43,3 +44,22 @@ convolve_gaussian = numba.njit(
         "k_out": numba.int64,
     },
 )(MODULE.convolve_gaussian)
+
+MODULE.abs2 = numba.njit("f8(c16)", cache=True)(MODULE.abs2)
+
+convolve_gaussian_amplitude = numba.njit(
+    "(f8[:], c16[:, :], f8[:], f8[:], f8[:, :])",
+    cache=True,
+    parallel=False,
+    locals={
+        "sigma": numba.float64,
+        "xo": numba.float64,
+        "limit": numba.float64,
+        "k_in": numba.int64,
+        "k_out": numba.int64,
+    },
+)(MODULE.convolve_gaussian_amplitude)
+
+convolve_uniform_amplitude = numba.njit("(f8[:], c16[:, :], f8[:], f8[:], f8[:, :])", cache=True, parallel=False)(
+    MODULE.convolve_uniform_amplitude
+)
@@ -3,6 +3,8 @@ from .clone_module import clone_module
 
 MODULE = clone_module("refl1d.lib.python.rebin")
 
+MODULE.prange = numba.prange
+
 # Define a bin iterator to adapt to either forward or reversed inputs.
 spec = [
     ("forward", numba.boolean),
@@ -26,3 +28,9 @@ MODULE.rebin_counts = rebin_counts
 rebin_intensity = numba.njit(parallel=False, cache=True)(MODULE.rebin_intensity)
 
 rebin_counts_2D = numba.njit(cache=True)(MODULE.rebin_counts_2D)
+MODULE.rebin_counts_2D = rebin_counts_2D
+
+# Batches are parallel over the spectra, each rebinned by the serial kernel.
+rebin_counts_batch = numba.njit(parallel=True, cache=True)(MODULE.rebin_counts_batch)
+
+rebin_counts_2D_batch = numba.njit(parallel=True, cache=True)(MODULE.rebin_counts_2D_batch)
@@ -28,3 +28,42 @@ REFLAMP_SIG = "void(f8[:], f8[:], f8[:,:], f8[:,:], f8[:], i4[:], c16[:])"
 reflectivity_amplitude = numba.njit(REFLAMP_SIG, parallel=False, cache=True, locals={"offset": numba.int64})(
     MODULE.reflectivity_amplitude
 )
+
+# Single precision variant for exploratory fits.  The kernel functions are
+# compiled from a separate copy of the python module so that refl() can be
+# bound to the float32 version without disturbing the double precision one.
+MODULE_F32 = clone_module("refl1d.lib.python.reflectivity")
+
+_REFL_F32_SIG = "c8(i8, f4, f4[:], f4[:], f4[:], f4[:])"
+_REFL_F32_LOCALS = {
+    name: (numba.complex64 if ty == numba.complex128 else numba.float32 if ty == numba.float64 else ty)
+    for name, ty in _REFL_LOCALS.items()
+}
+
+refl_f32 = numba.njit(_REFL_F32_SIG, parallel=False, cache=True, locals=_REFL_F32_LOCALS)(MODULE_F32.refl)
+MODULE_F32.refl = refl_f32
+
+REFLAMP_F32_SIG = "void(f4[:], f4[:], f4[:,:], f4[:,:], f4[:], i4[:], c8[:])"
+
+reflectivity_amplitude_f32 = numba.njit(REFLAMP_F32_SIG, parallel=False, cache=True, locals={"offset": numba.int64})(
+    MODULE_F32.reflectivity_amplitude
+)
+
+_REFL_JAC_SIG = "c16(i8, f8, f8[:], f8[:], f8[:], f8[:], c16[:,:], c16[:], c16[:], c16[:], c16[:])"
+_REFL_JAC_LOCALS = dict(_REFL_LOCALS)
+_REFL_JAC_LOCALS.update(("P{i}{j}".format(i=i, j=j), numba.complex128) for i in range(1, 3) for j in range(1, 3))
+_REFL_JAC_LOCALS.update(
+    (name, numba.complex128)
+    for name in ("r", "S1", "S2", "MS1", "MS2", "V1", "V2", "dA00", "dA10", "E", "Einv", "ksum", "f", "g")
+)
+_REFL_JAC_LOCALS.update((name, numba.complex128) for name in ("dF_dk", "dF_dknext", "dF_ds", "dk_drho"))
+_REFL_JAC_LOCALS.update(first=numba.int64, i_next=numba.int64, d=numba.float64, s=numba.float64)
+
+refl_jacobian = numba.njit(_REFL_JAC_SIG, parallel=False, cache=True, locals=_REFL_JAC_LOCALS)(MODULE.refl_jacobian)
+MODULE.refl_jacobian = refl_jacobian
+
+REFLJAC_SIG = "void(f8[:], f8[:], f8[:,:], f8[:,:], f8[:], i4[:], c16[:], c16[:,:], c16[:,:], c16[:,:], c16[:,:])"
+
+reflectivity_jacobian = numba.njit(REFLJAC_SIG, parallel=False, cache=True, locals={"offset": numba.int64})(
+    MODULE.reflectivity_jacobian
+)
@@ -1,27 +1,37 @@
 __all__ = [
     "reflectivity_amplitude",
+    "reflectivity_jacobian",
     "magnetic_amplitude",
     "calculate_u1_u3",
     "build_profile",
     "convolve_gaussian",
     "convolve_uniform",
+    "convolve_gaussian_amplitude",
+    "convolve_uniform_amplitude",
     "convolve_sampled",
     "align_magnetic",
     "contract_by_area",
     "contract_mag",
     "rebin_counts",
     "rebin_counts_2D",
+    "rebin_counts_batch",
+    "rebin_counts_2D_batch",
 ]
 
 from .reflectivity import reflectivity_amplitude
+from .reflectivity import reflectivity_jacobian
 from .magnetic import magnetic_amplitude
 from .magnetic import calculate_u1_u3
 from .build_profile import build_profile
 from .convolve import convolve_gaussian
 from .convolve import convolve_uniform
+from .convolve import convolve_gaussian_amplitude
+from .convolve import convolve_uniform_amplitude
 from .convolve_sampled import convolve_sampled
 from .contract_profile import align_magnetic
 from .contract_profile import contract_by_area
 from .contract_profile import contract_mag
 from .rebin import rebin_counts
 from .rebin import rebin_counts_2D
+from .rebin import rebin_counts_batch
+from .rebin import rebin_counts_2D_batch
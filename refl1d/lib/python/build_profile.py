@@ -1,7 +1,10 @@
 import numpy as np
-from math import erf
+from scipy.special import erf as verf
 
-verf = np.vectorize(erf)
+
+# Beyond WINDOW sigma from the interface erf rounds to +/-1 in double
+# precision, so the blend is a pure step there.
+WINDOW = 9.0
 
 
 def build_profile(z, offset, roughness, contrast, initial_value, profiles):
@@ -15,6 +18,11 @@ def build_profile(z, offset, roughness, contrast, initial_value, profiles):
     *initial_value* starting value for each profile, shape = (NP)
 
     *profiles*   (output) results of calculation, shape = (NP * NZ, order="C")
+
+    If *z* is sorted then the blend function is only evaluated within
+    WINDOW sigma of each interface, with the remaining points beyond the
+    interface receiving the full contrast through a cumulative sum of steps.
+    This reduces the cost from O(NI NZ) to O(NZ + NI W) for window size W.
     """
     # Number of z values:
     NZ = len(z)
@@ -26,6 +34,40 @@ def build_profile(z, offset, roughness, contrast, initial_value, profiles):
     contrast_shaped = contrast.reshape((NP, NI))
     profiles_shaped = profiles.reshape((NP, NZ))  # view - updates affect profiles
 
+    if NZ > 1 and not np.all(z[1:] >= z[:-1]):
+        _build_profile_full(z, offset, roughness, contrast_shaped, initial_value, profiles_shaped)
+        return
+
+    # steps[:, j] holds the contrast of the interfaces which are complete
+    # by z[j]; the cumulative sum converts these into the step profile.
+    steps = np.zeros((NP, NZ + 1))
+    for i in range(NI):
+        offset_i = offset[i]
+        sigma_i = roughness[i]
+        contrast_i = contrast_shaped[:, i].copy()
+        width = WINDOW * sigma_i if sigma_i > 0.0 else 0.0
+        lo = np.searchsorted(z, offset_i - width)
+        hi = np.searchsorted(z, offset_i + width)
+        if hi > lo:
+            blended = blend(z[lo:hi], sigma_i, offset_i)
+            delta = contrast_i.reshape((NP, 1)) * blended.reshape((1, hi - lo))
+            profiles_shaped[:, lo:hi] += delta
+        steps[:, hi] += contrast_i
+
+    for p in range(NP):
+        profiles_shaped[p] += initial_value[p] + np.cumsum(steps[p, :NZ])
+
+    return
+
+
+def _build_profile_full(z, offset, roughness, contrast_shaped, initial_value, profiles_shaped):
+    """
+    Evaluate the blend for every interface at every point of *z*.
+    """
+    NZ = len(z)
+    NP = initial_value.shape[0]
+    NI = len(offset)
+
     profiles_shaped += initial_value.reshape((NP, 1))
     for i in range(NI):
         offset_i = offset[i]
@@ -37,8 +79,6 @@ def build_profile(z, offset, roughness, contrast, initial_value, profiles):
         # delta = contrast_i[:, None] * blended[None, :]
         profiles_shaped += delta
 
-    return
-
 
 SQRT1_2 = 1.0 / np.sqrt(2.0)
 
@@ -1,5 +1,7 @@
 from math import erf, sqrt, exp
 
+import numpy as np
+
 PI4 = 12.56637061435917295385
 PI_180 = 0.01745329251994329576
 LN256 = 5.54517744447956247533
@@ -217,3 +219,82 @@ def convolve_gaussian(xin, yin, x, dx, y):
             # /* Can't happen because there is more than one point in xin. */
             # assert(Nin>1)
             pass
+
+
+def abs2(z):
+    return z.real * z.real + z.imag * z.imag
+
+
+def convolve_gaussian_amplitude(xin, rin, x, dx, y):
+    # Gaussian convolution of |rin[j]|^2 for each row j, with the resolution
+    # integrals at each output point computed once and shared by the rows.
+    # Follows convolve_gaussian and convolve_gaussian_point.
+    Nin = len(xin)
+    Nout = len(x)
+    Nrows = rin.shape[0]
+    total = np.empty(Nrows)
+    yin = np.empty((Nrows, Nin))
+    for j in range(Nrows):
+        for k in range(Nin):
+            yin[j, k] = abs2(rin[j, k])
+
+    k_in = 0
+    for k_out in range(Nout):
+        sigma = dx[k_out]
+        xo = x[k_out]
+        limit = sqrt(-2.0 * sigma * sigma * LOG_RESLIMIT)
+
+        while k_in < Nin - 1 and xin[k_in] < xo - limit:
+            k_in += 1
+        while k_in > 0 and xin[k_in] > xo - limit:
+            k_in -= 1
+
+        if sigma > 0.0:
+            two_sigma_sq = 2.0 * sigma * sigma
+            k = k_in
+            z = xo - xin[k]
+            Glo = exp(-z * z / two_sigma_sq)
+            erfmin = erflo = erf(-z / (SQRT2 * sigma))
+            for j in range(Nrows):
+                total[j] = 0.0
+            while k < Nin - 1:
+                k += 1
+                if xin[k] != xin[k - 1]:
+                    zhi = xo - xin[k]
+                    Ghi = exp(-zhi * zhi / two_sigma_sq)
+                    erfhi = erf(-zhi / (SQRT2 * sigma))
+                    for j in range(Nrows):
+                        m = (yin[j, k] - yin[j, k - 1]) / (xin[k] - xin[k - 1])
+                        b = yin[j, k] - m * xin[k]
+                        total[j] += 0.5 * (m * xo + b) * (erfhi - erflo) - sigma / SQRT2PI * m * (Ghi - Glo)
+                    Glo = Ghi
+                    erflo = erfhi
+                    if xin[k] >= xo + limit:
+                        break
+            for j in range(Nrows):
+                y[j, k_out] = 2 * total[j] / (erflo - erfmin)
+        elif k_in < Nin - 1:
+            # Linear interpolation
+            for j in range(Nrows):
+                ylo, yhi = yin[j, k_in], yin[j, k_in + 1]
+                m = (yhi - ylo) / (xin[k_in + 1] - xin[k_in])
+                b = ylo - m * xin[k_in]
+                y[j, k_out] = m * xo + b
+        elif k_in > 0:
+            # Linear extrapolation
+            for j in range(Nrows):
+                ylo, yhi = yin[j, k_in - 1], yin[j, k_in]
+                m = (yhi - ylo) / (xin[k_in] - xin[k_in - 1])
+                b = yhi - m * xin[k_in]
+                y[j, k_out] = m * xo + b
+
+
+def convolve_uniform_amplitude(xi, ri, x, dx, y):
+    # Uniform convolution of |ri[j]|^2 for each row j.  The uniform weights
+    # are cheap, so there is little to share between rows; just form the
+    # magnitude of each row in turn and convolve.
+    yi = np.empty(len(xi))
+    for j in range(ri.shape[0]):
+        for k in range(len(xi)):
+            yi[k] = abs2(ri[j, k])
+        convolve_uniform(xi, yi, x, dx, y[j])
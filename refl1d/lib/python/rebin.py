@@ -1,5 +1,7 @@
 import math
 
+prange = range
+
 
 class BinIter:
     def __init__(self, n, edges):
@@ -152,3 +154,20 @@ def rebin_counts_2D(xold, yold, Iold, xnew, ynew, Inew):
                 _from.increment()
             else:
                 _to.increment()
+
+
+def rebin_counts_batch(xold, Iold, xnew, Inew):
+    # Rebin each row of Iold onto the common edges xnew.  xold holds the
+    # edges for each row, or a single row of edges shared by all rows.
+    shared = xold.shape[0] == 1
+    for k in prange(Iold.shape[0]):
+        rebin_counts(xold[0] if shared else xold[k], Iold[k], xnew, Inew[k])
+
+
+def rebin_counts_2D_batch(xold, yold, Iold, xnew, ynew, Inew):
+    # Rebin each frame Iold[k] onto the common edges xnew, ynew.  xold and
+    # yold hold the edges for each frame, or a single row of shared edges.
+    xshared = xold.shape[0] == 1
+    yshared = yold.shape[0] == 1
+    for k in prange(Iold.shape[0]):
+        rebin_counts_2D(xold[0] if xshared else xold[k], yold[0] if yshared else yold[k], Iold[k], xnew, ynew, Inew[k])
@@ -1,3 +1,4 @@
+import numpy as np
 from numpy import fabs, sqrt, exp
 
 
@@ -61,3 +62,159 @@ def reflectivity_amplitude(depth, sigma, rho, irho, kz, rho_index, r):
     for i in range(points):
         offset = rho_index[i]
         r[i] = refl(layers, kz[i], depth, sigma, rho[offset], irho[offset])
+
+
+def refl_jacobian(layers, kz, depth, sigma, rho, irho, work, dr_ddepth, dr_dsigma, dr_drho, dr_dirho):
+    J = 1j
+
+    # // Forward mode derivative of refl() with respect to the slab parameters.
+    # // The reflectivity comes from the first column of the product of the
+    # // layer matrices A = M_0 M_1 ... M_{n-1}, with r = A_10 / A_00.  Each
+    # // layer parameter x enters only a couple of the M_i, and
+    # //     dA/dx = sum_i (M_0 ... M_{i-1}) dM_i/dx (M_{i+1} ... M_{n-1})
+    # // so we save the prefix products on the way up the stack and apply the
+    # // suffix products on the way back down, giving all derivatives in O(n).
+    # // work[:, 0] holds the wavevector k in each layer, work[:, 1:5] holds
+    # // the prefix product for each interface and work[:, 5] accumulates dr/dk.
+    for i in range(layers):
+        dr_ddepth[i] = dr_drho[i] = dr_dirho[i] = 0
+        work[i, 5] = 0
+    for i in range(layers - 1):
+        dr_dsigma[i] = 0
+
+    cutoff = 1e-10
+    sigma_offset = 0
+    if kz >= cutoff:
+        first = 0
+        step = 1
+    elif kz <= -cutoff:
+        first = layers - 1
+        step = -1
+        sigma_offset = -1
+    else:
+        return complex(-1, 0)
+
+    pi4 = 12.566370614359172e-6  # // 1e-6 * 4 pi
+    kz_sq = kz * kz + pi4 * rho[first]  # // kz^2 + 4 pi Vrho
+    for i in range(layers):
+        work[i, 0] = sqrt(kz_sq - pi4 * complex(rho[i], irho[i]))
+    work[first, 0] = fabs(kz)
+
+    # // Walk up the stack saving the prefix products.
+    B11 = B22 = 1
+    B12 = B21 = 0
+    i_next = first
+    for i in range(layers - 1):
+        work[i, 1] = B11
+        work[i, 2] = B21
+        work[i, 3] = B12
+        work[i, 4] = B22
+        k = work[i_next, 0]
+        k_next = work[i_next + step, 0]
+        F = (k - k_next) / (k + k_next) * exp(-2.0 * k * k_next * sigma[sigma_offset + i_next] ** 2)
+        M11 = exp(J * k * depth[i_next]) if i > 0 else 1.0
+        M22 = exp(-J * k * depth[i_next]) if i > 0 else 1.0
+        M21 = F * M11
+        M12 = F * M22
+        C1 = B11 * M11 + B21 * M12
+        C2 = B11 * M21 + B21 * M22
+        B11 = C1
+        B21 = C2
+        C1 = B12 * M11 + B22 * M12
+        C2 = B12 * M21 + B22 * M22
+        B12 = C1
+        B22 = C2
+        i_next += step
+    r = B12 / B11
+
+    # // Walk back down the stack applying the suffix products.  S1, S2 is
+    # // the first column of the product of the layers above interface i.
+    S1 = 1.0 + 0j
+    S2 = 0j
+    for i in range(layers - 2, -1, -1):
+        i_next -= step
+        k = work[i_next, 0]
+        k_next = work[i_next + step, 0]
+        d = depth[i_next] if i > 0 else 0.0
+        s = sigma[sigma_offset + i_next]
+        E = exp(J * k * d)
+        Einv = exp(-J * k * d)
+        ksum = k + k_next
+        f = (k - k_next) / ksum
+        g = exp(-2.0 * k * k_next * s**2)
+        F = f * g
+        dF_dk = g * (2.0 * k_next / ksum**2 - 2.0 * f * k_next * s**2)
+        dF_dknext = g * (-2.0 * k / ksum**2 - 2.0 * f * k * s**2)
+        dF_ds = -4.0 * F * k * k_next * s
+        # // Layer matrix applied to the suffix column: M S
+        MS1 = E * S1 + F * E * S2
+        MS2 = F * Einv * S1 + Einv * S2
+        # // Prefix matrix for the interface
+        P11 = work[i, 1]
+        P21 = work[i, 2]
+        P12 = work[i, 3]
+        P22 = work[i, 4]
+
+        # // d/dk: exp(+-ikd) and F both depend on k
+        V1 = J * d * E * S1 + (dF_dk * E + J * d * F * E) * S2
+        V2 = (dF_dk * Einv - J * d * F * Einv) * S1 - J * d * Einv * S2
+        dA00 = P11 * V1 + P21 * V2
+        dA10 = P12 * V1 + P22 * V2
+        work[i_next, 5] += (dA10 - r * dA00) / B11
+
+        # // d/dk_next: only F
+        V1 = dF_dknext * E * S2
+        V2 = dF_dknext * Einv * S1
+        dA00 = P11 * V1 + P21 * V2
+        dA10 = P12 * V1 + P22 * V2
+        work[i_next + step, 5] += (dA10 - r * dA00) / B11
+
+        # // d/ddepth: exp(+-ikd), ignoring the depth of the incident medium
+        if i > 0:
+            V1 = J * k * E * S1 + J * k * F * E * S2
+            V2 = -J * k * F * Einv * S1 - J * k * Einv * S2
+            dA00 = P11 * V1 + P21 * V2
+            dA10 = P12 * V1 + P22 * V2
+            dr_ddepth[i_next] = (dA10 - r * dA00) / B11
+
+        # // d/dsigma: only F
+        V1 = dF_ds * E * S2
+        V2 = dF_ds * Einv * S1
+        dA00 = P11 * V1 + P21 * V2
+        dA10 = P12 * V1 + P22 * V2
+        dr_dsigma[sigma_offset + i_next] = (dA10 - r * dA00) / B11
+
+        S1 = MS1
+        S2 = MS2
+
+    # // Chain dr/dk through to rho, irho.  The incident medium sets kz_sq
+    # // and so contributes to k in every other layer.
+    for i in range(layers):
+        if i != first:
+            dk_drho = -0.5 * pi4 / work[i, 0]
+            dr_drho[i] = work[i, 5] * dk_drho
+            dr_dirho[i] = work[i, 5] * dk_drho * J
+            dr_drho[first] -= dr_drho[i]
+
+    return r
+
+
+def reflectivity_jacobian(depth, sigma, rho, irho, kz, rho_index, r, dr_ddepth, dr_dsigma, dr_drho, dr_dirho):
+    layers = len(depth)
+    points = len(kz)
+    work = np.empty((layers, 6), np.complex128)
+    for i in range(points):
+        offset = rho_index[i]
+        r[i] = refl_jacobian(
+            layers,
+            kz[i],
+            depth,
+            sigma,
+            rho[offset],
+            irho[offset],
+            work,
+            dr_ddepth[i],
+            dr_dsigma[i],
+            dr_drho[i],
+            dr_dirho[i],
+        )
@@ -0,0 +1,252 @@
+"""
+Memory-mapped binary container for reduced reflectivity data.
+
+Large polarized time-of-flight datasets are slow to round trip through
+text.  This format stores each probe as float64 columns (Q, dQ, R, dR,
+T, dT, L, dL and the oversampled calculation grid) following a JSON
+header.  Every column is aligned so that it can be viewed directly from
+a :class:`numpy.memmap` of the file without copying.  Saved fits can
+also store the theory and Fresnel curves next to the data.
+
+File layout::
+
+    magic    8 bytes   b"REFL1DB1"
+    length   8 bytes   little-endian uint64 size of the JSON header
+    header   JSON text, padded with spaces to a 64 byte boundary
+    columns  little-endian float64 columns, each on a 64 byte boundary
+
+The header records the probe type, the values of the beam parameters and
+the polarization state of each section.  Parameters are restored as new
+parameters with the stored values; constraints between them are not saved.
+
+Files with the extension :data:`BINARY_EXTENSION` are recognized by
+:func:`.load4.load4` and written by :meth:`.probe.Probe.write_data`,
+:meth:`.probe.Probe.save` and :meth:`.experiment.Experiment.save` when
+the experiment has *binary_output* set.
+
+Example::
+
+    >>> import os, tempfile
+    >>> from refl1d.probe import NeutronProbe
+    >>> probe = NeutronProbe(T=[0.5, 1.0, 1.5], dT=0.01, L=4.75, dL=0.04, data=([0.9, 0.1, 0.01], [0.01] * 3))
+    >>> path = os.path.join(tempfile.mkdtemp(), "probe" + BINARY_EXTENSION)
+    >>> write_probe(path, probe)
+    >>> copy = load_probe(path)
+    >>> bool((copy.Q == probe.Q).all()), isinstance(copy.R, np.memmap)
+    (True, True)
+"""
+
+__all__ = ["BINARY_EXTENSION", "write_probe", "read_binary", "load_probe"]
+
+import json
+import struct
+from dataclasses import asdict
+
+import numpy as np
+
+from ..probe import (
+    NeutronProbe,
+    OversampledRegion,
+    PolarizedNeutronProbe,
+    PolarizedQProbe,
+    ProbeSet,
+    QProbe,
+    XrayProbe,
+)
+
+#: File extension for binary probe files.
+BINARY_EXTENSION = ".reflb"
+
+MAGIC = b"REFL1DB1"
+ALIGN = 64
+# Cross sections in PolarizedNeutronProbe.xs order
+XS_LABELS = ("--", "-+", "+-", "++")
+
+_PROBE_TYPES = dict((cls.__name__, cls) for cls in (NeutronProbe, XrayProbe, QProbe))
+_POLARIZED_TYPES = dict((cls.__name__, cls) for cls in (PolarizedNeutronProbe, PolarizedQProbe))
+# Probe attributes stored for each probe type
+_QPROBE_COLUMNS = {"Q": "Q", "dQ": "dQ", "R": "R", "dR": "dR", "calc_Q": "_calc_Q"}
+_TLPROBE_COLUMNS = {
+    "Q": "Qo",
+    "dQ": "dQo",
+    "R": "R",
+    "dR": "dR",
+    "T": "T",
+    "dT": "dT",
+    "L": "L",
+    "dL": "dL",
+    "calc_T": "calc_T",
+    "calc_L": "calc_L",
+    "calc_Q": "_calc_Q",
+}
+
+
+def write_probe(filename, probe, theory=None, substrate=None, surface=None):
+    """
+    Write *probe* to a binary file.
+
+    *probe* can be a single probe, a :class:`.probe.ProbeSet` or a polarized
+    probe.  If *theory* is given, as returned from
+    :meth:`.experiment.Experiment.reflectivity`, then the theory curve
+    (columns *theory_Q* and *theory*) and the Fresnel reflectivity of the
+    *substrate* and *surface* (column *fresnel*) are stored with the data.
+    """
+    header = {"type": type(probe).__name__, "name": probe.name}
+    if probe.polarized:
+        if theory is None:
+            theory = [None] * 4
+        parts = [(xs, th, label) for xs, th, label in zip(probe.xs, theory, XS_LABELS) if xs is not None]
+        header.update(
+            Aguide=probe.Aguide.value,
+            H=probe.H.value,
+            oversampling=probe.oversampling,
+            oversampling_seed=probe.oversampling_seed,
+            oversampled_regions=[asdict(r) for r in probe.oversampled_regions],
+        )
+    elif isinstance(probe, ProbeSet):
+        parts = [(p, th, None) for p, th in probe.parts(theory)]
+    else:
+        parts = [(probe, theory, None)]
+
+    sections, columns = [], []
+    for p, th, label in parts:
+        meta, data = _probe_columns(p, th, substrate, surface)
+        meta["polarization"] = label
+        sections.append((meta, data))
+        columns.extend(data.values())
+
+    # The header holds the column offsets, so its length depends on where
+    # the data starts.  Grow the reserved space until the header fits.
+    start = ALIGN
+    while True:
+        offset = start
+        for meta, data in sections:
+            meta["columns"] = {}
+            for name, values in data.items():
+                meta["columns"][name] = [offset, len(values)]
+                offset += _aligned(8 * len(values))
+        header["sections"] = [meta for meta, _ in sections]
+        text = json.dumps(header).encode("utf-8")
+        if 16 + len(text) <= start:
+            break
+        start = _aligned(16 + len(text))
+
+    with open(filename, "wb") as fid:
+        fid.write(MAGIC)
+        fid.write(struct.pack("<Q", start - 16))
+        fid.write(text.ljust(start - 16))
+        for values in columns:
+            values = np.ascontiguousarray(values, dtype="<f8")
+            fid.write(values.tobytes())
+            fid.write(b"\0" * (_aligned(values.nbytes) - values.nbytes))
+
+
+def read_binary(filename, mmap=True):
+    """
+    Read a binary probe file.
+
+    Returns *(header, sections)* where *sections* is a list of
+    *(meta, columns)* pairs, with *columns* a dictionary of float64 arrays.
+    If *mmap* is True the arrays are copy-on-write views of a memory map
+    of the file, otherwise the file is read into memory.
+    """
+    with open(filename, "rb") as fid:
+        if fid.read(len(MAGIC)) != MAGIC:
+            raise ValueError("%r is not a refl1d binary probe file" % filename)
+        (length,) = struct.unpack("<Q", fid.read(8))
+        header = json.loads(fid.read(length).decode("utf-8"))
+    if mmap:
+        buffer = np.memmap(filename, dtype=np.uint8, mode="c")
+    else:
+        buffer = np.fromfile(filename, dtype=np.uint8)
+    sections = []
+    for meta in header["sections"]:
+        columns = {}
+        for name, (offset, n) in meta["columns"].items():
+            columns[name] = buffer[offset : offset + 8 * n].view("<f8")
+        sections.append((meta, columns))
+    return header, sections
+
+
+def load_probe(filename, mmap=True):
+    """
+    Load a probe from a binary file written by :func:`write_probe`.
+
+    The probe data arrays are views into the file (see :func:`read_binary`).
+    """
+    header, sections = read_binary(filename, mmap=mmap)
+    probes = [_make_probe(meta, columns) for meta, columns in sections]
+    kind = header["type"]
+    if kind in _POLARIZED_TYPES:
+        xs = dict((meta["polarization"], p) for (meta, _), p in zip(sections, probes))
+        return _POLARIZED_TYPES[kind](
+            xs=[xs.get(label, None) for label in XS_LABELS],
+            name=header["name"],
+            Aguide=header["Aguide"],
+            H=header["H"],
+            oversampling=header["oversampling"],
+            oversampling_seed=header["oversampling_seed"],
+            oversampled_regions=[OversampledRegion(**r) for r in header["oversampled_regions"]],
+        )
+    elif kind == "ProbeSet":
+        return ProbeSet(probes, name=header["name"])
+    else:
+        return probes[0]
+
+
+def _aligned(n):
+    return -(-n // ALIGN) * ALIGN
+
+
+def _probe_columns(probe, theory, substrate, surface):
+    attributes = _QPROBE_COLUMNS if isinstance(probe, QProbe) else _TLPROBE_COLUMNS
+    data = {}
+    for name, attr in attributes.items():
+        values = getattr(probe, attr, None)
+        if isinstance(values, np.ndarray):
+            data[name] = values
+    if theory is not None:
+        Q, R = theory
+        _, FQ = probe.fresnel_curve(substrate, surface)
+        data["theory_Q"], data["theory"] = Q, R
+        data["fresnel"] = FQ if len(Q) == len(probe.Q) else np.interp(Q, probe.Q, FQ)
+    meta = {
+        "type": type(probe).__name__,
+        "name": probe.name,
+        "filename": probe.filename,
+        "parameters": dict((k, p.value) for k, p in probe.parameters().items()),
+        "back_reflectivity": bool(probe.back_reflectivity),
+        "resolution": probe.resolution,
+        "oversampling": probe.oversampling,
+        "oversampling_seed": probe.oversampling_seed,
+        "oversampled_regions": [asdict(r) for r in probe.oversampled_regions],
+    }
+    return meta, data
+
+
+def _make_probe(meta, columns):
+    cls = _PROBE_TYPES[meta["type"]]
+    kw = dict(
+        name=meta["name"],
+        filename=meta["filename"],
+        back_reflectivity=meta["back_reflectivity"],
+        resolution=meta["resolution"],
+        **meta["parameters"],
+    )
+    if cls is QProbe:
+        probe = QProbe(Q=columns["Q"], dQ=columns["dQ"], R=columns.get("R", None), dR=columns.get("dR", None), **kw)
+    else:
+        # Build an empty probe and attach the stored columns so that the
+        # memory mapped arrays are used as is.  Saved probes are already
+        # sorted, with nans removed and the calculation grid in place.
+        empty = np.empty(0)
+        probe = cls(T=empty, L=empty, **kw)
+        for name, attr in _TLPROBE_COLUMNS.items():
+            setattr(probe, attr, columns.get(name, None))
+        probe.unique_L = np.unique(probe.calc_L)
+        probe._L_idx = np.searchsorted(probe.unique_L, probe.calc_L)
+    probe._calc_Q = columns["calc_Q"]
+    probe.oversampling = meta["oversampling"]
+    probe.oversampling_seed = meta["oversampling_seed"]
+    probe.oversampled_regions = [OversampledRegion(**r) for r in meta["oversampled_regions"]]
+    return probe
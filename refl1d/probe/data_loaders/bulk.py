@@ -0,0 +1,141 @@
+"""
+Load many data files at once.
+
+Temperature and field sweeps produce dozens of reduced files, each of which
+is parsed and turned into a probe before fitting can start.  :func:`load_many`
+spreads this work over a pool of threads or processes.  Each task loads one
+item and builds its probe in the worker, including the measurement union and
+calculation grid for polarized data, so the main process only collects the
+results.
+
+Items can be file names, ORSO dataset entries from
+:func:`.orsodata.index_orso`, or tuples of the four cross sections
+(--, -+, +-, ++) of a polarized measurement, with None for missing cross
+sections.  For NCNR files, :func:`.ncnrdata.find_xsec` returns such a tuple
+given the base name of the measurement.
+
+Example::
+
+    >>> from refl1d.utils.timing import StageTimer
+    >>> timer = StageTimer()
+    >>> probes = load_many([], timer=timer)
+    >>> probes, timer.summary()
+    ([], {})
+"""
+
+__all__ = ["load_many", "load_probeset"]
+
+import glob
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from time import perf_counter
+
+from ...sample.reflectivity import BASE_GUIDE_ANGLE
+from ..probe import PolarizedNeutronProbe, PolarizedQProbe, ProbeSet, QProbe
+from .load4 import load4
+from .orsodata import OrsoEntry
+
+
+def load_many(
+    files,
+    loader=load4,
+    workers=None,
+    processes=False,
+    timer=None,
+    Aguide=BASE_GUIDE_ANGLE,
+    H=0,
+    shared_beam=True,
+    **kw,
+):
+    """
+    Load a set of data files in parallel, returning a list of probes.
+
+    *files* is a glob pattern, or a list whose items are file names,
+    :class:`.orsodata.OrsoEntry` records, or tuples of the cross sections
+    (--, -+, +-, ++) for a polarized measurement.  Glob matches are loaded
+    in sorted order; otherwise the probes are returned in the order given.
+
+    *loader(filename, \\*\\*kw)* returns the probe for one file.  The default
+    is :func:`.load4.load4`; use :func:`.ncnrdata.load` or an instrument
+    *load* method for instrument specific formats.  Extra keyword arguments
+    are passed to the loader.
+
+    *workers* is the size of the pool, with the default chosen by
+    :mod:`concurrent.futures`.  Parsing text is largely done in python, so
+    set *processes* to True to use a process pool rather than threads for
+    large sets of text files.  The loader and its arguments must then be
+    picklable.
+
+    If *timer* is a :class:`refl1d.utils.timing.StageTimer`, the time taken
+    to load each file is recorded with the file name as the stage, and the
+    time to assemble each polarized probe as *"polarized"*.
+
+    For polarized measurements, *Aguide* and *H* are passed to the polarized
+    probe and, if *shared_beam* is True, the beam parameters are shared
+    between the cross sections as in :func:`.ncnrdata.load_magnetic`.
+    """
+    if isinstance(files, str):
+        files = sorted(glob.glob(os.path.expanduser(files)))
+    polarized = dict(Aguide=Aguide, H=H, shared_beam=shared_beam)
+    tasks = [(item, loader, kw, polarized) for item in files]
+    if len(tasks) < 2:
+        results = [_load_item(*task) for task in tasks]
+    else:
+        if processes:
+            # Spawn rather than fork: forking after numba has started its
+            # parallel thread pool can deadlock the children.
+            executor = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+        else:
+            executor = ThreadPoolExecutor(max_workers=workers)
+        with executor:
+            results = list(executor.map(_load_item, *zip(*tasks)))
+
+    probes = []
+    for probe, timings in results:
+        if timer is not None:
+            for stage, seconds in timings:
+                timer.add(stage, seconds)
+        probes.append(probe)
+    return probes
+
+
+def load_probeset(files, name=None, **kw):
+    """
+    Load a set of data files in parallel, returning a :class:`.probe.ProbeSet`.
+
+    See :func:`load_many` for the arguments.
+    """
+    return ProbeSet(load_many(files, **kw), name=name)
+
+
+def _load_item(item, loader, kw, polarized):
+    timings = []
+
+    def load(filename):
+        if filename is None:
+            return None
+        start = perf_counter()
+        probe = loader(filename, **kw)
+        timings.append((_label(filename), perf_counter() - start))
+        return probe
+
+    if not isinstance(item, (tuple, list)):
+        return load(item), timings
+
+    xs = [load(filename) for filename in item]
+    if all(p is None for p in xs):
+        raise IOError("Data set has no magnetic cross sections: %r" % (item,))
+    start = perf_counter()
+    cls = PolarizedQProbe if any(isinstance(p, QProbe) for p in xs) else PolarizedNeutronProbe
+    probe = cls(xs, Aguide=polarized["Aguide"], H=polarized["H"])
+    if polarized["shared_beam"]:
+        probe.shared_beam()
+    timings.append(("polarized", perf_counter() - start))
+    return probe, timings
+
+
+def _label(filename):
+    if isinstance(filename, OrsoEntry):
+        return "%s[%d]" % (filename.filename, filename.index)
+    return str(filename)
@@ -2,9 +2,8 @@
 import json
 
 # third party imports
-from bumps.data import parse_multi, strip_quotes
+from bumps.data import strip_quotes
 import numpy as np
-from orsopy.fileio.orso import load_nexus, load_orso
 
 # refl1d imports
 from refl1d.probe import (
@@ -15,11 +14,14 @@ from refl1d.probe import (
     QProbe,
     XrayProbe,
 )
+from refl1d.probe.data_loaders.binary import BINARY_EXTENSION, load_probe
+from refl1d.probe.data_loaders.orsodata import OrsoEntry, index_orso
+from refl1d.probe.data_loaders.textdata import parse_multi
 from refl1d.probe.resolution import QL2T, QT2L, FWHM2sigma, dQdL2dT, dQdT2dLoL, sigma2FWHM
 from refl1d.sample.reflectivity import BASE_GUIDE_ANGLE
 
 
-def parse_orso(filename):
+def parse_orso(filename, data_sets=None):
     """
     Load an ORSO text (.ort) or binary (.orb) file containing one or more datasets
 
@@ -27,6 +29,10 @@ def parse_orso(filename):
     ----------
     filename : str
         The path to the ORSO file to be loaded.
+    data_sets : list of int or callable, optional
+        The datasets to load, given as indices into the file, or as a function
+        taking an :class:`.orsodata.OrsoEntry` and returning True for the
+        datasets to load.  Default is all datasets.
 
     Returns
     -------
@@ -41,74 +47,16 @@ def parse_orso(filename):
     The polarization information is converted using a predefined mapping.
     The header dictionary includes keys for polarization, angle, angular resolution,
     wavelength, and wavelength resolution.
+
+    The file is first indexed with :func:`.orsodata.index_orso`, and only the
+    data for the selected datasets is read.
     """
-    if filename.endswith(".ort"):
-        entries = load_orso(filename)
-    elif filename.endswith(".orb"):
-        entries = load_nexus(filename)
-
-    POL_CONVERSION = {
-        "po": "++",
-        "mo": "--",
-        "mm": "--",
-        "mp": "-+",
-        "pm": "+-",
-        "pp": "++",
-    }
-
-    entries_out = []
-    for entry in entries:
-        header = entry.info
-        data = entry.data
-        settings = header.data_source.measurement.instrument_settings
-        columns = header.columns
-        polarization = POL_CONVERSION.get(settings.polarization, "unpolarized")
-        header_out = {"polarization": polarization}
-
-        def get_key(orso_name, refl1d_name, refl1d_resolution_name):
-            """
-            Extract value and error from one of the ORSO columns. If no column corresponding
-            to entry `orso_name` is found, search in the instrument settings.
-
-            Parameters
-            ----------
-            orso_name : str
-                The name of the ORSO column or instrument setting to extract.
-            refl1d_name : str
-                The corresponding refl1d name for the value of entry `orso_name`
-            refl1d_resolution_name : str
-                The corresponding refl1d error name the error of entry `orso_name`
-
-            Notes
-            -----
-            This function requires the instrument setting `orso_name` to have a "magnitue" and "error" attribute.
-            """
-            column_index = next(
-                (i for i, c in enumerate(columns) if getattr(c, "physical_quantity", None) == orso_name),
-                None,
-            )
-            if column_index is not None:
-                # NOTE: this is based on column being second index (under debate in ORSO)
-                header_out[refl1d_name] = data[:, column_index]
-                cname = columns[column_index].name
-                resolution_index = next(
-                    (i for i, c in enumerate(columns) if getattr(c, "error_of", None) == cname),
-                    None,
-                )
-                if resolution_index is not None:
-                    header_out[refl1d_resolution_name] = data[:, resolution_index]
-            else:
-                v = getattr(settings, orso_name, None)
-                if hasattr(v, "magnitude"):
-                    header_out[refl1d_name] = v.magnitude
-                if hasattr(v, "error"):
-                    header_out[refl1d_resolution_name] = v.error.error_value
-
-        get_key("incident_angle", "angle", "angular_resolution")
-        get_key("wavelength", "wavelength", "wavelength_resolution")
-
-        entries_out.append((header_out, np.array(data).T))
-    return entries_out
+    entries = index_orso(filename)
+    if callable(data_sets):
+        entries = [entry for entry in entries if data_sets(entry)]
+    elif data_sets is not None:
+        entries = [entries[k] for k in data_sets]
+    return [entry.load() for entry in entries]
 
 
 def load4(
@@ -136,11 +84,13 @@ def load4(
     data_range=(None, None),
     resolution="normal",
     oversampling=None,
+    data_sets=None,
 ):
     r"""
     Load in four column data Q, R, dR, dQ.
 
-    The file is loaded with *bumps.data.parse_multi*.  *keysep*
+    The file is loaded with :func:`.textdata.parse_multi`, a faster version
+    of *bumps.data.parse_multi* accepting the same format.  *keysep*
     defaults to ':' so that header data looks like JSON key: value
     pairs.  *sep* is None so that the data uses white-space separated
     columns.  *comment* is the standard '#' comment character, used
@@ -149,6 +99,9 @@ def load4(
     individual data lines.  The parser isn't very sophisticated, so
     be nice.
 
+    Files ending in :data:`.binary.BINARY_EXTENSION` are loaded with
+    :func:`.binary.load_probe`, and the remaining arguments are ignored.
+
     *intensity* is the overall beam intensity, *background* is the
     overall background level, and *back_absorption* is the relative
     intensity of data measured at negative Q compared to positive Q
@@ -227,11 +180,25 @@ def load4(
 
     *oversampling* is None or a positive integer indicating how many points to add
     between data point to support sparse data with denser theory (for PolarizedNeutronProbe)
+
+    *filename* can also be an :class:`.orsodata.OrsoEntry` from
+    :func:`.orsodata.index_orso`, in which case only that dataset is loaded.
+
+    *data_sets* selects the datasets to load from an ORSO file, either as a
+    list of indices or as a function taking an :class:`.orsodata.OrsoEntry`
+    and returning True for those to load.  Default is all datasets.
     """
+    if isinstance(filename, str) and filename.endswith(BINARY_EXTENSION):
+        # Binary files hold the probe as saved; the loader options don't apply.
+        return load_probe(filename)
+
     json_header_encoding = False
 
-    if filename.endswith(".ort") or filename.endswith(".orb"):
-        entries = parse_orso(filename)
+    if isinstance(filename, OrsoEntry):
+        entries = [filename.load()]
+        filename = filename.filename
+    elif filename.endswith(".ort") or filename.endswith(".orb"):
+        entries = parse_orso(filename, data_sets=data_sets)
     else:
         json_header_encoding = True  # for .refl files, header values are json-encoded
         entries = parse_multi(filename, keysep=keysep, sep=sep, comment=comment)
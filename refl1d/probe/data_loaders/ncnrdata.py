@@ -57,11 +57,10 @@ See :mod:`instrument <refl1d.probe.instrument>` for details.
 
 import os
 
-from bumps.data import parse_file
-
 from ...sample.reflectivity import BASE_GUIDE_ANGLE
 from ..instrument import Monochromatic
 from ..probe import PolarizedNeutronProbe
+from .textdata import parse_file
 
 
 def load(filename, instrument=None, **kw):
@@ -123,6 +122,9 @@ def load_magnetic(filename, Aguide=BASE_GUIDE_ANGLE, H=0, shared_beam=True, **kw
 
     For full control, specify filename as a list of files, with None
     for the missing cross sections.
+
+    Use :func:`.bulk.load_many` with *loader=load* and the cross sections
+    from :func:`find_xsec` to load many measurements in parallel.
     """
     probes = [load(v, **kw) for v in find_xsec(filename)]
     if all(p is None for p in probes):
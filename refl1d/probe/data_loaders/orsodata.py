@@ -0,0 +1,278 @@
+"""
+Lazy reader for ORSO text (.ort) and binary (.orb) files.
+
+:func:`index_orso` scans a file and returns one :class:`OrsoEntry` per
+dataset, giving the polarization state, incident angle and number of
+points without converting any data.  Calling :meth:`OrsoEntry.load`
+returns the (header, data) pair for that dataset alone, in the form used
+by :func:`.load4.load4`.  This makes it cheap to pick a few datasets from
+a large multi-dataset bundle.
+
+For text files the index records where each dataset lies in the file, and
+only the selected blocks are reread and parsed.  For NeXus files the
+columns of a dataset are read from HDF5 straight into the rows of the
+returned data array.
+"""
+
+__all__ = ["OrsoEntry", "index_orso"]
+
+import io
+import json
+from copy import deepcopy
+from dataclasses import dataclass, field
+from functools import partial
+from typing import Callable, Optional
+
+import numpy as np
+import yaml
+from orsopy.fileio.orso import Orso
+
+ORSO_MAGIC = b"ORSO reflectivity data file"
+
+POL_CONVERSION = {
+    "po": "++",
+    "mo": "--",
+    "mm": "--",
+    "mp": "-+",
+    "pm": "+-",
+    "pp": "++",
+}
+
+
+@dataclass
+class OrsoEntry:
+    """
+    Index record for one dataset in an ORSO file.
+
+    *index* is the position of the dataset in the file and *data_set* is
+    its ORSO identifier.  *polarization* is "++", "+-", "-+", "--" or
+    "unpolarized".  *angle* is the incident angle from the instrument
+    settings, or None if it is not given as a single value.  *size* is the
+    number of data points.
+    """
+
+    filename: str
+    index: int
+    data_set: object
+    polarization: str
+    angle: Optional[float]
+    size: int
+    _loader: Callable = field(repr=False, compare=False)
+
+    def load(self):
+        """
+        Read the dataset, returning a *(header, data)* pair with the data
+        columns in the rows of *data*.
+        """
+        return self._loader()
+
+
+def index_orso(filename):
+    """
+    Index the datasets in an ORSO text (.ort) or binary (.orb) file.
+
+    Returns a list of :class:`OrsoEntry`, one for each dataset.
+    """
+    if filename.endswith(".orb"):
+        return _index_nexus(filename)
+    else:
+        return _index_text(filename)
+
+
+def _convert(info, data):
+    """
+    Convert an ORSO header and the (columns x points) data array into the
+    refl1d (header, data) pair.
+    """
+    settings = info.data_source.measurement.instrument_settings
+    columns = info.columns
+    header_out = {"polarization": POL_CONVERSION.get(settings.polarization, "unpolarized")}
+
+    def get_key(orso_name, refl1d_name, refl1d_resolution_name):
+        """
+        Extract value and error from one of the ORSO columns. If no column corresponding
+        to entry `orso_name` is found, search in the instrument settings.
+
+        Parameters
+        ----------
+        orso_name : str
+            The name of the ORSO column or instrument setting to extract.
+        refl1d_name : str
+            The corresponding refl1d name for the value of entry `orso_name`
+        refl1d_resolution_name : str
+            The corresponding refl1d error name the error of entry `orso_name`
+
+        Notes
+        -----
+        This function requires the instrument setting `orso_name` to have a "magnitue" and "error" attribute.
+        """
+        column_index = next(
+            (i for i, c in enumerate(columns) if getattr(c, "physical_quantity", None) == orso_name),
+            None,
+        )
+        if column_index is not None:
+            header_out[refl1d_name] = data[column_index]
+            cname = columns[column_index].name
+            resolution_index = next(
+                (i for i, c in enumerate(columns) if getattr(c, "error_of", None) == cname),
+                None,
+            )
+            if resolution_index is not None:
+                header_out[refl1d_resolution_name] = data[resolution_index]
+        else:
+            v = getattr(settings, orso_name, None)
+            if hasattr(v, "magnitude"):
+                header_out[refl1d_name] = v.magnitude
+            if hasattr(v, "error"):
+                header_out[refl1d_resolution_name] = v.error.error_value
+
+    get_key("incident_angle", "angle", "angular_resolution")
+    get_key("wavelength", "wavelength", "wavelength_resolution")
+
+    return header_out, data
+
+
+def _index_record(filename, index, settings, data_set, size, loader):
+    settings = settings or {}
+    angle = settings.get("incident_angle", None)
+    angle = angle.get("magnitude", None) if isinstance(angle, dict) else None
+    return OrsoEntry(
+        filename=filename,
+        index=index,
+        data_set=data_set,
+        polarization=POL_CONVERSION.get(settings.get("polarization", None), "unpolarized"),
+        angle=angle if np.isscalar(angle) else None,
+        size=size,
+        _loader=loader,
+    )
+
+
+# === Text files ===
+
+
+def _index_text(filename):
+    with open(filename, "rb") as fid:
+        text = fid.read()
+    if ORSO_MAGIC not in text[: text.find(b"\n")]:
+        raise ValueError("%r is not an ORSO text file" % filename)
+
+    # As in orsopy, the first "# data_set" line is part of the file header
+    # and each following one starts a new dataset.
+    starts = [0]
+    idx = text.find(b"\n# data_set")
+    idx = text.find(b"\n# data_set", idx + 1) if idx >= 0 else idx
+    while idx >= 0:
+        starts.append(idx + 1)
+        idx = text.find(b"\n# data_set", idx + 1)
+    stops = starts[1:] + [len(text)]
+
+    # Each later header is an update to the first, as in orsopy.
+    first = None
+    entries = []
+    for k, (start, stop) in enumerate(zip(starts, stops)):
+        header, data_start, size = _split_block(text, start, stop)
+        dct = yaml.safe_load(header) or {}
+        dct = dct if first is None else _nested_update(deepcopy(first), dct)
+        first = dct if first is None else first
+        settings = dct.get("data_source", {}).get("measurement", {}).get("instrument_settings", {})
+        loader = partial(_load_text, filename, dct, data_start, stop)
+        entries.append(_index_record(filename, k, settings, dct.get("data_set", k), size, loader))
+    return entries
+
+
+def _split_block(text, start, stop):
+    """
+    Split the block of lines text[start:stop] into the header yaml, the
+    start of the data and the number of data rows.
+    """
+    header = []
+    pos = start
+    while pos < stop and text[pos : pos + 1] in (b"#", b"\n", b"\r"):
+        end = text.find(b"\n", pos, stop)
+        end = stop if end < 0 else end + 1
+        if text[pos : pos + 1] == b"#":
+            header.append(text[pos + 1 : end].decode("utf-8"))
+        pos = end
+    size = sum(1 for line in text[pos:stop].splitlines() if line.strip() and not line.startswith(b"#"))
+    return "".join(header), pos, size
+
+
+def _load_text(filename, dct, start, stop):
+    with open(filename, "rb") as fid:
+        fid.seek(start)
+        block = fid.read(stop - start)
+    data = np.loadtxt(io.BytesIO(block), comments="#", ndmin=2, unpack=True)
+    return _convert(Orso.from_dict(deepcopy(dct)), data)
+
+
+def _nested_update(d, u):
+    for k, v in u.items():
+        if isinstance(v, dict) and isinstance(d.get(k, None), dict):
+            d[k] = _nested_update(d[k], v)
+        else:
+            d[k] = v
+    return d
+
+
+# === NeXus files ===
+
+
+def _index_nexus(filename):
+    import h5py
+
+    entries = []
+    with h5py.File(filename, "r") as f:
+        # Use '/' because order is not tracked on the File object
+        groups = [(name, g) for name, g in f["/"].items() if g.attrs.get("ORSO_class", None) == "OrsoDataset"]
+        for k, (name, group) in enumerate(groups):
+            info = group["info"]
+            settings = info.get("data_source/measurement/instrument_settings", None)
+            settings = {} if settings is None else _nexus_value(settings, ("polarization", "incident_angle"))
+            columns = list(group["data"].values())
+            size = columns[0].shape[0] if columns else 0
+            data_set = _nexus_value(info["data_set"]) if "data_set" in info else name
+            entries.append(_index_record(filename, k, settings, data_set, size, partial(_load_nexus, filename, name)))
+    return entries
+
+
+def _load_nexus(filename, name):
+    import h5py
+
+    with h5py.File(filename, "r") as f:
+        group = f["/"][name]
+        info = Orso.from_dict(_nexus_value(group["info"]))
+        columns = _nexus_sequence(group["data"])
+        data = np.empty((len(columns), columns[0].shape[0] if columns else 0))
+        for row, column in zip(data, columns):
+            column.read_direct(row)
+    return _convert(info, data)
+
+
+def _nexus_sequence(group):
+    return [v for _, v in sorted((v.attrs["sequence_index"], v) for v in group.values())]
+
+
+def _nexus_value(value, keys=None):
+    """
+    Convert an ORSO NeXus group into plain python values, optionally
+    restricted to the items in *keys*.
+    """
+    import h5py
+
+    if isinstance(value, h5py.Dataset):
+        v = value[()]
+        if isinstance(v, h5py.Empty):
+            return None
+        elif value.attrs.get("mimetype", None) == "application/json":
+            return json.loads(v)
+        elif hasattr(v, "decode"):
+            return v.decode()
+        return v
+    elif value.attrs.get("sequence", None) is not None:
+        return [_nexus_value(v) for v in _nexus_sequence(value)]
+    else:
+        return dict(
+            (k, _nexus_value(v))
+            for k, v in value.items()
+            if (keys is None or k in keys) and v.attrs.get("NX_class", None) != "NXdata"
+        )
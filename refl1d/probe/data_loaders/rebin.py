@@ -2,11 +2,17 @@
 1-D and 2-D rebinning code.
 """
 
-__all__ = ["bin_edges", "logbin_edges", "rebin", "rebin2d"]
+__all__ = ["bin_edges", "logbin_edges", "rebin", "rebin2d", "rebin_batch", "rebin2d_batch"]
 
 import numpy as np
 
+from ...utils.memoise import memoised
 
+#: Number of bin edge vectors remembered by :func:`bin_edges` and :func:`logbin_edges`.
+EDGE_CACHE_SIZE = 16
+
+
+@memoised(EDGE_CACHE_SIZE)
 def bin_edges(C):
     r"""
     Construct bin edges *E* from equally spaced bin centers *C*.
@@ -15,11 +21,16 @@ def bin_edges(C):
     be true if the centers are evenly spaced, but may be good enough for
     visualization purposes even when they are not.  Ideally analysis would
     be performed on the raw data without rebinning.
+
+    The edges for recent centers are remembered, since reduction scripts
+    compute the same edges for every frame they rebin.
     """
+    C = np.asarray(C)
     E = 0.5 * (C[:-1] + C[1:])
     return np.hstack((C[0] - (E[0] - C[0]), E, C[-1] + (C[-1] - E[-1])))
 
 
+@memoised(EDGE_CACHE_SIZE)
 def logbin_edges(L):
     r"""
     Construct bin edges *E* from logarithmically spaced bin centers *L*.
@@ -64,6 +75,7 @@ def logbin_edges(L):
                           = \frac{E_{i+1}}{E_i}
                           = \frac{E_i(1+\omega)}{E_i} = 1 + \omega
     """
+    L = np.asarray(L)
     if L[1] > L[0]:
         dLoL = L[1] / L[0] - 1
         last = 1 + dLoL
@@ -192,6 +204,73 @@ def rebin2d(x, y, I, xo, yo, Io=None, dtype=None):
     return Io
 
 
+def rebin_batch(x, counts, xo, Io=None, dtype=None):
+    """
+    Rebin a set of vectors onto common bin edges.
+
+    x are the existing bin edges, either one vector shared by all spectra
+    or one row of edges per spectrum
+    xo are the new bin edges
+    counts are the existing counts, with one spectrum per row
+
+    The spectra are rebinned in parallel when using the numba backend.
+    Io, if present, must be a contiguous array of shape (len(counts), len(xo)-1).
+    See :func:`rebin` for a description of dtype, which defaults to the
+    type of counts.
+    """
+    from refl1d.backends import backend
+
+    kernel = getattr(backend, "rebin_counts_batch", None)
+    if kernel is None:
+        from refl1d.lib.numba import rebin_counts_batch as kernel
+
+    x, xo = np.atleast_2d(_input(x, dtype="d")), _input(xo, dtype="d")
+    if dtype is None:
+        dtype = getattr(counts, "dtype", np.float64)
+    counts = _input(counts, dtype=dtype)
+    if counts.ndim != 2 or x.shape[0] not in (1, counts.shape[0]) or x.shape[1] - 1 != counts.shape[1]:
+        raise TypeError("input array incorrect shape %s for edges %s" % (counts.shape, x.shape))
+    Io = _output(Io, np.array([counts.shape[0], xo.shape[0] - 1]), dtype=dtype)
+    kernel(x, counts, xo, Io)
+    return Io
+
+
+def rebin2d_batch(x, y, counts, xo, yo, Io=None, dtype=None):
+    """
+    Rebin a set of matrices onto common bin edges.
+
+    x, y are the existing bin edges, either one vector shared by all frames
+    or one row of edges per frame
+    xo, yo are the new bin edges
+    counts is the existing counts, with shape (frames, len(x)-1, len(y)-1)
+
+    The frames are rebinned in parallel when using the numba backend.
+    See :func:`rebin2d` for a description of Io and dtype, which defaults
+    to the type of counts.
+    """
+    from refl1d.backends import backend
+
+    kernel = getattr(backend, "rebin_counts_2D_batch", None)
+    if kernel is None:
+        from refl1d.lib.numba import rebin_counts_2D_batch as kernel
+
+    x, y = [np.atleast_2d(_input(v, dtype="d")) for v in (x, y)]
+    xo, yo = [_input(v, dtype="d") for v in (xo, yo)]
+    if dtype is None:
+        dtype = getattr(counts, "dtype", np.float64)
+    counts = _input(counts, dtype=dtype)
+    if (
+        counts.ndim != 3
+        or x.shape[0] not in (1, counts.shape[0])
+        or y.shape[0] not in (1, counts.shape[0])
+        or (x.shape[1] - 1, y.shape[1] - 1) != counts.shape[1:]
+    ):
+        raise TypeError("input array incorrect shape %s for edges %s, %s" % (counts.shape, x.shape, y.shape))
+    Io = _output(Io, np.array([counts.shape[0], xo.shape[0] - 1, yo.shape[0] - 1]), dtype=dtype)
+    kernel(x, y, counts, xo, yo, Io)
+    return Io
+
+
 def _input(v, dtype="d"):
     """
     Force v to be a contiguous array of the correct type, avoiding copies
@@ -308,12 +387,39 @@ def _check_bin_edges():
     lin_edges = np.linspace(2, 10, 10)
     lin_centers = (lin_edges[1:] + lin_edges[:-1]) / 2
     assert np.linalg.norm(bin_edges(lin_centers) - lin_edges) < 1e-10
+    # Callers own the remembered edges
+    edges = bin_edges(lin_centers)
+    edges += 1
+    assert np.linalg.norm(bin_edges(lin_centers) - lin_edges) < 1e-10
+
+
+def _check_batch():
+    rng = np.random.default_rng(1)
+    x = np.sort(rng.uniform(0, 10, (5, 21)), axis=1)
+    counts = rng.uniform(0, 10, (5, 20))
+    xo = np.linspace(2, 8, 13)
+    # Shared input edges and edges per spectrum
+    for edges in (x[0], x):
+        result = rebin_batch(edges, counts, xo)
+        target = [rebin(edges if edges.ndim == 1 else edges[k], counts[k], xo) for k in range(len(counts))]
+        assert np.linalg.norm(target - result) < 1e-14, "rebin_batch failed"
+    # Counts keep their type unless dtype is given
+    assert rebin_batch(x, counts.astype("uint16"), xo).dtype == np.uint16
+    assert rebin_batch(x, counts.astype("uint16"), xo, dtype="d").dtype == np.float64
+
+    y = np.linspace(0, 3, 4)
+    F = rng.uniform(0, 10, (5, 20, 3))
+    yo = np.linspace(0.5, 2.5, 5)
+    result = rebin2d_batch(x, y, F, xo, yo)
+    target = [rebin2d(x[k], y, F[k], xo, yo) for k in range(len(F))]
+    assert np.linalg.norm(target - result) < 1e-14, "rebin2d_batch failed"
 
 
 def test():
     _check_all_1d()
     _check_all_2d()
     _check_bin_edges()
+    _check_batch()
 
 
 if __name__ == "__main__":
@@ -16,12 +16,12 @@ import math
 import re
 
 import numpy as np
-from bumps.data import parse_file
 
 from ...probe.probe import make_probe
 from .. import resolution
 from ..instrument import Pulsed
 from .rebin import rebin
+from .textdata import parse_file
 
 ## Estimated intensity vs. wavelength for liquids reflectometer
 LIQUIDS_FEATHER = np.array(
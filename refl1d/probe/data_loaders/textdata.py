@@ -0,0 +1,148 @@
+"""
+Fast reader for reduced reflectivity text files.
+
+These are drop-in replacements for :func:`bumps.data.parse_file` and
+:func:`bumps.data.parse_multi`, returning the same (header, data) pairs.
+The header lines are parsed with the same key/value rules, but the numeric
+block of each section is handed to :func:`numpy.loadtxt` in one call rather
+than being converted value by value, which makes loading large event-binned
+time-of-flight files several times faster.
+
+The file is read in a single pass, with multi-part files split into
+sections on blank lines following data.  Sections whose numbers cannot be
+bulk-parsed (unusual spellings of inf or nan, ragged rows) fall back to the
+value-by-value conversion used by bumps.
+"""
+
+__all__ = ["parse_file", "parse_multi"]
+
+import io
+import re
+
+import numpy as np
+from bumps.data import indfloat, maybe_open, strip_quotes
+
+_BLANK_LINE = re.compile(r"\n[ \t\r\f\v]*(?=\n)")
+
+
+def parse_file(file, keysep=None, sep=None, comment="#"):
+    """
+    Parse a file into a header and data.
+
+    Return a (header, data) pair, where header is a key: value
+    dictionary and data is a numpy array.  See :func:`bumps.data.parse_file`
+    for the file format.  Quotes around header values are removed.
+    """
+    sections = _read_sections(file, keysep=keysep, sep=sep, comment=comment, multi_part=False)
+    if not sections:
+        raise IOError("data file is empty")
+    header, data, bins = sections[0]
+    # compatibility: strip quotes from values in key-value pairs
+    header = dict((k, strip_quotes(v)) for k, v in header.items())
+    if bins is not None:
+        header.setdefault("bins", bins)
+    return header, data
+
+
+def parse_multi(file, keysep=None, sep=None, comment="#"):
+    """
+    Parse a multi-part file.
+
+    Return a list of (header, data) pairs, where header is a key: value
+    dictionary and data is a numpy array.  See :func:`bumps.data.parse_multi`
+    for the file format.  Quotes around header values are not removed.
+    """
+    parts = []
+    for header, data, bins in _read_sections(file, keysep=keysep, sep=sep, comment=comment, multi_part=True):
+        if bins is not None:
+            header.setdefault("bins", bins)
+        parts.append((header, data))
+    return parts
+
+
+def _read_sections(file, keysep, sep, comment, multi_part):
+    with maybe_open(file) as fh:
+        text = fh.read()
+    if isinstance(text, bytes):
+        text = text.decode("utf-8").replace("\r\n", "\n")
+
+    # Only blank lines and lines containing the comment character need to be
+    # looked at individually; the runs of plain data lines between them are
+    # collected as text blocks and parsed together.  Wrapping the text in
+    # newlines means every line is delimited by a newline at both ends.
+    text = "\n" + text + "\n"
+    special = set((m.start() + 1, m.end()) for m in _BLANK_LINE.finditer(text))
+    idx = text.find(comment)
+    while idx >= 0:
+        end = text.find("\n", idx)
+        special.add((text.rfind("\n", 0, idx) + 1, end))
+        idx = text.find(comment, end)
+
+    sections = []
+    header, blocks, started = {}, [], False
+    pos = 1
+    for start, end in sorted(special):
+        if start > pos:
+            blocks.append(text[pos:start])
+            started = True
+        pos = end + 1
+        line = text[start:end]
+        # Blank lines following data end the section in multi-part files.
+        if not line.strip():
+            if multi_part and blocks:
+                sections.append(_section(header, blocks, sep))
+                header, blocks, started = {}, [], False
+            continue
+        started = True
+        idx = line.find(comment)
+        if idx > 0:
+            # Data line with a trailing comment.
+            if line[:idx].split(sep):
+                blocks.append(line[:idx] + "\n")
+            continue
+        key, value = _parse_header(line, keysep)
+        if key is not None:
+            header[key] = "\n".join((header[key], value)) if key in header else value
+    if pos < len(text):
+        blocks.append(text[pos:])
+        started = True
+    if started:
+        sections.append(_section(header, blocks, sep))
+    return sections
+
+
+def _parse_header(line, keysep):
+    parts = [p.strip() for p in line[1:].split(keysep, 1)]
+    key, value = parts if len(parts) > 1 else (parts[0], "")
+    key = strip_quotes(key)
+    # If key is a number assume it is simply a commented out data point
+    if len(key) and (key[0] in ".-+0123456789" or key == "inf" or key == "nan"):
+        return None, None
+    return key, value
+
+
+def _section(header, blocks, sep):
+    bins = None
+    body, _, last = "".join(blocks).rstrip("\n").rpartition("\n")
+    if body and len(last.split(sep)) == 1:
+        # For TOF data, the first column is the bin edge, which has one
+        # more row than the remaining columns; fill those columns with
+        # bin centers instead
+        last_edge = indfloat(last.strip())
+        data = _parse_rows(body, sep)
+        edges = np.hstack((data[0], last_edge))
+        data[0] = 0.5 * (edges[:-1] + edges[1:])
+        bins = edges
+    elif last:
+        data = _parse_rows(body + "\n" + last, sep)
+    else:
+        data = np.array([])
+    return header, data, bins
+
+
+def _parse_rows(text, sep):
+    try:
+        data = np.loadtxt(io.StringIO(text), delimiter=sep, comments=None, ndmin=2, dtype="d")
+    except ValueError:
+        data = np.array([[indfloat(v) for v in row.split(sep)] for row in text.splitlines()])
+    return data.T
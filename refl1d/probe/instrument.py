@@ -251,6 +251,19 @@ class Monochromatic(object):
             probe.shared_beam()  # Share the beam parameters by default
         return probe
 
+    def simulate_batch(self, samples, configurations, times=(1.0,), **kw):
+        """
+        Simulate measurements for many samples, counting time schemes and
+        instrument configurations, returning the results as arrays.
+
+        Each configuration is a dictionary of keyword arguments for
+        :meth:`probe`, such as *dict(T=T, slits=slits)*.  See
+        :func:`.simulation.simulate_batch` for details.
+        """
+        from .simulation import simulate_batch
+
+        return simulate_batch(self, samples, configurations, times=times, **kw)
+
     def resolution(self, **kw):
         """
         Calculate resolution at each angle.
@@ -638,6 +651,19 @@ class Pulsed(object):
 
         return Experiment(sample=sample, probe=ProbeSet(probes))
 
+    def simulate_batch(self, samples, configurations, times=(1.0,), **kw):
+        """
+        Simulate measurements for many samples, counting time schemes and
+        instrument configurations, returning the results as arrays.
+
+        Each configuration is a dictionary of keyword arguments for
+        :meth:`probe`, such as *dict(T=T, slits=slits)*.  See
+        :func:`.simulation.simulate_batch` for details.
+        """
+        from .simulation import simulate_batch
+
+        return simulate_batch(self, samples, configurations, times=times, **kw)
+
     def resolution(self, L, dL, **kw):
         """
         Return the resolution of the measurement.  Needs *T*, *L*, *dL*
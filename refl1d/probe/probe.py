@@ -53,10 +53,10 @@ from numpy import log, pi, sign, sqrt
 from periodictable import nsf, xsf
 
 from ..sample.material import Vacuum
-from ..sample.reflectivity import BASE_GUIDE_ANGLE, convolve
+from ..sample.reflectivity import BASE_GUIDE_ANGLE, convolve, convolve_amplitude
 from ..utils import asbytes
 from . import fresnel
-from .resolution import QL2T, TL2Q, dQ_broadening, dTdL2dQ
+from .resolution import QL2T, TL2Q, BroadeningTable, dTdL2dQ
 from .stitch import stitch
 
 PROBE_KW = (
@@ -109,6 +109,8 @@ class BaseProbe:
     resolution: Literal["normal", "uniform"] = "uniform"
 
     _Ro: Optional[Union[Sequence, "NDArray"]] = field(init=False)
+    # {(interpolation, flip): [key, (calc_Q, Q, dQ), Q, fresnel]}
+    _fresnel_cache = None
 
     view = "log"
     plot_shift = 0
@@ -230,7 +232,7 @@ class BaseProbe:
             R = convolve(Qin, Rin, Q, dQ, resolution=self.resolution)
         return Q, R
 
-    def apply_beam(self, calc_Q, calc_R, resolution=True, interpolation=0):
+    def apply_beam(self, calc_Q, calc_R, resolution=True, interpolation=0, index=None):
         r"""
         Apply factors such as beam intensity, background, backabsorption,
         resolution to the data.
@@ -249,6 +251,11 @@ class BaseProbe:
         to the amplitude. Unlike intensity and background, the resulting
         $|G \ast r|^2 \ne G \ast |r|^2$ for convolution operator $\ast$,
         but it should be close.
+
+        *index* gives the position of each measured Q in *calc_Q*.  It is
+        used in place of interpolation when *resolution* is False and
+        *interpolation* is 0, which saves a search when the caller already
+        knows where the measurement points lie.
         """
         # Note: in-place vector operations are not notably faster.
 
@@ -257,6 +264,9 @@ class BaseProbe:
         # (condition)*(C-1)+1 is C when condition is True or 1 when False.
         back = (calc_Q < 0) * (self.back_absorption.value - 1) + 1
         calc_R = calc_R * back
+        use_index = index is not None and not resolution and not interpolation and not self.back_reflectivity
+        if use_index:
+            R_index = calc_R[index]
 
         # For back reflectivity, reverse the sign of Q after computing
         if self.back_reflectivity:
@@ -265,6 +275,8 @@ class BaseProbe:
             calc_Q, calc_R = [v[::-1] for v in (calc_Q, calc_R)]
         if resolution:
             Q, R = self._apply_resolution(calc_Q, calc_R, interpolation)
+        elif use_index:
+            Q, R = self.Q, R_index
         else:
             # Given that the target Q points should be in the set of
             # calculated Q values, interp will give us the
@@ -318,12 +330,56 @@ class BaseProbe:
         calculator = fresnel.Fresnel(rho=Srho * I, irho=Sirho * I, Vrho=Vrho * I, Virho=Virho * I)
         return calculator
 
+    def fresnel_curve(self, substrate=None, surface=None, interpolation=0, flip=False):
+        """
+        Returns Q, F where F is the Fresnel reflectivity for the substrate
+        and surface with the probe intensity, background and resolution
+        applied.  If *flip* is True, the Fresnel reflectivity is evaluated
+        at -calc_Q rather than calc_Q.
+
+        The curve is cached on the probe until the substrate or surface SLD,
+        the beam parameters or the resolution change, so plots refreshed
+        during a fit do not repeat the resolution convolution.  There is
+        one cache entry for each *interpolation* and *flip*, since the
+        Fresnel plot evaluates the curve both at the data points and on the
+        interpolated theory grid.  F is returned read-only.
+        """
+        S = (0, 0) if substrate is None else substrate.sld(self)[:2]
+        V = (0, 0) if surface is None else surface.sld(self)[:2]
+        key = (
+            tuple(np.asarray(v, "d").tobytes() for v in (*S, *V)),
+            self.intensity.value,
+            self.background.value,
+            self.back_absorption.value,
+            self.back_reflectivity,
+            self.resolution,
+        )
+        arrays = (self.calc_Q, self.Q, self.dQ)
+        if self._fresnel_cache is None:
+            self._fresnel_cache = {}
+        cache = self._fresnel_cache.get((interpolation, flip), None)
+        if (
+            cache is None
+            or cache[0] != key
+            or not all(a is b or np.array_equal(a, b) for a, b in zip(cache[1], arrays))
+        ):
+            calc_Q = arrays[0]
+            F = self.fresnel(substrate, surface)
+            Q, FQ = self.apply_beam(calc_Q, F(-calc_Q if flip else calc_Q), interpolation=interpolation)
+            FQ.flags.writeable = False
+            cache = self._fresnel_cache[interpolation, flip] = [key, arrays, Q, FQ]
+        return cache[2], cache[3]
+
     def save(self, filename, theory, substrate=None, surface=None):
         """
         Save the data and theory to a file.
+
+        If *filename* ends with :data:`.data_loaders.binary.BINARY_EXTENSION`
+        the data, theory and fresnel curves are written in binary.
         """
-        fresnel_calculator = self.fresnel(substrate, surface)
-        Q, FQ = self.apply_beam(self.calc_Q, fresnel_calculator(self.calc_Q))
+        if _is_binary(filename):
+            return _write_binary(filename, self, theory, substrate, surface)
+        Q, FQ = self.fresnel_curve(substrate, surface)
         Q, R = theory
         if len(Q) != len(self.Q):
             # Saving interpolated data
@@ -425,11 +481,10 @@ class BaseProbe:
         """
         if substrate is None and surface is None:
             raise TypeError("Fresnel-normalized reflectivity needs substrate or surface")
-        F = self.fresnel(substrate=substrate, surface=surface)
 
         # print("substrate", substrate, "surface", surface)
         def scale(Q, dQ, R, dR, interpolation=0):
-            Q, fresnel = self.apply_beam(self.calc_Q, F(self.calc_Q), interpolation=interpolation)
+            Q, fresnel = self.fresnel_curve(substrate, surface, interpolation=interpolation)
             return Q, dQ, R / fresnel, dR / fresnel
 
         if substrate is None:
@@ -708,6 +763,10 @@ class Probe(BaseProbe):
 
     polarized = False
     Aguide = BASE_GUIDE_ANGLE  # default guide field for unpolarized measurements
+    # [calc_T, calc_L, calc_T and calc_L in Q order, theta_offset, calc_Q]
+    _calc_Q_cache = None
+    # [dQo, L, T, dT, BroadeningTable, sample_broadening, dQ]
+    _dQ_cache = None
     view = "log"
     plot_shift = 0
     residuals_shift = 0
@@ -853,7 +912,13 @@ class Probe(BaseProbe):
         *columns* is a list of column names from Q, dQ, R, dR, L, dL, T, dT.
 
         The default is to write Q, R, dR data.
+
+        If *filename* ends with :data:`.data_loaders.binary.BINARY_EXTENSION`
+        then all columns are written in binary and *columns* and *header*
+        are ignored.
         """
+        if _is_binary(filename):
+            return _write_binary(filename, self)
         if header is None:
             header = "# %s\n" % " ".join(columns)
         with open(filename, "wb") as fid:
@@ -892,11 +957,19 @@ class Probe(BaseProbe):
 
     @property
     def dQ(self):
-        if self.sample_broadening.value == 0:
-            dQ = self.dQo
-        else:
-            dQ = dQ_broadening(dQ=self.dQo, L=self.L, T=self.T, dT=self.dT, width=self.sample_broadening.value)
-        return dQ
+        width = self.sample_broadening.value
+        if width == 0:
+            return self.dQo
+        # The broadening table depends only on the measurement, so it is kept
+        # until the resolution arrays are replaced.  The broadened dQ is kept
+        # for the last width since it is needed several times per evaluation.
+        cache = self._dQ_cache
+        if cache is None or any(a is not b for a, b in zip(cache[:4], (self.dQo, self.L, self.T, self.dT))):
+            table = BroadeningTable(dQ=self.dQo, L=self.L, T=self.T, dT=self.dT)
+            cache = self._dQ_cache = [self.dQo, self.L, self.T, self.dT, table, None, None]
+        if cache[5] != width:
+            cache[5], cache[6] = width, cache[4](width)
+        return cache[6]
 
     @dQ.setter
     def dQ(self, dQ):
@@ -904,14 +977,40 @@ class Probe(BaseProbe):
 
     @property
     def calc_Q(self):
-        # TODO: cache this value if theta_offset is not changing
         if self.theta_offset.value != 0:
-            # NOTE: np.unique sorts the array
-            Q = np.unique(TL2Q(T=self.calc_T + self.theta_offset.value, L=self.calc_L))
+            Q = self._offset_calc_Q(self.theta_offset.value)
         else:
             Q = self._calc_Q
         return Q if not self.back_reflectivity else -Q
 
+    def _offset_calc_Q(self, offset):
+        """
+        Return the sorted unique Q values for the calculation points with
+        *theta_offset* applied.
+
+        The calculation points are kept in the Q order found at the last
+        offset.  A small shift in angle rarely changes the order (never for
+        monochromatic data), so the order is checked before sorting.  The
+        result for the last offset is cached.
+        """
+        cache = self._calc_Q_cache
+        if cache is None or cache[0] is not self.calc_T or cache[1] is not self.calc_L:
+            cache = self._calc_Q_cache = [self.calc_T, self.calc_L, self.calc_T, self.calc_L, None, None]
+        elif cache[4] == offset:
+            return cache[5]
+        Q = TL2Q(T=cache[2] + offset, L=cache[3])
+        if len(Q) > 1 and (Q[1:] < Q[:-1]).any():
+            idx = np.argsort(Q, kind="stable")
+            Q, cache[2], cache[3] = Q[idx], cache[2][idx], cache[3][idx]
+        if len(Q) > 1:
+            keep = np.empty(len(Q), dtype=bool)
+            keep[0] = True
+            np.not_equal(Q[1:], Q[:-1], out=keep[1:])
+            if not keep.all():
+                Q = Q[keep]
+        cache[4], cache[5] = offset, Q
+        return Q
+
     def parameters(self):
         return {
             "intensity": self.intensity,
@@ -1215,6 +1314,8 @@ class ProbeSet:
     fresnel.__doc__ = Probe.fresnel.__doc__
 
     def save(self, filename, theory, substrate=None, surface=None):
+        if _is_binary(filename):
+            return _write_binary(filename, self, theory, substrate, surface)
         for i, (p, th) in enumerate(self.parts(theory=theory)):
             p.save(filename + str(i + 1), th, substrate=substrate, surface=surface)
 
@@ -1479,16 +1580,35 @@ class QProbe(BaseProbe):
     critical_edge.__doc__ = Probe.critical_edge.__doc__
 
 
-def Qmeasurement_union(xs):
+def Qmeasurement_union(xs, tol=0.0, return_index=False):
     """
     Determine the unique Q, dQ across all datasets.
+
+    The union is sorted by Q then dQ.  If *tol* is non-zero, successive
+    points whose Q and dQ differ by less than *tol* times their magnitude
+    are merged, keeping the first.
+
+    If *return_index* is True, also return a list with the index of each
+    point of each dataset in the union, or None for missing datasets.
     """
-    Qset = set()
-    for x in xs:
-        if x is not None:
-            Qset |= set(zip(x.Q, x.dQ))
-    Q, dQ = [np.array(v) for v in zip(*sorted(Qset))]
-    return Q, dQ
+    parts = [x for x in xs if x is not None]
+    Q = np.hstack([x.Q for x in parts])
+    dQ = np.hstack([x.dQ for x in parts])
+    order = np.lexsort((dQ, Q))
+    Q, dQ = Q[order], dQ[order]
+    new = np.empty(len(Q), dtype=bool)
+    new[:1] = True
+    if tol > 0:
+        new[1:] = (np.abs(np.diff(Q)) > tol * np.abs(Q[1:])) | (np.abs(np.diff(dQ)) > tol * np.abs(dQ[1:]))
+    else:
+        new[1:] = (Q[1:] != Q[:-1]) | (dQ[1:] != dQ[:-1])
+    if not return_index:
+        return Q[new], dQ[new]
+    index = np.empty(len(Q), dtype=int)
+    index[order] = np.cumsum(new) - 1
+    offsets = np.cumsum([0] + [len(x.Q) for x in parts])
+    index = iter(np.split(index, offsets[1:-1]))
+    return Q[new], dQ[new], [None if x is None else next(index) for x in xs]
 
 
 optional_xs = Union[NeutronProbe, Literal[None]]
@@ -1523,6 +1643,9 @@ class PolarizedNeutronProbe:
     substrate = surface = None
     polarized = True
     _xs_names = ["mm", "mp", "pm", "pp"]
+    #: Relative tolerance for merging nearly equal (Q, dQ) points from the
+    #: cross sections when forming the measurement union.
+    union_tolerance = 0.0
 
     def __init__(
         self,
@@ -1637,24 +1760,42 @@ class PolarizedNeutronProbe:
 
     def _calculate_union(self):
         theta_offsets = [x.theta_offset.value for x in self.xs if x is not None]
-        union_cache_key = (theta_offsets, self.oversampling, self.oversampling_seed, tuple(self.oversampled_regions))
+        union_cache_key = (
+            theta_offsets,
+            self.oversampling,
+            self.oversampling_seed,
+            tuple(self.oversampled_regions),
+            self.union_tolerance,
+        )
         if self._union_cache_key == union_cache_key:
             # no change in offsets or oversampling: use cached values of measurement union
             return
         else:
-            Q_union, dQ_union = Qmeasurement_union(self.xs)
+            Q_union, dQ_union, union_index = Qmeasurement_union(self.xs, tol=self.union_tolerance, return_index=True)
             if self.oversampling is not None or self.oversampled_regions:
                 calc_Q = _get_oversampled_values(
                     Q_union, dQ_union, self.oversampling, self.oversampling_seed, self.oversampled_regions
                 )
+                # only record the unique values of Q for calculation
+                # (np.unique will sort the values)
+                self._calc_Q = np.unique(calc_Q)
+                calc_index = np.searchsorted(self._calc_Q, Q_union)
             else:
-                calc_Q = Q_union
+                # Q_union is sorted, so only repeated Q values need removing
+                new_Q = np.empty(len(Q_union), dtype=bool)
+                new_Q[:1] = True
+                np.not_equal(Q_union[1:], Q_union[:-1], out=new_Q[1:])
+                self._calc_Q = Q_union[new_Q]
+                calc_index = np.cumsum(new_Q) - 1
 
             self.Q = Q_union
             self.dQ = dQ_union
-            # only record the unique values of Q for calculation
-            # (np.unique will sort the values)
-            self._calc_Q = np.unique(calc_Q)
+            # Position of each cross section point in the union and in the
+            # calculation points.  With a merge tolerance the data no longer
+            # lands exactly on the calculation points.
+            self._union_index = union_index
+            exact = self.union_tolerance == 0
+            self._calc_index = [None if k is None or not exact else calc_index[k] for k in union_index]
             self._union_cache_key = union_cache_key
 
     @property
@@ -1668,7 +1809,61 @@ class PolarizedNeutronProbe:
         Apply factors such as beam intensity, background, backabsorption,
         and footprint to the data.
         """
-        return [(xs.apply_beam(Q, Ri, resolution, interpolation) if xs else None) for xs, Ri in zip(self.xs, R)]
+        index = [None] * 4
+        if not resolution and not interpolation and np.array_equal(Q, self.calc_Q):
+            index = self._calc_index
+        return [
+            (xs.apply_beam(Q, Ri, resolution, interpolation, index=k) if xs else None)
+            for xs, Ri, k in zip(self.xs, R, index)
+        ]
+
+    def apply_beam_magnetic(self, calc_Q, calc_r):
+        """
+        Compute the measured reflectivity of each cross section from the
+        spin amplitudes *calc_r*, an array of shape (4, len(calc_Q)).
+
+        This gives the same result as applying :meth:`apply_beam` to
+        abs(calc_r)**2 with resolution, but the magnitude, resolution,
+        intensity and background are applied in one pass over a single
+        block of output.  Cross sections measured at the same Q and dQ are
+        convolved together, sharing the resolution integrals.
+        """
+        xs = [x for x in self.xs if x is not None]
+        # Fall back to the separate steps for back reflectivity or if there
+        # is back absorption to apply.
+        if self.back_reflectivity or calc_Q[0] < 0 or calc_Q[-1] < calc_Q[0]:
+            return self.apply_beam(calc_Q, [abs(r) ** 2 for r in calc_r])
+
+        # Group the cross sections by measurement points and resolution
+        groups = []
+        for k, x in enumerate(self.xs):
+            if x is None:
+                continue
+            for group in groups:
+                first = self.xs[group[0]]
+                if first.resolution == x.resolution and np.array_equal(first.Q, x.Q) and np.array_equal(first.dQ, x.dQ):
+                    group.append(k)
+                    break
+            else:
+                groups.append([k])
+
+        calc_r = np.asarray(calc_r)
+        out = np.empty(sum(len(x.Q) for x in xs))
+        result = [None] * len(self.xs)
+        offset = 0
+        for group in groups:
+            first = self.xs[group[0]]
+            n = len(first.Q)
+            rows = calc_r[group] if len(group) < len(calc_r) else calc_r
+            block = out[offset : offset + len(group) * n].reshape(len(group), n)
+            convolve_amplitude(calc_Q, rows, first.Q, first.dQ, resolution=first.resolution, out=block)
+            offset += len(group) * n
+            for k, Rk in zip(group, block):
+                x = self.xs[k]
+                Rk *= x.intensity.value
+                Rk += x.background.value
+                result[k] = (x.Q, Rk)
+        return result
 
     def fresnel(self, *args, **kw):
         return self.pp.fresnel(*args, **kw)
@@ -1693,11 +1888,20 @@ class PolarizedNeutronProbe:
         """
 
         Qth, Rth = theory
+        self._calculate_union()
+        if self.union_tolerance == 0 and np.array_equal(Qth, self.Q):
+            # Theory on the measurement union: use the precomputed positions
+            return [
+                None if x_data is None else (x_data.Q, x_th[k])
+                for x_data, x_th, k in zip(self.xs, Rth, self._union_index)
+            ]
         return [
             None if x_data is None else (x_data.Q, np.interp(x_data.Q, Qth, x_th)) for x_data, x_th in zip(self.xs, Rth)
         ]
 
     def save(self, filename, theory, substrate=None, surface=None):
+        if _is_binary(filename):
+            return _write_binary(filename, self, theory, substrate, surface)
         for xsi, xsi_th, suffix in zip(self.xs, theory, ("A", "B", "C", "D")):
             if xsi is not None:
                 xsi.save(filename + suffix, xsi_th, substrate=substrate, surface=surface)
@@ -1867,6 +2071,18 @@ def _interpolate_Q(Q, dQ, n):
     return Q, dQ
 
 
+def _is_binary(filename):
+    from .data_loaders.binary import BINARY_EXTENSION
+
+    return str(filename).endswith(BINARY_EXTENSION)
+
+
+def _write_binary(filename, probe, theory=None, substrate=None, surface=None):
+    from .data_loaders.binary import write_probe
+
+    write_probe(filename, probe, theory=theory, substrate=substrate, surface=surface)
+
+
 def _get_oversampled_values(V_in, dV_in, oversampling, oversampling_seed, oversampled_regions: List[OversampledRegion]):
     V_parts = [V_in]
     if oversampling is not None:
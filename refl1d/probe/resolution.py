@@ -23,9 +23,15 @@ from numpy import (
 )
 from numpy import arcsin as asin
 
+from ..utils.memoise import memoised
+
 if TYPE_CHECKING:
     from numpy.typing import ArrayLike
 
+#: Number of results remembered by each of the memoised geometry functions
+#: :func:`dTdL2dQ`, :func:`divergence` and :func:`slit_widths`.
+RESOLUTION_CACHE_SIZE = 32
+
 
 def QL2T(Q=None, L=None):
     r"""
@@ -80,6 +86,7 @@ def sigma2FWHM(s):
     return asarray(s, "d") * _FWHM_scale
 
 
+@memoised(RESOLUTION_CACHE_SIZE)
 def dTdL2dQ(T: "ArrayLike", dT: "ArrayLike", L: "ArrayLike", dL: "ArrayLike"):
     r"""
     Convert wavelength dispersion and angular divergence to $Q$ resolution.
@@ -140,6 +147,34 @@ def dQ_broadening(dQ, L, T, dT, width):
     return sqrt(abs(dQsq))
 
 
+class BroadeningTable:
+    r"""
+    Precomputed form of :func:`dQ_broadening` for a fixed measurement.
+
+    Calling the table with the sample broadening *width* returns the
+    broadened dQ.  The terms which do not depend on the width are computed
+    when the table is built, leaving
+
+    .. math::
+
+        \Delta Q'^2 = \Delta Q^2 + \omega (2 c \Delta\theta + c \omega)
+
+    with $c = (4 \pi \cos\theta / \lambda)^2$ for each point.
+    """
+
+    def __init__(self, dQ, L, T, dT):
+        T, dT = radians(asarray(T, "d")), FWHM2sigma(radians(asarray(dT, "d")))
+        self.dQsq = asarray(dQ, "d") ** 2
+        self.scale = (4 * pi / asarray(L, "d") * cos(T)) ** 2
+        self.slope = 2 * self.scale * dT
+
+    def __call__(self, width):
+        width = FWHM2sigma(radians(width))
+        # If width < -dT, need to take abs(dQsq) before taking the sqrt
+        # (focusing past zero)
+        return sqrt(abs(self.dQsq + width * (self.slope + self.scale * width)))
+
+
 def dQdT2dLoL(Q, dQ, T, dT):
     r"""
     Convert a calculated Q resolution and angular divergence to a
@@ -297,6 +332,7 @@ def binedges(L):
     return hstack((E, E[-1] * last))
 
 
+@memoised(RESOLUTION_CACHE_SIZE)
 def divergence(T=None, slits=None, distance=None, sample_width=1e10, sample_broadening=0):
     r"""
     Calculate divergence due to slit and sample geometry.
@@ -385,6 +421,7 @@ def divergence(T=None, slits=None, distance=None, sample_width=1e10, sample_broa
     return dT + sample_broadening
 
 
+@memoised(RESOLUTION_CACHE_SIZE)
 def slit_widths(T=None, slits_at_Tlo=None, Tlo=90, Thi=90, slits_below=None, slits_above=None):
     """
     Compute the slit widths for the standard scanning reflectometer
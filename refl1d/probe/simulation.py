@@ -0,0 +1,322 @@
+"""
+Batch simulation of measurements for planning beam time.
+
+:func:`simulate_batch` simulates every combination of sample model,
+counting time scheme and instrument configuration in one call, returning
+the simulated data as arrays.  The work which does not depend on the
+configuration is done once: the reflectivity of each sample is computed on
+the union of the calculation points of all configurations, the incident
+spectrum is rebinned once for each set of wavelength bins, and the Poisson
+noise for all realizations is drawn in a single call.
+
+:class:`MeasurementDesign` scores candidate measurement plans by their
+expected Fisher information, which answers questions such as which angle
+to add to a measurement and for how long without fitting simulated data.
+
+Example::
+
+    >>> import numpy as np
+    >>> from refl1d.names import SLD, Monochromatic
+    >>> instrument = Monochromatic(wavelength=4.75, dLoL=0.01, d_s1=2086, d_s2=230,
+    ...     Tlo=0.5, slits_at_Tlo=0.2, slits_below=0.1)
+    >>> samples = [SLD(rho=2.07)(0, 5) | SLD(rho=4)(L, 5) | SLD(rho=0)(0, 0) for L in (100, 150)]
+    >>> configurations = [dict(T=np.linspace(0.1, 2, 40)), dict(T=np.linspace(0.1, 4, 80))]
+    >>> sim = instrument.simulate_batch(samples, configurations, times=[1, 10], realizations=5, seed=1)
+    >>> sim.R.shape  # samples x schemes x realizations x points
+    (2, 2, 5, 120)
+    >>> [R.shape for R in sim.split(sim.R)]
+    [(2, 2, 5, 40), (2, 2, 5, 80)]
+"""
+
+__all__ = ["BatchSimulation", "MeasurementDesign", "simulate_batch"]
+
+from copy import deepcopy
+from dataclasses import dataclass
+from typing import Any, List
+
+import numpy as np
+
+from .probe import make_probe
+from .resolution import binedges
+
+
+@dataclass
+class BatchSimulation:
+    """
+    Result of :func:`simulate_batch`.
+
+    The measurement points of all configurations are joined along the last
+    axis of each array, with configuration *c* occupying the points
+    *offsets[c]:offsets[c+1]*.  Use :meth:`split` to separate them.
+
+    *probes* are the probes for each configuration, without data.
+    *Q*, *dQ* are the measurement points and resolution.
+    *theory* is the reflectivity of each sample, including resolution.
+    *incident* is the expected incident counts for each counting scheme.
+    *R*, *dR* are the simulated data for each sample, counting scheme and
+    realization, with shape (samples, schemes, realizations, points).
+    """
+
+    probes: List[Any]
+    offsets: np.ndarray
+    Q: np.ndarray
+    dQ: np.ndarray
+    theory: np.ndarray
+    incident: np.ndarray
+    R: np.ndarray
+    dR: np.ndarray
+
+    def split(self, values):
+        """
+        Split *values* along the last axis into the points for each
+        configuration.
+        """
+        return np.split(values, self.offsets[1:-1], axis=-1)
+
+    def probe(self, sample=0, configuration=0, scheme=0, realization=0):
+        """
+        Return a copy of a configuration probe holding one simulated data set.
+        """
+        points = slice(self.offsets[configuration], self.offsets[configuration + 1])
+        probe = deepcopy(self.probes[configuration])
+        probe.R = self.R[sample, scheme, realization, points].copy()
+        probe.dR = self.dR[sample, scheme, realization, points].copy()
+        return probe
+
+
+def simulate_batch(
+    instrument, samples, configurations, times=(1.0,), flux=1.0, background=0, realizations=1, seed=None
+):
+    """
+    Simulate measurements for many samples, counting schemes and instrument
+    configurations.
+
+    *instrument* is a :class:`.instrument.Monochromatic` or
+    :class:`.instrument.Pulsed` instrument.  If the instrument has a
+    *feather* giving the incident spectrum as (wavelength, counts) then the
+    incident intensity follows the spectrum, otherwise it is uniform.
+
+    *samples* is a list of sample models.
+
+    *configurations* is a list of keyword dictionaries for
+    *instrument.probe*, such as *dict(T=T, slits=slits)*.  All
+    configurations must have the same *back_reflectivity*.
+
+    *times* is a list of counting schemes, each of which is either a
+    counting time for every point or a function *time(T, L)* returning the
+    counting time at each point of a configuration.
+
+    *flux* is the incident rate for unit spectrum and *background* is the
+    background counts per incident neutron, as in
+    :meth:`.instrument.Pulsed.simulate`.  The incident beam, reflected beam
+    and background are each simulated with Poisson noise, with
+    *realizations* independent samples drawn using a random generator
+    initialized with *seed*.
+
+    Returns a :class:`BatchSimulation`.
+    """
+    probes = [instrument.probe(**dict(kw)) for kw in configurations]
+    if len(set(p.back_reflectivity for p in probes)) > 1:
+        raise ValueError("configurations must all have the same back_reflectivity")
+    offsets = np.cumsum([0] + [len(p.Q) for p in probes])
+    Q = np.hstack([p.Q for p in probes])
+    dQ = np.hstack([p.dQ for p in probes])
+
+    theory = np.vstack([_theory(instrument, sample, probes) for sample in samples])
+
+    # Expected incident counts for each scheme, with spectra shared between
+    # configurations with the same wavelength bins.
+    spectra = {}
+    spectrum = np.hstack([_spectrum(instrument, p, spectra) for p in probes])
+    incident = np.empty((len(times), len(Q)))
+    for row, scheme in zip(incident, times):
+        for p, points in zip(probes, np.split(row, offsets[1:-1])):
+            points[:] = scheme(p.T, p.L) if callable(scheme) else scheme
+    incident *= flux * spectrum
+
+    # Draw beam, reflected and background counts for all samples, schemes
+    # and realizations in one call.
+    shape = (len(samples), len(times), realizations, len(Q))
+    Igoal = incident[None, :, None, :]
+    Rth = theory[:, None, None, :]
+    rates = [Igoal, Igoal * Rth] + ([Igoal * background] * 2 if background > 0 else [])
+    rate = np.stack([np.broadcast_to(v, shape) for v in rates])
+    counts = np.random.default_rng(seed).poisson(rate) + 1.0
+    Ibeam, Irefl = counts[0], counts[1]
+    if background > 0:
+        Irefl += counts[2]
+        Iback = counts[3]
+    else:
+        Iback = 0
+    R = (Irefl - Iback) / Ibeam
+    dR = np.sqrt((Irefl + Iback + Ibeam) * (Irefl / Ibeam)) / Ibeam
+
+    return BatchSimulation(
+        probes=probes,
+        offsets=offsets,
+        Q=Q,
+        dQ=dQ,
+        theory=theory,
+        incident=incident,
+        R=R,
+        dR=dR,
+    )
+
+
+class MeasurementDesign:
+    """
+    Score candidate measurement plans by the information they are expected
+    to give about the model parameters.
+
+    *instrument*, *configurations*, *flux* and *background* are as for
+    :func:`simulate_batch`, with *sample* the model to be measured.  A plan
+    is the counting time for each configuration, with zero for
+    configurations that are not measured.  *profile(T, L)*, if given, is
+    the relative counting time at each point of a configuration.
+
+    *pars* are the parameters of interest, defaulting to the varying
+    parameters of the sample.  *prior* is the Fisher information already
+    available for these parameters.  By default it is that of a uniform
+    distribution over the parameter bounds.  For an existing measurement
+    use *J.T @ J* with *J* from :meth:`.experiment.Experiment.jacobian`.
+
+    Fisher information adds over measurement points, and the variance of
+    each point is inversely proportional to its counting time.  The model
+    and its parameter derivatives are therefore computed only once, on the
+    union of the calculation points of all configurations, and each
+    configuration contributes a fixed matrix per unit time.  Scoring a plan
+    then costs a few small matrix operations, and arrays of plans are
+    scored together.
+    """
+
+    def __init__(self, instrument, sample, configurations, pars=None, flux=1.0, background=0, profile=None, prior=None):
+        from bumps import parameter
+
+        probes = [instrument.probe(**dict(kw)) for kw in configurations]
+        if len(set(p.back_reflectivity for p in probes)) > 1:
+            raise ValueError("configurations must all have the same back_reflectivity")
+        if pars is None:
+            pars = parameter.varying(parameter.unique(sample.parameters()))
+        self.probes = probes
+        self.pars = pars
+        self.offsets = np.cumsum([0] + [len(p.Q) for p in probes])
+
+        # Model and derivatives on the union points, then with resolution
+        M = _union_experiment(instrument, sample, probes)
+        calc_Q, calc_R = M.reflectivity(resolution=False)
+        dR_dp = -M.jacobian(pars)
+        self.theory = _project(probes, calc_Q, calc_R)
+        # apply_beam is affine in R, so subtract the response to R = 0
+        base = _project(probes, calc_Q, np.zeros_like(calc_Q))
+        J = np.column_stack([_project(probes, calc_Q, column) - base for column in dR_dp.T])
+
+        # Inverse variance of each point per unit counting time, following
+        # the counting statistics of simulate_batch:
+        #     dR^2 = (R + 2 B + 1) (R + B) / I
+        spectra = {}
+        rate = flux * np.hstack([_spectrum(instrument, p, spectra) for p in probes])
+        if profile is not None:
+            rate *= np.hstack([np.broadcast_to(profile(p.T, p.L), p.Q.shape) for p in probes])
+        R = self.theory
+        weight = rate / ((R + 2 * background + 1) * (R + background))
+        self.information = np.array(
+            [J[lo:hi].T @ (weight[lo:hi, None] * J[lo:hi]) for lo, hi in zip(self.offsets[:-1], self.offsets[1:])]
+        )
+
+        if prior is None:
+            width = [np.diff(p.bounds)[0] if getattr(p, "bounds", None) is not None else np.inf for p in pars]
+            prior = np.diag(12 / np.asarray(width, "d") ** 2)
+        self.prior = np.asarray(prior, "d")
+
+    def fisher(self, times):
+        """
+        Return the Fisher information for the plan *times*, an array whose
+        last axis is the counting time for each configuration.
+        """
+        return self.prior + np.einsum("...c,cij->...ij", np.asarray(times, "d"), self.information)
+
+    def covariance(self, times):
+        """
+        Return the expected parameter covariance for the plan *times*.
+        """
+        return np.linalg.inv(self.fisher(times))
+
+    def score(self, times, base=None):
+        """
+        Return the information gain in nats from measuring plan *times* in
+        addition to plan *base*.
+
+        The gain is half the log of the ratio of the determinants of the
+        parameter covariance before and after, so each nat corresponds to a
+        factor of e reduction in the volume of the uncertainty ellipsoid.
+        """
+        times = np.asarray(times, "d")
+        base = np.zeros(times.shape[-1]) if base is None else np.asarray(base, "d")
+        _, after = np.linalg.slogdet(self.fisher(base + times))
+        _, before = np.linalg.slogdet(self.fisher(base))
+        return 0.5 * (after - before)
+
+    def extend(self, base, durations):
+        """
+        Return the information gain from extending plan *base* with one more
+        measurement.
+
+        The result has shape (configurations, durations), giving the gain
+        from measuring each configuration for each of the *durations*.
+        """
+        durations = np.asarray(durations, "d")
+        n = len(self.probes)
+        times = durations[None, :, None] * np.eye(n)[:, None, :]
+        return self.score(times, base)
+
+
+def _union_experiment(instrument, sample, probes):
+    """
+    Return an experiment for *sample* whose probe measures the calculation
+    points of all *probes* without resolution.  The probe holds R = 0 with
+    unit uncertainty so that the residuals are minus the reflectivity.
+    """
+    from ..experiment import Experiment
+
+    T = np.hstack([p.calc_T + p.theta_offset.value for p in probes])
+    L = np.hstack([p.calc_L for p in probes])
+    data = np.zeros_like(T), np.ones_like(T)
+    union = make_probe(T=T, dT=0, L=L, dL=0, data=data, radiation=instrument.radiation)
+    union.back_reflectivity = probes[0].back_reflectivity
+    return Experiment(sample=sample, probe=union)
+
+
+def _project(probes, calc_Q, calc_R):
+    """
+    Apply the beam for each of *probes* to the reflectivity *calc_R*
+    computed at the union points *calc_Q*, returning the joined results.
+    """
+    # The calculation points of each probe are in the union, so interp
+    # picks them out exactly.  For back reflectivity calc_Q is negative but
+    # the union reflectivity is returned against |Q|.
+    return np.hstack([p.apply_beam(p.calc_Q, np.interp(abs(p.calc_Q), calc_Q, calc_R))[1] for p in probes])
+
+
+def _theory(instrument, sample, probes):
+    """
+    Return the reflectivity of *sample* at the measurement points of all
+    *probes*, computing the model once on the union of calculation points.
+    """
+    calc_Q, calc_R = _union_experiment(instrument, sample, probes).reflectivity(resolution=False)
+    return _project(probes, calc_Q, calc_R)
+
+
+def _spectrum(instrument, probe, cache):
+    """
+    Return the relative incident intensity at each point of *probe*.
+    """
+    feather = getattr(instrument, "feather", None)
+    if feather is None:
+        return np.ones_like(probe.Q)
+    # Note: probe.L is reversed because L is sorted by increasing Q in probe.
+    key = probe.L.tobytes()
+    if key not in cache:
+        from .data_loaders.rebin import rebin
+
+        cache[key] = rebin(binedges(feather[0]), feather[1], binedges(probe.L[::-1]))[::-1]
+    return cache[key]
@@ -62,6 +62,7 @@ from numpy import isnan, nan
 from scipy.special import erf
 
 from .sample.reflectivity import BASE_GUIDE_ANGLE as DEFAULT_THETA_M
+from .utils.timing import NULL_TIMER
 
 
 class Microslabs(object):
@@ -79,8 +80,18 @@ class Microslabs(object):
     The space for the slabs is saved even after reset, in preparation for a
     new set of slabs from different fitting parameters.
 
+    *timer* records the time spent in the stages of :meth:`finalize`.  It
+    is set by the experiment when timing is enabled.
+
+    *workspace* is a :class:`.utils.workspace.Workspace` supplying scratch
+    buffers for :meth:`finalize`.  The experiment shares its workspace with
+    its slabs so that temporaries are reused between evaluations.
     """
 
+    timer = NULL_TIMER
+    workspace = None
+    _z_grid = None
+
     def __init__(self, nprobe, dz=1):
         self._num_slabs = 0
         # _slabs contains the 1D objects w, sigma of len n
@@ -166,12 +177,16 @@ class Microslabs(object):
         Reserve space for at least *nadd* slabs.
         """
         ns, nl, _ = self._slabs_rho.shape
-        if ns < self._num_slabs + nadd:
-            new_ns = self._num_slabs + nadd + 50
-            self._slabs = self._slabs.copy()
-            self._slabs.resize((new_ns, 4), refcheck=False)
-            self._slabs_rho = self._slabs_rho.copy()
-            self._slabs_rho.resize((new_ns, nl, 2), refcheck=False)
+        n = self._num_slabs
+        if ns < n + nadd:
+            # Grow geometrically so that profiles which render a few more
+            # slabs each evaluation do not reallocate every time.
+            new_ns = max(n + nadd, 2 * ns, 64)
+            slabs = np.zeros((new_ns, 4))
+            slabs[:n, : self._slabs.shape[1]] = self._slabs[:n]
+            slabs_rho = np.zeros((new_ns, nl, 2))
+            slabs_rho[:n] = self._slabs_rho[:n]
+            self._slabs, self._slabs_rho = slabs, slabs_rho
 
     def extend(self, w=0, sigma=0, rho=0, irho=0):
         """
@@ -294,19 +309,23 @@ class Microslabs(object):
         *dA* is the tolerance to use when deciding if similar layers can
         be merged.
         """
+        timer = self.timer
         if self.ismagnetic:
-            self._align_magnetic_and_nuclear()
+            with timer("align"):
+                self._align_magnetic_and_nuclear()
 
         self._set_z_range()
 
         # render step interfaces
         if step_interfaces:
-            self._render_interfaces()
+            with timer("interfaces"):
+                self._render_interfaces()
 
-        if self.ismagnetic:
-            self._contract_magnetic(dA)
-        else:
-            self._contract_profile(dA)
+        with timer("contract"):
+            if self.ismagnetic:
+                self._contract_magnetic(dA)
+            else:
+                self._contract_profile(dA)
 
     def _set_z_range(self):
         """
@@ -360,7 +379,12 @@ class Microslabs(object):
         better performance on models with large sections of constant
         scattering potential.
         """
-        z = np.arange(self._z_left, self._z_right + 0.5 * self.dz, self.dz)
+        # The z range only changes when the profile extent changes, so keep
+        # the grid from the previous evaluation when we can.
+        key = self._z_left, self._z_right, self.dz
+        if self._z_grid is None or self._z_grid[0] != key:
+            self._z_grid = key, np.arange(self._z_left, self._z_right + 0.5 * self.dz, self.dz)
+        z = self._z_grid[1]
         n_slabs = len(z)
         n_profiles = self.rho.shape[0]
         offsets = np.cumsum(self.w[:-1])  # assumes w[0] == 0 in _set_z_range
@@ -373,9 +397,15 @@ class Microslabs(object):
         if self.ismagnetic:
             to_stack.extend([self.rhoM[None, :], self.thetaM[None, :]])
 
-        value = np.vstack(to_stack)
+        value = self._scratch("profile_value", (sum(len(v) for v in to_stack), len(offsets) + 1))
+        row = 0
+        for v in to_stack:
+            value[row : row + len(v)] = v
+            row += len(v)
 
-        profiles = _build_profiles_backend(z, offsets, self.sigma, value)
+        profiles = _build_profiles_backend(
+            z, offsets, self.sigma, value, out=self._scratch("profiles", (len(value), n_slabs))
+        )
 
         rho = profiles[0:Nrho]
         # print('rho:', self.rho.shape, rho.shape)
@@ -384,21 +414,29 @@ class Microslabs(object):
             rhoM = profiles[Nrho + Nirho]
             thetaM = profiles[Nrho + Nirho + 1]
 
-        w = self.dz * np.ones(n_slabs)
-        w[0] = w[-1] = 0.0
-
         # update slabs
         self._reserve(n_slabs - self._num_slabs)
         self._num_slabs = n_slabs
-        self.w[:] = w
+        self.w[:] = self.dz
+        self.w[0] = self.w[-1] = 0.0
         self.sigma[:] = 0
         self.rho[:] = rho
         self.irho[:] = irho
         if self.ismagnetic:
-            self.rhoM = rhoM
-            self.thetaM = thetaM
+            # copy out of the workspace since these outlive the evaluation
+            self.rhoM = rhoM.copy()
+            self.thetaM = thetaM.copy()
         self._z_offset = self._z_left
 
+    def _scratch(self, name, shape, dtype="d"):
+        """
+        Return a scratch array from the workspace, or a new array if there
+        is no workspace.
+        """
+        if self.workspace is None:
+            return np.empty(shape, dtype)
+        return self.workspace.get(name, shape, dtype)
+
     def _contract_profile(self, dA):
         from .backends import backend
 
@@ -614,7 +652,7 @@ def compute_limited_sigma(thickness, roughness, limit):
     return roughness
 
 
-def _build_profiles_backend(z, offsets, roughness, value):
+def _build_profiles_backend(z, offsets, roughness, value, out=None):
     from .backends import backend
 
     contrast = (value[:, 1:] - value[:, :-1]).ravel(order="C")
@@ -623,7 +661,11 @@ def _build_profiles_backend(z, offsets, roughness, value):
     NZ = len(z)
     # Number of profiles:
     NP = initial_value.shape[0]
-    profiles = np.zeros((NP, NZ), dtype=float).ravel("C")
+    if out is None:
+        profiles = np.zeros((NP, NZ), dtype=float).ravel("C")
+    else:
+        profiles = out.reshape(-1)
+        profiles[:] = 0.0
     backend.build_profile(z, offsets.copy(), roughness.copy(), contrast, initial_value, profiles)
     return profiles.reshape((NP, NZ))
 
@@ -129,11 +129,15 @@ class FreeformCheby(Layer):
     def render(self, probe, slabs):
         """Render slabs for use with the given probe"""
         thickness = self.thickness.value
-        Pw, Pz = slabs.microslabs(thickness)
-        t = Pz / thickness
-        Prho = _profile([p.value for p in self.rho], t, self.method)
-        Pirho = _profile([p.value for p in self.irho], t, self.method)
-        slabs.extend(rho=[Prho], irho=[Pirho], w=Pw)
+
+        def compute():
+            Pw, Pz = slabs.microslabs(thickness)
+            t = Pz / thickness
+            Prho = _profile([p.value for p in self.rho], t, self.method)
+            Pirho = _profile([p.value for p in self.irho], t, self.method)
+            return Pw, Prho, Pirho
+
+        self._render_memo(slabs, compute, self.method)
 
 
 class ChebyVF(Layer):
@@ -218,14 +222,17 @@ class ChebyVF(Layer):
             pass
 
         thickness = self.thickness.value
-        Pw, Pz = slabs.microslabs(thickness)
-        t = Pz / thickness
-        vf = _profile([p.value for p in self.vf], t, self.method)
-        vf = np.clip(vf, 0, 1)
-        Pw, vf = utils.merge_ends(Pw, vf, tol=1e-3)
-        P = M * vf + S * (1 - vf)
-        Pr, Pi = real(P), imag(P)
-        slabs.extend(rho=[Pr], irho=[Pi], w=Pw)
+
+        def compute():
+            Pw, Pz = slabs.microslabs(thickness)
+            t = Pz / thickness
+            vf = _profile([p.value for p in self.vf], t, self.method)
+            vf = np.clip(vf, 0, 1)
+            Pw, vf = utils.merge_ends(Pw, vf, tol=1e-3)
+            P = M * vf + S * (1 - vf)
+            return Pw, real(P), imag(P)
+
+        self._render_memo(slabs, compute, M, S, self.method)
 
 
 def _profile(c, t, method):
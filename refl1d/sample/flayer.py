@@ -1,5 +1,7 @@
 from dataclasses import dataclass
 import inspect
+import warnings
+import weakref
 from typing import Dict, Optional, Callable, Union
 
 import numpy as np
@@ -32,6 +34,8 @@ class FunctionalProfile(Layer):
 
         *name* is the layer name
 
+        *jit* is True if the profile function should be compiled with numba
+
     The profile function takes a depth vector *z* returns a density vector
     *rho*. For absorbing profiles, return complex vector *rho + irho*1j*.
     *z* is guaranteed to be increasing, with step size 2*z[0]. The
@@ -64,6 +68,16 @@ class FunctionalProfile(Layer):
         profile = FunctionalProfile(100, 0, profile=linear,
                                     rhoL=L1.rho, rhoR=L3.rho)
         sample = L1 | profile | L3
+
+    Profile functions which only use numpy operations supported by numba
+    can be compiled by setting *jit=True*, which removes the python overhead
+    of evaluating the profile.  The compiled function is shared by all
+    layers using the same profile function.  If numba cannot compile the
+    function then the python version is used instead.
+
+    Use :meth:`eval_batch` to evaluate the profile for a batch of parameter
+    sets, such as the draws used for uncertainty plots.  With *jit* the
+    whole batch is evaluated by a single call into compiled code.
     """
 
     thickness: Parameter
@@ -72,6 +86,7 @@ class FunctionalProfile(Layer):
     tol: float = 0
     magnetism: Optional[BaseMagnetism] = None
     name: str = ""
+    jit: bool = False
 
     # Attributes required for serialize/deserialize
     start: SLD = None
@@ -90,6 +105,7 @@ class FunctionalProfile(Layer):
         start=None,
         end=None,
         pars=None,
+        jit=False,
         **kw,
     ):
         # print(f"building FP with {thickness=} {interface=} {profile=} {name=} {start=} {end=} {pars=} {kw=}")
@@ -105,6 +121,7 @@ class FunctionalProfile(Layer):
         self.profile = profile
         self.tol = tol
         self.magnetism = magnetism
+        self.jit = jit
 
         self.start = start if start is not None else SLD(name + " start")
         self.end = end if end is not None else SLD(name + " end")
@@ -147,10 +164,28 @@ class FunctionalProfile(Layer):
         raise AttributeError(f"{type(self)!r} has no attribute {key!r}")
 
     def _eval(self, Pz):
-        args = {k: asarray([float(vi) for vi in v]) if isinstance(v, list) else float(v) for k, v in self.pars.items()}
+        args = _profile_args(self.pars)
         # if self.profile is None:
         #     return np.full_like(Pz, np.nan, dtype=complex)
-        return asarray(self.profile(asarray(Pz), **args))
+        return asarray(_call_profile(self.profile, self.jit, asarray(Pz, "d"), args))
+
+    def eval_batch(self, z, values):
+        """
+        Evaluate the profile at depths *z* for each parameter set in *values*.
+
+        *values* is a sequence of dictionaries mapping profile parameter
+        names to values, or to lists of values for vector parameters.
+        Parameters which are not given use their current values.
+
+        Returns an array of shape (len(values), len(z)).
+
+        With *jit* the parameter sets are stacked into arrays and evaluated
+        in a single compiled loop.  Without it this is a convenience loop
+        over the python profile function.
+        """
+        z = asarray(z, "d")
+        args = [_profile_args(self.pars, v) for v in values]
+        return _call_profile_batch(self.profile, self.jit, z, args)
 
     def parameters(self):
         # TODO: we are not including the calculated parameters
@@ -189,11 +224,12 @@ class FunctionalMagnetism(BaseMagnetism):
     provided it defaults to *thetaM=270*.
 
     See :class:`FunctionalProfile` for a description of the the profile
-    function.
+    function, and for the use of *jit* to compile it.
     """
 
     profile: Callable
     tol: float = 1e-3
+    jit: bool = False
 
     # Attributes required for serialize/deserialize
     start: Magnetism = None
@@ -213,6 +249,7 @@ class FunctionalMagnetism(BaseMagnetism):
         end=None,
         thickness=None,
         pars=None,
+        jit=False,
         **kw,
     ):
         # print(f"building FM with {profile=}, {tol=}, {name=}, {start=}, {end=}, {thickness=}, {pars=}, {kw=}")
@@ -225,6 +262,7 @@ class FunctionalMagnetism(BaseMagnetism):
         BaseMagnetism.__init__(self, name=name, **magkw)
         self.profile = profile
         self.tol = tol
+        self.jit = jit
 
         self.start = start if start is not None else Magnetism(name=name + " start")
         self.end = end if end is not None else Magnetism(name=name + " end")
@@ -281,12 +319,13 @@ class FunctionalMagnetism(BaseMagnetism):
             return self.pars[key]
         raise AttributeError(f"{type(self)!r} has no attribute {key!r}")
 
-    def _eval(self, Pz):
-        args = {k: asarray([float(vi) for vi in v]) if isinstance(v, list) else float(v) for k, v in self.pars.items()}
-        Pz = asarray(Pz)
+    def _eval(self, Pz, args=None):
+        if args is None:
+            args = _profile_args(self.pars)
+        Pz = asarray(Pz, "d")
         # if self.profile is None:
         #     return np.full_like(Pz, np.nan), np.full_like(Pz, np.nan)
-        P = self.profile(Pz, **args)
+        P = _call_profile(self.profile, self.jit, Pz, args)
         rhoM, thetaM = P if isinstance(P, tuple) else (P, DEFAULT_THETA_M)
         try:
             # rhoM or thetaM may be constant, lists or arrays (but not tuples!)
@@ -295,6 +334,20 @@ class FunctionalMagnetism(BaseMagnetism):
             raise TypeError(f"Profile function for '{self.name}' returns incorrect shape")
         return rhoM, thetaM
 
+    def eval_batch(self, z, values):
+        """
+        Evaluate the profile at depths *z* for each parameter set in *values*.
+
+        See :meth:`FunctionalProfile.eval_batch` for details.
+
+        Returns arrays *rhoM*, *thetaM* of shape (len(values), len(z)).
+        """
+        z = asarray(z, "d")
+        args = [_profile_args(self.pars, v) for v in values]
+        P = _call_profile_batch(self.profile, self.jit, z, args)
+        rhoM, thetaM = P if isinstance(P, tuple) else (P, np.full(P.shape, DEFAULT_THETA_M))
+        return rhoM, thetaM
+
     def render(self, probe, slabs, thickness, anchor, sigma):
         Pw, Pz = slabs.microslabs(thickness)
         if len(Pw) == 0:
@@ -310,6 +363,133 @@ class FunctionalMagnetism(BaseMagnetism):
         return "FunctionalMagnetism(%s)" % self.name
 
 
+def _profile_args(pars, values=None):
+    """
+    Return the keyword arguments for the profile function, with list
+    parameters converted to vectors.  Any parameter values given in
+    *values* replace the current parameter values.
+    """
+    values = {} if values is None else values
+    args = {}
+    for k, v in pars.items():
+        v = values.get(k, v)
+        if isinstance(v, (list, tuple, np.ndarray)):
+            args[k] = asarray([float(vi) for vi in v])
+        else:
+            args[k] = float(v)
+    return args
+
+
+# Compiled profile functions, or None if the function cannot be compiled.
+_JIT_CACHE = weakref.WeakKeyDictionary()
+# Compiled loops over parameter sets for each profile function.
+_BATCH_CACHE = weakref.WeakKeyDictionary()
+
+
+def _call_profile(profile, jit, z, args):
+    """
+    Call the profile function, using the numba compiled version if *jit*.
+    """
+    compiled = _compiled_profile(profile) if jit else None
+    if compiled is not None:
+        try:
+            return compiled(z, **args)
+        except _jit_errors() as exc:
+            _disable_jit(profile, exc)
+    return profile(z, **args)
+
+
+def _call_profile_batch(profile, jit, z, args):
+    """
+    Call the profile function for each set of keyword arguments in *args*.
+
+    Returns an array of shape (len(args), len(z)), or a tuple of such arrays
+    if the profile returns a tuple.  If *jit*, the parameter sets are stacked
+    into arrays and the loop over them runs in numba; otherwise this is
+    a python loop.
+    """
+    compiled = _compiled_profile(profile) if jit and args else None
+    if compiled is not None:
+        try:
+            return _compiled_batch(profile, compiled, z, args)
+        except _jit_errors() as exc:
+            _disable_jit(profile, exc)
+
+    P = [profile(z, **a) for a in args]
+    if P and isinstance(P[0], tuple):
+        return tuple(np.array([broadcast_to(p[k], z.shape) for p in P]) for k in range(len(P[0])))
+    return np.array([broadcast_to(p, z.shape) for p in P]).reshape(len(P), len(z))
+
+
+def _compiled_batch(profile, compiled, z, args):
+    names = tuple(args[0])
+    stacked = [np.array([a[k] for a in args]) for k in names]
+    # Evaluate the first parameter set to find the type of the result.
+    first = compiled(z, **args[0])
+    first = first if isinstance(first, tuple) else (first,)
+    out = [np.empty((len(args), len(z)), asarray(p).dtype) for p in first]
+    drivers = _BATCH_CACHE.setdefault(profile, {})
+    key = names, len(out)
+    if key not in drivers:
+        drivers[key] = _compile_batch(compiled, names, len(out))
+    drivers[key](z, *out, *stacked)
+    return tuple(out) if len(out) > 1 else out[0]
+
+
+def _compile_batch(compiled, names, n_out):
+    """
+    Compile a loop which calls the profile for each row of the stacked
+    parameter arrays, storing the results in the rows of the outputs.
+    """
+    import numba
+
+    outputs = [f"out{k}" for k in range(n_out)]
+    pars = [f"p{k}" for k in range(len(names))]
+    keywords = ", ".join(f"{name}={p}[i]" for name, p in zip(names, pars))
+    call = f"profile(z, {keywords})"
+    lines = [f"def batch(z, {', '.join(outputs + pars)}):", "    for i in range(out0.shape[0]):"]
+    if n_out == 1:
+        lines.append(f"        out0[i] = {call}")
+    else:
+        lines.append(f"        P = {call}")
+        lines.extend(f"        {out}[i] = P[{k}]" for k, out in enumerate(outputs))
+    namespace = {"profile": compiled}
+    exec("\n".join(lines), namespace)
+    return numba.njit(namespace["batch"])
+
+
+def _compiled_profile(profile):
+    compiled = _JIT_CACHE.get(profile, False)
+    if compiled is False:
+        compiled = _JIT_CACHE[profile] = _compile_profile(profile)
+    return compiled
+
+
+def _disable_jit(profile, exc):
+    # Only functions which are fully supported by numba can be compiled;
+    # use the python version for the rest.
+    warnings.warn(f"profile {profile.__name__} could not be compiled with numba; using python\n{exc}")
+    _JIT_CACHE[profile] = None
+
+
+def _jit_errors():
+    """
+    Errors raised when numba cannot compile a function.  Errors raised
+    while running the compiled function are passed on to the caller.
+    """
+    from numba.core import errors
+
+    return errors.TypingError, errors.LoweringError, errors.UnsupportedError
+
+
+def _compile_profile(profile):
+    try:
+        import numba
+    except ImportError:
+        return None
+    return numba.njit(profile)
+
+
 def _parse_parameters(name, profile, kw):
     # Query profile function for the list of arguments
     argspec = inspect.getfullargspec(profile)
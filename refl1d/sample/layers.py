@@ -23,12 +23,13 @@ scattering density may vary with depth in the layer.
 
 __all__ = ["Repeat", "Slab", "Stack", "Layer"]
 
+from collections import OrderedDict
 from copy import copy
 from dataclasses import dataclass, field
 from typing import List, Literal, Optional, Union
 
 import numpy as np
-from bumps.parameter import Calculation, Parameter
+from bumps.parameter import Calculation, Parameter, flatten
 
 from .. import profile
 from ..probe.probe import NeutronProbe, XrayProbe
@@ -100,6 +101,36 @@ class Layer:  # Abstract base class
         Use the probe to render the layer into a microslab representation.
         """
 
+    #: Number of rendered profiles remembered by :meth:`_render_memo`.
+    render_memo_size = 4
+    _render_cache = None
+
+    def _render_memo(self, slabs, compute, *key):
+        """
+        Extend *slabs* with the profile (w, rho, irho) returned by *compute()*.
+
+        Freeform layers are expensive to sample, but during a fit most steps
+        leave them untouched.  The last few profiles are remembered, keyed
+        on the layer parameter values, the microslab step *slabs.dz* and any
+        additional *key* items such as the probe SLDs of the materials, so
+        an unchanged layer is copied into the slabs without being resampled.
+        """
+        values = tuple(p.value for p in flatten(self.layer_parameters()))
+        key = (values, slabs.dz, tuple(np.asarray(v).tobytes() for v in key))
+        cache = self._render_cache
+        if cache is None:
+            cache = self._render_cache = OrderedDict()
+        profile = cache.get(key, None)
+        if profile is None:
+            profile = cache[key] = compute()
+            while len(cache) > self.render_memo_size:
+                cache.popitem(last=False)
+        else:
+            cache.move_to_end(key)
+        w, rho, irho = profile
+        if len(w):
+            slabs.extend(rho=[rho], irho=[irho], w=w)
+
     def penalty(self):
         """
         Return a penalty value associated with the layer.  This should be
@@ -115,6 +146,19 @@ class Layer:  # Abstract base class
         """
         return 0
 
+    def batch_parameters(self):
+        """
+        Return the inputs for solvers which can prepare several evaluation
+        points at once, as a dictionary {solver: [inputs, ...]}.
+
+        Layers whose profile requires an expensive solve, such as
+        :class:`.polymer.EndTetheredPolymer`, return the solver inputs for
+        the current parameter values.  :func:`refl1d.experiment.prepare_points`
+        collects these for each point in a population and calls each solver
+        once, so that the evaluations which follow use cached solutions.
+        """
+        return {}
+
     def __str__(self):
         """
         Print shows the layer name
@@ -238,6 +282,9 @@ class Stack(Layer):
     layers: List[Union["Slab", "Repeat"]]
     thickness: Parameter = field(metadata={"description": "always equals the sum of the layer thicknesses"})
 
+    # Struct-of-arrays form of the layers, used when all are plain slabs
+    _slab_table = None
+
     def __init__(
         self,
         layers: Optional[Union["Stack", List[Union["Slab", "Repeat"]]]] = None,
@@ -326,6 +373,13 @@ class Stack(Layer):
     def penalty(self):
         return sum(L.penalty() for L in self._layers)
 
+    def batch_parameters(self):
+        batch = {}
+        for L in self._layers:
+            for solver, inputs in L.batch_parameters().items():
+                batch.setdefault(solver, []).extend(inputs)
+        return batch
+
     def _calculate_thickness(self):
         return sum(L.thickness.value for L in self._layers)
 
@@ -348,7 +402,14 @@ class Stack(Layer):
         """
         Render and sld stack in which no layers are magnetic.
         """
-        for layer in self._layers:
+        layers = self._layers
+        table = self._slab_table
+        if table is None or not table.matches(layers):
+            table = self._slab_table = _SlabTable(layers)
+        if table.slabs_only:
+            table.render(layers, probe, slabs)
+            return
+        for layer in layers:
             layer.render(probe, slabs)
 
     def _render_magnetic(self, probe, slabs):
@@ -563,6 +624,57 @@ class Stack(Layer):
     render.__doc__ = Layer.render.__doc__
 
 
+class _SlabTable:
+    """
+    Compiled form of a stack of plain slabs.
+
+    Each distinct material in the stack is stored once, with a material
+    index for every layer.  :meth:`render` reads the thickness and interface
+    values and the material SLDs, then fills the microslabs for the whole
+    stack with one assignment rather than one *append* per layer.
+
+    The table is tied to the identity of the layers and their materials;
+    use :meth:`matches` to check that it is still valid.
+    """
+
+    __slots__ = ("layer_ids", "material_ids", "materials", "index", "slabs_only")
+
+    def __init__(self, layers):
+        self.layer_ids = [id(L) for L in layers]
+        self.slabs_only = len(layers) > 0 and all(type(L) is Slab for L in layers)
+        if not self.slabs_only:
+            return
+        self.material_ids = [id(L.material) for L in layers]
+        unique = {}
+        for L in layers:
+            unique.setdefault(id(L.material), L.material)
+        position = {key: k for k, key in enumerate(unique)}
+        self.materials = list(unique.values())
+        self.index = np.array([position[key] for key in self.material_ids], dtype=int)
+
+    def matches(self, layers):
+        """
+        True if the table was built from these layers and materials.
+        """
+        if [id(L) for L in layers] != self.layer_ids:
+            return False
+        return not self.slabs_only or [id(L.material) for L in layers] == self.material_ids
+
+    def render(self, layers, probe, slabs):
+        """
+        Add the slabs for *layers* to the microslab model *slabs*.
+        """
+        n = len(layers)
+        w = np.fromiter((L.thickness.value for L in layers), dtype="d", count=n)
+        sigma = np.fromiter((L.interface.value for L in layers), dtype="d", count=n)
+        nprobe = slabs._slabs_rho.shape[1]
+        sld = np.empty((2, nprobe, len(self.materials)))
+        for k, material in enumerate(self.materials):
+            sld[0, :, k], sld[1, :, k] = material.sld(probe)
+        sld = sld[:, :, self.index]
+        slabs.extend(w=w, sigma=sigma, rho=sld[0], irho=sld[1])
+
+
 def _check_layer(el):
     if isinstance(el, Layer):
         return el
@@ -618,6 +730,9 @@ class Repeat(Layer):
     def penalty(self):
         return self.stack.penalty()
 
+    def batch_parameters(self):
+        return self.stack.batch_parameters()
+
     @property
     def ismagnetic(self):
         return self.magnetism is not None or self.stack.ismagnetic
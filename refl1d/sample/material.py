@@ -660,31 +660,16 @@ class Mixture(Scatterer):
         """
         Return the scattering length density and absorption of the mixture.
         """
-        # Convert fractions into an array, with the final fraction
-        fraction = np.array([0.0] + [f.value for f in self.fraction])
-        fraction[0] = 100 - sum(fraction)
-        # TODO: handle invalid fractions using penalty functions
-        # S = sum(fraction)
-        # scale = S/100 if S > 100 else 1
-        # fraction[0] = 100 - S/scale
-        # penalty = scale - 1
-        if (fraction < 0).any():
-            return nan, nan
-
-        # Lookup SLD
-        slds = [c.sld(probe) for c in [self.base] + self.material]
-        rho, irho = [np.asarray(v) for v in zip(*slds)]
+        # The probe cache evaluates all the mixtures in the model together.
+        mixture_sld = getattr(probe, "mixture_sld", None)
+        if mixture_sld is not None:
+            return mixture_sld(self)
+        return self._sld(probe)
 
-        # Use calculator to convert individual SLDs to overall SLD
-        volume_fraction = self._volume(fraction)
-        rho = np.sum(rho * extend(volume_fraction, rho))
-
-        irho = np.sum(irho * extend(volume_fraction, irho))
+    def _sld(self, probe):
         if self.use_incoherent:
             raise NotImplementedError("incoherent scattering not supported")
-        # print "Mixture", self.name, coh, absorp
-
-        return rho, irho
+        return _MixtureTable([self], probe).sld()[0]
 
     def __str__(self):
         return "<%s>" % (", ".join(str(M) for M in [self.base] + self.material))
@@ -693,6 +678,82 @@ class Mixture(Scatterer):
         return "Mixture(%s)" % (", ".join(repr(M) for M in [self.base] + self.material))
 
 
+class _MixtureTable(object):
+    """
+    Precompiled SLD calculation for a set of mixtures.
+
+    The scattering factors for the material components are looked up once
+    at unit density and stored as a component matrix, one row per component
+    and one column per probe wavelength.  Each evaluation scales the rows by
+    the current component densities, fills in the rows for the components
+    which are not simple materials (SLDs, nested mixtures, ...), and sums
+    the rows weighted by volume fraction to give the SLD of every mixture.
+    """
+
+    def __init__(self, mixtures, probe):
+        self.probe = probe
+        self.mixtures = mixtures
+        self.index = {id(m): k for k, m in enumerate(mixtures)}
+        parts = [[m.base] + m.material for m in mixtures]
+        components = [c for part in parts for c in part]
+        sizes = [len(part) for part in parts]
+        self.offsets = np.cumsum([0] + sizes[:-1])
+        self.by_mass = [isinstance(m._volume, _MassFraction) for m in mixtures]
+        self.materials = [
+            (k, c) for k, c in enumerate(components) if isinstance(c, BaseMaterial) and not c.use_incoherent
+        ]
+        self.others = [(k, c) for k, c in enumerate(components) if not isinstance(c, BaseMaterial) or c.use_incoherent]
+        unit = [probe.scattering_factors(c._formula, density=1.0)[:2] for _, c in self.materials]
+        others = [self._other_sld(c) for _, c in self.others]
+        # Components may be per wavelength or independent of wavelength.
+        shape = np.broadcast_shapes(*[np.shape(v) for sld in unit + others for v in sld])
+        self.scalar = shape == ()
+        self.table = np.empty((len(components), 2) + shape)
+        self.material_index = np.array([k for k, _ in self.materials], "i")
+        self.unit = np.empty((len(self.materials), 2) + shape)
+        for row, (rho, irho) in zip(self.unit, unit):
+            row[0], row[1] = rho, irho
+
+    def _other_sld(self, c):
+        # Nested mixtures are evaluated directly so that they don't
+        # reenter the probe cache while it is computing this table.
+        return c._sld(self.probe) if isinstance(c, Mixture) else c.sld(self.probe)
+
+    def sld(self):
+        """
+        Return [(rho, irho), ...] for each mixture.
+        """
+        table = self.table
+        extra = (1,) * (table.ndim - 1)
+        if self.materials:
+            density = np.array([c.density.value for _, c in self.materials])
+            table[self.material_index] = self.unit * density.reshape(density.shape + extra)
+        for k, c in self.others:
+            table[k, 0], table[k, 1] = self._other_sld(c)
+
+        # Convert the fractions to volume fractions, with the remainder
+        # of each mixture going to the base material.
+        weight = np.empty(len(table))
+        for m, start, by_mass in zip(self.mixtures, self.offsets, self.by_mass):
+            n = len(m.fraction) + 1
+            fraction = weight[start : start + n]
+            fraction[1:] = [f.value for f in m.fraction]
+            fraction[0] = 100 - np.sum(fraction[1:])
+            # TODO: handle invalid fractions using penalty functions
+            if (fraction < 0).any():
+                fraction[:] = nan
+            elif by_mass:
+                fraction /= [c.density.value for c in [m.base] + m.material]
+                fraction /= np.sum(fraction)
+            else:
+                fraction *= 0.01
+
+        result = np.add.reduceat(table * weight.reshape(weight.shape + extra), self.offsets, axis=0)
+        if self.scalar:
+            return [(float(rho), float(irho)) for rho, irho in result]
+        return [(rho, irho) for rho, irho in result]
+
+
 # ============================ SLD cache =============================
 
 
@@ -713,16 +774,48 @@ class ProbeCache(object):
     by clearing the entire cash.
     """
 
+    _mixture_table = None
+    _mixture_sld = None
+
     def __init__(self, probe=None):
         self._probe = probe
         self._cache = {}
 
     def clear(self):
         self._cache = {}
+        self._mixture_table = self._mixture_sld = None
+
+    reset = clear
+
+    def update(self):
+        """
+        Forget the mixture SLDs computed for the previous parameter values.
+
+        Call this before rendering the model after the parameters change.
+        """
+        self._mixture_sld = None
+
+    def mixture_sld(self, mixture):
+        """
+        Return the scattering length density pair (rho, irho) for *mixture*.
+
+        All mixtures seen by the cache are evaluated together the first
+        time any one of them is requested after :meth:`update`.
+        """
+        h = id(mixture)
+        if self._mixture_table is None or h not in self._mixture_table.index:
+            mixtures = [] if self._mixture_table is None else self._mixture_table.mixtures
+            self._mixture_table = _MixtureTable(mixtures + [mixture], self)
+            self._mixture_sld = None
+        if self._mixture_sld is None:
+            self._mixture_sld = self._mixture_table.sld()
+        return self._mixture_sld[self._mixture_table.index[h]]
 
     def __delitem__(self, material):
         if material in self._cache:
             del self._cache[material]
+        # mixtures hold their own copy of the scattering factors
+        self._mixture_table = self._mixture_sld = None
 
     def scattering_factors(self, material, density):
         """
@@ -110,9 +110,13 @@ class FreeLayer(Layer):
     def render(self, probe, slabs):
         below = self.below.sld(probe)
         above = self.above.sld(probe)
-        Pw, Pz = slabs.microslabs(self.thickness.value)
-        Prho, Pirho = self.profile(Pz, below, above)
-        slabs.extend(rho=[Prho], irho=[Pirho], w=Pw)
+
+        def compute():
+            Pw, Pz = slabs.microslabs(self.thickness.value)
+            Prho, Pirho = self.profile(Pz, below, above)
+            return Pw, Prho, Pirho
+
+        self._render_memo(slabs, compute, *below, *above)
 
 
 def inflections(dx, dy):
@@ -211,13 +215,17 @@ class FreeInterface(Layer):
 
         below_rho, below_irho = self.below.sld(probe)
         above_rho, above_irho = self.above.sld(probe)
-        # Pz is the center, Pw is the width
-        Pw, Pz = slabs.microslabs(thickness)
-        profile = self.profile(Pz)
-        Pw, profile = utils.merge_ends(Pw, profile, tol=1e-3)
-        Prho = (1 - profile) * below_rho + profile * above_rho
-        Pirho = (1 - profile) * below_irho + profile * above_irho
-        slabs.extend(rho=[Prho], irho=[Pirho], w=Pw)
+
+        def compute():
+            # Pz is the center, Pw is the width
+            Pw, Pz = slabs.microslabs(thickness)
+            profile = self.profile(Pz)
+            Pw, profile = utils.merge_ends(Pw, profile, tol=1e-3)
+            Prho = (1 - profile) * below_rho + profile * above_rho
+            Pirho = (1 - profile) * below_irho + profile * above_irho
+            return Pw, Prho, Pirho
+
+        self._render_memo(slabs, compute, below_rho, below_irho, above_rho, above_irho)
 
 
 # CRUFT: still working on best rep'n for control point locations
@@ -54,6 +54,7 @@ from time import time
 from bumps.parameter import Parameter
 import numpy as np
 from numpy import exp, hstack, imag, log, ones_like, pi, real, sqrt
+from scipy.signal import oaconvolve
 
 try:
     from numpy._core.multiarray import correlate as old_correlate
@@ -71,6 +72,9 @@ LAMBDA_0 = 1.0 - 2.0 * LAMBDA_1
 LAMBDA_ARRAY = np.array([LAMBDA_1, LAMBDA_0, LAMBDA_1])
 MINLAT = 25
 MINBULK = 5
+# smear() switches to FFT convolution when len(profile) * kernel half-width
+# exceeds this; below it np.convolve is faster.
+SMEAR_FFT_WORK = 2_000_000
 SQRT_PI = sqrt(pi)
 
 
@@ -183,15 +187,6 @@ class PolymerBrush(Layer):
 
     def render(self, probe, slabs):
         thickness = self.thickness.value
-        Pw, Pz = slabs.microslabs(thickness)
-        # Skip layer if it falls to zero thickness.  This may lead to
-        # problems in the fitter, since R(thickness) is non-differentiable
-        # at thickness = 0.  "Clip to boundary" range handling will at
-        # least allow this point to be found.
-        # TODO: consider using this behaviour on all layer types.
-        if len(Pw) == 0:
-            return
-
         Mr, Mi = self.polymer.sld(probe)
         Sr, Si = self.solvent.sld(probe)
         M = Mr + 1j * Mi
@@ -201,11 +196,22 @@ class PolymerBrush(Layer):
         except Exception:
             pass
 
-        vf = self.profile(Pz)
-        Pw, vf = utils.merge_ends(Pw, vf, tol=1e-3)
-        P = M * vf + S * (1 - vf)
-        Pr, Pi = real(P), imag(P)
-        slabs.extend(rho=[Pr], irho=[Pi], w=Pw)
+        def compute():
+            Pw, Pz = slabs.microslabs(thickness)
+            # Skip layer if it falls to zero thickness.  This may lead to
+            # problems in the fitter, since R(thickness) is non-differentiable
+            # at thickness = 0.  "Clip to boundary" range handling will at
+            # least allow this point to be found.
+            # TODO: consider using this behaviour on all layer types.
+            if len(Pw) == 0:
+                return Pw, Pz, Pz
+
+            vf = self.profile(Pz)
+            Pw, vf = utils.merge_ends(Pw, vf, tol=1e-3)
+            P = M * vf + S * (1 - vf)
+            return Pw, real(P), imag(P)
+
+        self._render_memo(slabs, compute, M, S)
 
 
 def layer_thickness(z):
@@ -341,6 +347,11 @@ def smear(z, P, sigma):
     :Returns:
         *Ps* | vector
             smeared sample values
+
+    The profile is extended by its end values for the width of the gaussian
+    (truncated at 3 *sigma*).  Short profiles and narrow kernels are convolved
+    directly; otherwise overlap-add FFT convolution is used so that the cost
+    stays near linear for thick profiles with fine steps and large *sigma*.
     """
     if len(z) < 3:
         return P
@@ -349,8 +360,14 @@ def smear(z, P, sigma):
         return P
     w = int(3 * sigma / dz)
     G = exp(-0.5 * (np.arange(-w, w + 1) * (dz / sigma)) ** 2)
-    full = np.hstack(([P[0]] * w, P, [P[-1]] * w))
-    return np.convolve(full, G / np.sum(G), "valid")
+    G /= np.sum(G)
+    full = np.empty(len(P) + 2 * w)
+    full[:w] = P[0]
+    full[w:-w] = P
+    full[-w:] = P[-1]
+    if len(full) * w < SMEAR_FFT_WORK:
+        return np.convolve(full, G, "valid")
+    return oaconvolve(full, G, "valid")
 
 
 class PolymerMushroom(Layer):
@@ -584,6 +601,28 @@ class EndTetheredPolymer(Layer):
             "interface": self.interface,
         }
 
+    def lattice_parameters(self):
+        """
+        Return the lattice parameters for the current values, as used by
+        :func:`SCFcache` and :func:`SCFbatch`.
+        """
+        return SCFlattice(
+            chi=self.chi.value,
+            chi_s=self.chi_s.value,
+            h_dry=self.h_dry.value,
+            l_lat=self.l_lat.value,
+            mn=self.mn.value,
+            m_lat=self.m_lat.value,
+            pdi=self.pdi.value,
+            phi_b=self.phi_b.value,
+        )
+
+    def batch_parameters(self):
+        """
+        Solve the SCF profiles for a population together using :func:`SCFbatch`.
+        """
+        return {SCFbatch: [self.lattice_parameters()]}
+
     def profile(self, z):
         return SCFprofile(
             z,
@@ -642,14 +681,12 @@ def SCFprofile(z, chi=None, chi_s=None, h_dry=None, l_lat=1, mn=None, m_lat=1, p
     """
 
     # calculate lattice space parameters
-    theta = h_dry / l_lat
-    segments = mn / m_lat
-    sigma = theta / segments
+    lattice = SCFlattice(chi, chi_s, h_dry, l_lat, mn, m_lat, phi_b, pdi)
 
     # solve the self consistent field equations using the cache
     if disp:
         print("\n=====Begin calculations=====\n")
-    phi_lat = SCFcache(chi, chi_s, pdi, sigma, phi_b, segments, disp)
+    phi_lat = SCFcache(*lattice, disp=disp)
     if disp:
         print("\n============================\n")
 
@@ -668,38 +705,71 @@ def SCFprofile(z, chi=None, chi_s=None, h_dry=None, l_lat=1, mn=None, m_lat=1, p
     return phi
 
 
+def SCFlattice(chi=None, chi_s=None, h_dry=None, l_lat=1, mn=None, m_lat=1, phi_b=0, pdi=1):
+    """
+    Convert real space polymer parameters to lattice parameters.
+
+    Returns (chi, chi_s, pdi, sigma, phi_b, segments) as used by
+    :func:`SCFcache` and :func:`SCFbatch`.
+    """
+    theta = h_dry / l_lat
+    segments = mn / m_lat
+    sigma = theta / segments
+    return chi, chi_s, pdi, sigma, phi_b, segments
+
+
 _SCFcache_dict = OrderedDict()
+# Number of solutions retained by SCFcache
+SCF_CACHE_SIZE = 100
 
 
-def SCFcache(chi, chi_s, pdi, sigma, phi_b, segments, disp=False, cache=_SCFcache_dict):
-    """Return a memoized SCF result by walking from a previous solution.
+def _SCFscale(chi, chi_s, pdi, sigma, phi_b, segments):
+    # Try to keep the parameters between 0 and 1. Factors are arbitrary.
+    return (chi, chi_s * 3, pdi - 1, sigma, phi_b, segments / 500)
 
-    Using an OrderedDict because I want to prune keys FIFO
-    """
-    try:
-        from scipy.optimize import NoConvergence
-    except ImportError:
-        # cruft for scipy < 1.14, hard breaking change with no warning
-        from scipy.optimize.nonlin import NoConvergence
+
+def _SCFprime(cache, disp=False):
     # prime the cache with a known easy solutions
     if not cache:
         cache[(0, 0, 0, 0.1, 0.1, 0.1)] = SCFsolve(sigma=0.1, phi_b=0.1, segments=50, disp=disp)
         cache[(0, 0, 0, 0, 0.1, 0.1)] = SCFsolve(sigma=0, phi_b=0.1, segments=50, disp=disp)
         cache[(0, 0, 0, 0.1, 0, 0.1)] = SCFsolve(sigma=0.1, phi_b=0, segments=50, disp=disp)
 
-    if disp:
-        starttime = time()
 
-    # Try to keep the parameters between 0 and 1. Factors are arbitrary.
-    scaled_parameters = (chi, chi_s * 3, pdi - 1, sigma, phi_b, segments / 500)
+def SCFcache(chi, chi_s, pdi, sigma, phi_b, segments, disp=False, cache=_SCFcache_dict):
+    """Return a memoized SCF result by walking from a previous solution.
 
-    # longshot, but return a cached result if we hit it
+    Using an OrderedDict because I want to prune keys FIFO
+    """
+    _SCFprime(cache, disp)
+    scaled_parameters = _SCFscale(chi, chi_s, pdi, sigma, phi_b, segments)
     if scaled_parameters in cache:
+        # longshot, but return a cached result if we hit it
         if disp:
             print("SCFcache hit at:", scaled_parameters)
         phi = cache[scaled_parameters] = cache.pop(scaled_parameters)
         return phi
 
+    phi = _SCFwalk(scaled_parameters, cache, disp)
+
+    # keep the cache from consuming all things
+    while len(cache) > SCF_CACHE_SIZE:
+        cache.popitem(last=False)
+
+    return phi
+
+
+def _SCFwalk(scaled_parameters, cache, disp=False):
+    """Solve for *scaled_parameters* starting from the nearest cached solution."""
+    try:
+        from scipy.optimize import NoConvergence
+    except ImportError:
+        # cruft for scipy < 1.14, hard breaking change with no warning
+        from scipy.optimize.nonlin import NoConvergence
+
+    if disp:
+        starttime = time()
+
     # Find the closest parameters in the cache: O(len(cache))
 
     # Numpy setup
@@ -781,11 +851,52 @@ def SCFcache(chi, chi_s, pdi, sigma, phi_b, segments, disp=False, cache=_SCFcach
     if disp:
         print("SCFcache execution time:", round(time() - starttime, 3), "s")
 
-    # keep the cache from consuming all things
-    while len(cache) > 100:
+    return phi
+
+
+def SCFbatch(parameter_sets, disp=False, cache=_SCFcache_dict):
+    """Solve the SCF equations for a batch of parameter sets.
+
+    *parameter_sets* is a sequence of (chi, chi_s, pdi, sigma, phi_b, segments)
+    tuples as accepted by :func:`SCFcache`.  Returns the list of lattice
+    volume fraction profiles, with None for members which could not be
+    solved.  Calling :func:`SCFcache` for such a member raises the error.
+
+    Duplicate members are solved once.  The remaining members are solved
+    closest first, each walking from its nearest neighbour amongst the
+    cached solutions and the members solved before it, so a cloud of nearby
+    parameter sets such as a DREAM population is solved as a chain of short
+    steps rather than as independent walks from the same few cached points.
+    The cache is allowed to grow to hold the whole batch, so the following
+    :func:`SCFcache` calls for its members are cache hits.
+    """
+    _SCFprime(cache, disp)
+    keys = [_SCFscale(*p) for p in parameter_sets]
+    pending = [k for k in OrderedDict.fromkeys(keys) if k not in cache]
+    if pending:
+        todo = np.array(pending)
+        known = np.array(tuple(dict.__iter__(cache)))
+        dist = np.min(np.sum((todo[:, None, :] - known[None, :, :]) ** 2, axis=2), axis=1)
+        done = np.zeros(len(pending), dtype=bool)
+        for _ in range(len(pending)):
+            k = np.where(done, np.inf, dist).argmin()
+            done[k] = True
+            try:
+                _SCFwalk(pending[k], cache, disp)
+            except (ValueError, RuntimeError) as e:
+                if disp:
+                    print("SCFbatch failed at:", pending[k], e)
+            else:
+                dist = np.minimum(dist, np.sum((todo - todo[k]) ** 2, axis=1))
+
+    # keep the batch and drop the oldest of everything else
+    for key in OrderedDict.fromkeys(keys):
+        if key in cache:
+            cache[key] = cache.pop(key)
+    while len(cache) > max(SCF_CACHE_SIZE, len(set(keys))):
         cache.popitem(last=False)
 
-    return phi
+    return [cache.get(key, None) for key in keys]
 
 
 def SCFsolve(chi=0, chi_s=0, pdi=1, sigma=None, phi_b=0, segments=None, disp=False, phi0=None, maxiter=30):
@@ -1052,12 +1163,6 @@ def calc_phi_z(g_z, n_avg, sigma, phi_b, u_z_avg=0, p_i=None):
     return phi_z_ta + phi_z_free
 
 
-def compose(g_zs, g_zs_ngts, g_z):
-    prod = g_zs * np.fliplr(g_zs_ngts)
-    prod[np.isnan(prod)] = 0
-    return np.sum(prod, axis=1) / g_z
-
-
 class Propagator(object):
     def __init__(self, g_z, segments):
         self.g_z = g_z
@@ -1136,8 +1241,26 @@ if USE_NUMBA:
                 g_zs[k, r + 1] = (g_zs[k, r] * f0 + (g_zs[k - 1, r] + g_zs[k + 1, r]) * f1 + c_ir) * g_z[k]
             g_zs[-1, r + 1] = (g_zs[-2, r] * f1 + g_zs[-1, r] * f0 + c_ir) * g_z[-1]
 
+    @njit("f8[:](f8[:, :], f8[:, :], f8[:])", cache=True)
+    def compose(g_zs, g_zs_ngts, g_z):
+        points, segments = g_zs.shape
+        phi_z = np.zeros(points)
+        for r in range(segments):
+            for k in range(points):
+                prod = g_zs[k, r] * g_zs_ngts[k, segments - r - 1]
+                if not np.isnan(prod):
+                    phi_z[k] += prod
+        for k in range(points):
+            phi_z[k] /= g_z[k]
+        return phi_z
+
 else:
 
+    def compose(g_zs, g_zs_ngts, g_z):
+        prod = g_zs * np.fliplr(g_zs_ngts)
+        prod[np.isnan(prod)] = 0
+        return np.sum(prod, axis=1) / g_z
+
     def _calc_g_zs(g_z, c_i, g_zs, f0, f1):
         coeff = np.array([f1, f0, f1])
         pg_zs = g_zs[:, 0]
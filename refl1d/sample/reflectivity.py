@@ -17,10 +17,12 @@ __author__ = "Paul Kienzle"
 __all__ = [
     "reflectivity",
     "reflectivity_amplitude",
+    "reflectivity_jacobian",
     "magnetic_reflectivity",
     "magnetic_amplitude",
     "unpolarized_magnetic",
     "convolve",
+    "convolve_amplitude",
 ]
 
 import numpy as np
@@ -72,6 +74,10 @@ def reflectivity_amplitude(
     irho=0,
     sigma=0,
     rho_index=None,
+    precision="double",
+    R_floor=1e-8,
+    max_phase=1e3,
+    out=None,
 ):
     r"""
     Calculate reflectivity amplitude $r(k_z)$ from slab model.
@@ -93,6 +99,20 @@ def reflectivity_amplitude(
             Points at which to evaluate the reflectivity
         *rho_index* = 0 : integer[M]
             *rho* and *irho* columns to use for the various kz.
+        *precision* = "double" : "double" | "single"
+            Use "single" to evaluate the kernel in float32/complex64.  This
+            is roughly twice as fast, with relative errors in $|r|^2$ of
+            order 1e-4, which is good enough for exploring parameter space.
+        *R_floor* = 1e-8 : float
+            Single precision only.  Points with $|r|^2$ below the floor are
+            recomputed in double precision.
+        *max_phase* = 1e3 : float | radians
+            Single precision only.  If $k_z$ times the total thickness
+            exceeds *max_phase* then the accumulated phase error would be
+            too large, and the whole calculation is done in double precision.
+        *out* = None : complex[M]
+            Array to receive the result.  This allows the caller to reuse
+            the output buffer between evaluations.
 
     :Returns:
         *r* | complex[M]
@@ -102,6 +122,100 @@ def reflectivity_amplitude(
     """
     from ..backends import backend
 
+    if precision not in ("double", "single"):
+        raise ValueError(f"precision should be 'double' or 'single', not {precision!r}")
+    kz, depth, rho, irho, sigma, rho_index = _slab_arrays(kz, depth, rho, irho, sigma, rho_index)
+    irho = abs(irho) + 1e-30
+    if precision == "single" and len(kz) and np.max(abs(kz)) * np.sum(depth[1:-1]) <= max_phase:
+        return _amplitude_single(depth, sigma, rho, irho, kz, rho_index, R_floor, out)
+    # irho[irho < 0] = 0.
+    # print depth.shape, rho.shape, irho.shape, sigma.shape
+    # print depth.dtype, rho.dtype, irho.dtype, sigma.dtype
+    r = np.empty(kz.shape, "D") if out is None else out
+    # print "amplitude", depth, rho, kz, rho_index
+    # print depth.shape, sigma.shape, rho.shape, irho.shape, kz.shape
+    backend.reflectivity_amplitude(depth, sigma, rho, irho, kz, rho_index, r)
+
+    return r
+
+
+def _amplitude_single(depth, sigma, rho, irho, kz, rho_index, R_floor, out=None):
+    """
+    Single precision reflectivity amplitude, with points below *R_floor*
+    recomputed in double precision.
+    """
+    from ..backends import backend
+
+    # Use the numba kernel if the backend does not provide a float32 kernel.
+    kernel = getattr(backend, "reflectivity_amplitude_f32", None)
+    if kernel is None:
+        from ..lib.numba import reflectivity_amplitude_f32 as kernel
+    r_single = np.empty(kz.shape, "F")
+    kernel(*[_dense(v, "f") for v in (depth, sigma, rho, irho, kz)], rho_index, r_single)
+    r = np.empty(kz.shape, "D") if out is None else out
+    r[:] = r_single
+    low = r.real**2 + r.imag**2 < R_floor
+    if low.any():
+        r_low = np.empty(np.count_nonzero(low), "D")
+        backend.reflectivity_amplitude(depth, sigma, rho, irho, kz[low], rho_index[low], r_low)
+        r[low] = r_low
+    return r
+
+
+def reflectivity_jacobian(
+    kz=None,
+    depth=None,
+    rho=None,
+    irho=0,
+    sigma=0,
+    rho_index=None,
+):
+    r"""
+    Calculate reflectivity amplitude $r(k_z)$ and its derivatives with
+    respect to the slab parameters.
+
+    The parameters are the same as for :func:`reflectivity_amplitude`.
+    The derivatives are computed analytically in the same pass over the
+    layers as the amplitude, so the cost is a small multiple of the cost
+    of the amplitude rather than one evaluation per slab parameter.
+
+    :Returns:
+        *r* | complex[M]
+            Complex reflectivity waveform.
+        *dr_ddepth* | complex[M, N]
+            Derivative with respect to layer thickness.  The incident and
+            substrate columns are zero.
+        *dr_dsigma* | complex[M, N-1]
+            Derivative with respect to interface roughness.
+        *dr_drho*, *dr_dirho* | complex[M, N]
+            Derivative with respect to the real and imaginary scattering
+            length density of the layer, evaluated for the *rho* column
+            selected by *rho_index* at each point.
+    """
+    from ..backends import backend
+
+    kz, depth, rho, irho, sigma, rho_index = _slab_arrays(kz, depth, rho, irho, sigma, rho_index)
+    irho_sign = np.where(irho < 0, -1.0, 1.0)
+    irho = abs(irho) + 1e-30
+    n, m = len(depth), len(kz)
+    r = np.empty(m, "D")
+    dr_ddepth, dr_drho, dr_dirho = [np.empty((m, n), "D") for _ in range(3)]
+    dr_dsigma = np.empty((m, max(n - 1, 0)), "D")
+    # Use the numba kernel if the backend does not provide a jacobian.
+    kernel = getattr(backend, "reflectivity_jacobian", None)
+    if kernel is None:
+        from ..lib.numba import reflectivity_jacobian as kernel
+    kernel(depth, sigma, rho, irho, kz, rho_index, r, dr_ddepth, dr_dsigma, dr_drho, dr_dirho)
+    # irho enters the calculation as |irho|
+    dr_dirho *= irho_sign[rho_index]
+
+    return r, dr_ddepth, dr_dsigma, dr_drho, dr_dirho
+
+
+def _slab_arrays(kz, depth, rho, irho, sigma, rho_index):
+    """
+    Convert slab model inputs to dense arrays of the expected shape.
+    """
     kz = _dense(kz, "d")
     if rho_index is None:
         rho_index = np.zeros(kz.shape, "i")
@@ -123,18 +237,7 @@ def reflectivity_amplitude(
         irho = _dense(irho, "d")
     if irho.ndim == 1:
         irho.resize((1, irho.shape[0]))
-
-    # print(irho.shape, irho[:,0], irho[:,-1])
-    irho = abs(irho) + 1e-30
-    # irho[irho < 0] = 0.
-    # print depth.shape, rho.shape, irho.shape, sigma.shape
-    # print depth.dtype, rho.dtype, irho.dtype, sigma.dtype
-    r = np.empty(kz.shape, "D")
-    # print "amplitude", depth, rho, kz, rho_index
-    # print depth.shape, sigma.shape, rho.shape, irho.shape, kz.shape
-    backend.reflectivity_amplitude(depth, sigma, rho, irho, kz, rho_index, r)
-
-    return r
+    return kz, depth, rho, irho, sigma, rho_index
 
 
 def magnetic_reflectivity(*args, **kw):
@@ -207,11 +310,15 @@ def magnetic_amplitude(
     Aguide=-90,
     H=0,
     rho_index=None,
+    out=None,
 ):
     """
     Returns the complex magnetic reflectivity waveform.
 
     See :class:`magnetic_reflectivity <refl1d.sample.reflectivity.magnetic_reflectivity>` for details.
+
+    *out* is an optional complex array of shape (4, M) to receive the
+    cross sections, allowing the caller to reuse it between evaluations.
     """
     from ..backends import backend
 
@@ -239,7 +346,9 @@ def magnetic_amplitude(
     EPS = -Aguide
     sld_b, u1, u3 = calculate_u1_u3(H, rhoM, thetaM, EPS)
 
-    R1, R2, R3, R4 = [np.empty(kz.shape, "D") for pol in (1, 2, 3, 4)]
+    if out is None:
+        out = np.empty((4,) + kz.shape, "D")
+    R4, R3, R2, R1 = out
     backend.magnetic_amplitude(depth, sigma, rho, irho, sld_b, u1, u3, kz, rho_index, R1, R2, R3, R4)
     # R1 is ++, R2 is +-, R3 is -+, R4 is --
     # we want to return them in the order --, -+, +-, ++ to match order of probe.xs
@@ -337,6 +446,38 @@ def convolve(xi, yi, x, dx, resolution="normal"):
     return y
 
 
+def convolve_amplitude(xi, ri, x, dx, resolution="normal", out=None):
+    r"""
+    Apply x-dependent resolution to the magnitude of a set of amplitudes.
+
+    Returns y[j, k], the convolution of $|r_i[j]|^2$ with resolution
+    width dx[k] at points x[k].  This is equivalent to calling
+    :func:`convolve` on abs(ri[j])**2 for each row j, but with the
+    resolution integrals at each point computed once and shared between
+    the rows.  Use this for the spin cross sections of a polarized
+    measurement, which share the same theory points.
+
+    *out*, if given, is a float array of shape (len(ri), len(x)) which
+    receives the result.
+    """
+    from ..backends import backend
+
+    # Use the numba kernel if the backend does not provide one.
+    if resolution == "uniform":
+        kernel = getattr(backend, "convolve_uniform_amplitude", None)
+        if kernel is None:
+            from ..lib.numba import convolve_uniform_amplitude as kernel
+    else:
+        kernel = getattr(backend, "convolve_gaussian_amplitude", None)
+        if kernel is None:
+            from ..lib.numba import convolve_gaussian_amplitude as kernel
+    xi, x, dx = _dense(xi), _dense(x), _dense(dx)
+    ri = _dense(ri, "D")
+    y = np.empty((len(ri), len(x))) if out is None else out
+    kernel(xi, ri, x, dx, y)
+    return y
+
+
 def convolve_sampled(xi, yi, xp, yp, x, dx):
     """
     Apply x-dependent arbitrary resolution function to the theory.
@@ -26,6 +26,7 @@ import numpy as np
 from bumps.errplot import reload_errors
 from bumps.plotutil import dhsv, form_quantiles, next_color, plot_quantiles
 
+from .experiment import prepare_points
 from .sample.reflectivity import BASE_GUIDE_ANGLE
 from .utils import asbytes
 
@@ -158,6 +159,9 @@ def calc_errors(problem, points):
     # Find Q
     Q = [_residQ(m) for m in _experiments(problem)]
 
+    # Solve any expensive layer profiles for the whole set of points at once
+    prepare_points(problem, points)
+
     # Put best at slot 0, no alignment
     data = [_eval_point(problem, problem.getp())]
     for p in points:
@@ -0,0 +1,80 @@
+"""
+Least recently used cache for functions of arrays.
+
+Helpers such as the instrument resolution and the bin edge calculations are
+called repeatedly with the same arrays, so remembering a handful of recent
+results avoids recomputing them.  Unlike :func:`functools.lru_cache`, array
+arguments are compared by value, and array results are copied on the way
+out so that callers are free to modify them.
+
+Example::
+
+    >>> import numpy as np
+    >>> @memoised(maxsize=4)
+    ... def double(x):
+    ...     return 2 * x
+    >>> a = double(np.arange(3))
+    >>> a += 1
+    >>> double(np.arange(3))
+    array([0, 2, 4])
+"""
+
+__all__ = ["memoised"]
+
+from collections import OrderedDict
+from functools import wraps
+
+import numpy as np
+
+
+def memoised(maxsize):
+    """
+    Decorator remembering the results for the *maxsize* most recent sets
+    of arguments.
+
+    Array arguments are compared by value.  Arguments which cannot be used
+    as a key bypass the cache.  Callers receive their own copy of any array
+    in the result, so they can modify it or pass it to the compiled kernels,
+    which reject read-only arrays.  The decorated function has a
+    *cache_clear* method to empty the cache.
+    """
+
+    def decorator(fn):
+        cache = OrderedDict()
+
+        @wraps(fn)
+        def wrapper(*args, **kw):
+            try:
+                key = _cache_key(args), _cache_key(sorted(kw.items()))
+                hash(key)
+            except TypeError:
+                return fn(*args, **kw)
+            result = cache.get(key, None)
+            if result is None:
+                result = cache[key] = fn(*args, **kw)
+                if len(cache) > maxsize:
+                    cache.popitem(last=False)
+            else:
+                cache.move_to_end(key)
+            return _copy_result(result)
+
+        wrapper.cache_clear = cache.clear
+        return wrapper
+
+    return decorator
+
+
+def _copy_result(v):
+    if isinstance(v, np.ndarray):
+        return v.copy()
+    elif isinstance(v, tuple):
+        return tuple(_copy_result(item) for item in v)
+    return v
+
+
+def _cache_key(v):
+    if isinstance(v, np.ndarray):
+        return v.dtype.str, v.shape, v.tobytes()
+    elif isinstance(v, (tuple, list)):
+        return tuple(_cache_key(item) for item in v)
+    return v
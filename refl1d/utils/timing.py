@@ -0,0 +1,150 @@
+"""
+Stage timers for the theory calculation.
+
+The reflectivity calculation is split into stages (rendering the sample,
+finalizing the microslabs, running the kernel, applying resolution, ...).
+A :class:`StageTimer` accumulates the wall time and number of calls for
+each stage so that slow fits can be diagnosed without hand instrumenting
+the code.  Timing is opt-in; models hold :data:`NULL_TIMER` by default,
+which costs a single method call per stage.
+
+Example::
+
+    >>> timer = StageTimer()
+    >>> with timer("kernel"):
+    ...     pass
+    >>> print(timer.summary()["kernel"]["calls"])
+    1
+"""
+
+__all__ = ["StageTimer", "NullTimer", "NULL_TIMER"]
+
+from time import perf_counter
+
+
+class _Stage:
+    __slots__ = ["_stats", "_start"]
+
+    def __init__(self, stats):
+        self._stats = stats
+
+    def __enter__(self):
+        self._start = perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        stats = self._stats
+        stats[0] += 1
+        stats[1] += perf_counter() - self._start
+        return False
+
+
+class _NullStage:
+    __slots__ = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_NULL_STAGE = _NullStage()
+
+
+class StageTimer:
+    """
+    Accumulate wall time and call counts for named stages.
+
+    Use the timer as a context manager factory::
+
+        with timer("render"):
+            sample.render(probe, slabs)
+
+    Nested stages are timed independently, so the time for an outer
+    stage includes the time for any stages within it.
+    """
+
+    enabled = True
+
+    def __init__(self):
+        self._stats = {}
+
+    def __call__(self, stage):
+        stats = self._stats.get(stage, None)
+        if stats is None:
+            stats = self._stats[stage] = [0, 0.0]
+        return _Stage(stats)
+
+    def add(self, stage, seconds, calls=1):
+        """
+        Record time for *stage* measured elsewhere, such as in a worker process.
+        """
+        stats = self._stats.get(stage, None)
+        if stats is None:
+            stats = self._stats[stage] = [0, 0.0]
+        stats[0] += calls
+        stats[1] += seconds
+
+    def reset(self):
+        """
+        Clear the accumulated timings.
+        """
+        self._stats = {}
+
+    def summary(self):
+        """
+        Return {stage: {"calls": n, "total": seconds, "mean": seconds}}
+        for each stage seen so far, in the order first seen.
+        """
+        return {
+            stage: {"calls": calls, "total": total, "mean": total / calls if calls else 0.0}
+            for stage, (calls, total) in self._stats.items()
+        }
+
+    def format(self):
+        """
+        Return the timing summary as a printable table.
+        """
+        lines = ["%-12s %10s %12s %12s" % ("stage", "calls", "total (s)", "mean (ms)")]
+        for stage, s in self.summary().items():
+            lines.append("%-12s %10d %12.4f %12.4f" % (stage, s["calls"], s["total"], 1000 * s["mean"]))
+        return "\n".join(lines)
+
+    def to_csv(self):
+        """
+        Return the timing summary as csv text, suitable for a webview table.
+        """
+        lines = ["stage,calls,total (s),mean (ms)"]
+        for stage, s in self.summary().items():
+            lines.append("%s,%d,%.6g,%.6g" % (stage, s["calls"], s["total"], 1000 * s["mean"]))
+        return "\n".join(lines)
+
+
+class NullTimer:
+    """
+    Timer which records nothing.  Used when timing is disabled.
+    """
+
+    enabled = False
+
+    def __call__(self, stage):
+        return _NULL_STAGE
+
+    def add(self, stage, seconds, calls=1):
+        pass
+
+    def reset(self):
+        pass
+
+    def summary(self):
+        return {}
+
+    def format(self):
+        return ""
+
+    def to_csv(self):
+        return ""
+
+
+NULL_TIMER = NullTimer()
@@ -0,0 +1,66 @@
+"""
+Reusable scratch buffers for the theory calculation.
+
+A fit evaluates the same model millions of times with the same array
+sizes, so rather than allocating fresh temporaries on every evaluation the
+experiment keeps a :class:`Workspace` of named buffers.  Each buffer grows
+geometrically when a larger size is requested and hands out views, so the
+allocator is only touched while the buffers are warming up.
+
+Views returned by :meth:`Workspace.get` are overwritten the next time the
+same name is requested.  Copy the result if it needs to outlive the
+current evaluation.
+
+Example::
+
+    >>> ws = Workspace()
+    >>> a = ws.get("r", (3,), "D")
+    >>> b = ws.get("r", (2,), "D")
+    >>> b.base is a.base
+    True
+"""
+
+__all__ = ["Workspace"]
+
+import numpy as np
+
+
+class Workspace:
+    """
+    Named scratch buffers which are reused across evaluations.
+    """
+
+    #: Smallest buffer to allocate, in elements.
+    min_size = 64
+
+    def __init__(self):
+        self._buffers = {}
+
+    def get(self, name, shape, dtype="d"):
+        """
+        Return an uninitialized array of the given *shape* and *dtype*.
+
+        The array is a view into the buffer *name*, which is grown to at
+        least twice its previous size if it is too small.
+        """
+        dtype = np.dtype(dtype)
+        shape = (shape,) if np.isscalar(shape) else tuple(shape)
+        size = int(np.prod(shape))
+        buffer = self._buffers.get(name, None)
+        if buffer is None or buffer.dtype != dtype or buffer.size < size:
+            capacity = max(size, self.min_size, 2 * buffer.size if buffer is not None else 0)
+            buffer = self._buffers[name] = np.empty(capacity, dtype)
+        return buffer[:size].reshape(shape)
+
+    def clear(self):
+        """
+        Release all buffers.
+        """
+        self._buffers = {}
+
+    @property
+    def nbytes(self):
+        """
+        Total memory held by the workspace.
+        """
+        return sum(buffer.nbytes for buffer in self._buffers.values())
@@ -1,6 +1,8 @@
 import asyncio
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
 from copy import deepcopy
-from functools import lru_cache
+from functools import lru_cache, partial
 from pathlib import Path
 from typing import Dict, List, Optional, Union
 
@@ -9,7 +11,6 @@ import numpy as np
 from bumps.errplot import error_points_from_state
 from bumps.webview.server.api import (
     add_notification,
-    get_chisq,
     log,
     logger,
     now_string,
@@ -37,6 +38,89 @@ from .profile_plot import plot_multiple_sld_profiles, ModelSpec
 
 # state.problem.serializer = "dataclass"
 
+# Model evaluation and figure construction run on a single worker thread,
+# keeping the event loop free to service the websocket.  The worker has its
+# own copy of the fit problem, so it never touches the models that the bumps
+# endpoints update and evaluate on the event loop.  Each request sends the
+# current parameter values with it.
+_evaluation_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="refl1d-evaluate")
+_latest_evaluation: Dict[str, "_Evaluation"] = {}
+# [fitProblem, updated_model, bounds, private copy]
+_evaluation_problem = None
+
+
+class _Evaluation:
+    """
+    A request queued on the evaluation worker, and the request replacing it.
+    """
+
+    __slots__ = ("future", "successor")
+
+    def __init__(self, future):
+        self.future = future
+        self.successor = None
+
+
+async def _evaluate(kind: str, fn, fitProblem, *args):
+    """
+    Run *fn* on the evaluation worker and return its result.  *fn* is
+    called with the worker's copy of *fitProblem*, set to the current
+    parameter values, followed by *args*.
+
+    A new request with the same *kind*, which should encode any arguments
+    that change the result, supersedes the previous one: if the
+    earlier request is still queued it is cancelled, and its caller
+    receives the result of the newer request instead.  A request that has
+    already started runs to completion, but its result is discarded.
+    """
+    problem, values = _evaluation_copy(fitProblem), fitProblem.getp()
+    loop = asyncio.get_running_loop()
+    future = loop.run_in_executor(_evaluation_pool, partial(_run_evaluation, fn, problem, values, args))
+    request = _Evaluation(future)
+    previous = _latest_evaluation.get(kind)
+    if previous is not None:
+        previous.successor = request
+        previous.future.cancel()
+    _latest_evaluation[kind] = request
+    future.add_done_callback(partial(_forget_evaluation, kind, request))
+    while True:
+        try:
+            return await asyncio.shield(request.future)
+        except asyncio.CancelledError:
+            if not request.future.cancelled():
+                # The caller was cancelled rather than superseded
+                raise
+        request = request.successor
+
+
+def _forget_evaluation(kind, request, future):
+    # Drop the finished request so its result is freed once the callers
+    # have it.
+    if _latest_evaluation.get(kind) is request:
+        del _latest_evaluation[kind]
+
+
+def _run_evaluation(fn, problem, values, args):
+    problem.setp(values)
+    return fn(problem, *args)
+
+
+def _evaluation_copy(fitProblem):
+    """
+    Return the evaluation worker's copy of *fitProblem*.
+
+    The copy is made on the event loop, where the bumps endpoints change the
+    model, and is replaced when the model structure or the parameter
+    ranges change.
+    """
+    global _evaluation_problem
+    updated = getattr(state.shared, "updated_model", None)
+    bounds = fitProblem.bounds()
+    cache = _evaluation_problem
+    if cache is None or cache[0] is not fitProblem or cache[1] != updated or not np.array_equal(cache[2], bounds):
+        cache = _evaluation_problem = [fitProblem, updated, bounds, deepcopy(fitProblem)]
+    return cache[3]
+
 
 @register
 async def get_plot_data(view: str = "linear"):
@@ -44,8 +128,15 @@ async def get_plot_data(view: str = "linear"):
     # (calculate x,y,dy.dx for given view, excluding log)
     if state.problem is None or state.problem.fitProblem is None:
         return None
-    fitProblem = state.problem.fitProblem
-    chisq = await get_chisq(fitProblem)
+    return await _evaluate(f"plot_data:{view}", _get_plot_data, state.problem.fitProblem)
+
+
+def _get_plot_data(fitProblem):
+    return to_json_compatible_dict(_plot_data(fitProblem))
+
+
+def _plot_data(fitProblem):
+    chisq = fitProblem.chisq_str()
     plotdata = []
     result = {"chisq": chisq, "plotdata": plotdata}
     for model in fitProblem.models:
@@ -54,14 +145,62 @@ async def get_plot_data(view: str = "linear"):
         probe = model.probe
         probe_data = get_probe_data(theory, probe, model._substrate, model._surface)
         plotdata.append(probe_data)
+    return result
+
 
+# Plot fields which change with the fit parameters.  The remaining fields,
+# such as Q, dQ, R, dR and labels for the data, or the layout and line styles
+# for the profiles, are only sent when the client's copy is out of date.
+# The Fresnel curve only changes with the beam parameters, and so it has its
+# own version, as does the data of each profile trace.
+PLOT_DATA_UPDATES = ("theory", "fresnel", "intensity", "background")
+PROFILE_PLOT_UPDATES = ("x", "y")
+PROFILE_LAYOUT_UPDATES = ("shapes", "annotations")
+
+
+@register
+async def get_plot_data_update(
+    view: str = "linear", version: Optional[str] = None, fresnel_version: Optional[str] = None
+):
+    """
+    Return the reflectivity plot data, leaving out what the client already has.
+
+    *version* and *fresnel_version* are the values returned by the previous
+    call, or None for the first call.  If the static plot data is unchanged
+    since then, the result has *full* set to False and each probe entry
+    holds only the fields in :data:`PLOT_DATA_UPDATES`, with *fresnel*
+    left out as well if the Fresnel curves are unchanged.  Otherwise *full*
+    is True, and the complete data is returned with new versions for the
+    client to resynchronize.
+    """
+    if state.problem is None or state.problem.fitProblem is None:
+        return None
+    kind = f"plot_data_update:{view}:{version}:{fresnel_version}"
+    return await _evaluate(kind, _get_plot_data_update, state.problem.fitProblem, version, fresnel_version)
+
+
+def _get_plot_data_update(fitProblem, version, fresnel_version):
+    result = _plot_data(fitProblem)
+    plotdata = result["plotdata"]
+    result["version"] = _version([[_without(xs, PLOT_DATA_UPDATES) for xs in model] for model in plotdata])
+    result["fresnel_version"] = _version([[xs.get("fresnel") for xs in model] for model in plotdata])
+    result["full"] = result["version"] != version
+    if not result["full"]:
+        fields = PLOT_DATA_UPDATES
+        if result["fresnel_version"] == fresnel_version:
+            fields = tuple(k for k in fields if k != "fresnel")
+        result["plotdata"] = [[_only(xs, fields) for xs in model] for model in plotdata]
     return to_json_compatible_dict(result)
 
 
 async def create_profile_plots(model_specs: List[ModelSpec]):
     if state.problem is None or state.problem.fitProblem is None:
         return None
-    fitProblem = state.problem.fitProblem
+    kind = f"profile_figure:{model_specs}"
+    return await _evaluate(kind, _create_profile_plots, state.problem.fitProblem, model_specs)
+
+
+def _create_profile_plots(fitProblem, model_specs: List[ModelSpec]):
     plot_items = []
     color_index = 0
     for model_index, model in enumerate(fitProblem.models):
@@ -78,17 +217,103 @@ async def create_profile_plots(model_specs: List[ModelSpec]):
 
 @register
 async def get_profile_plots(model_specs: List[ModelSpec]):
-    fig = await create_profile_plots(model_specs)
+    if state.problem is None or state.problem.fitProblem is None:
+        return None
+    kind = f"profile_plots:{model_specs}"
+    return await _evaluate(kind, _get_profile_plots, state.problem.fitProblem, model_specs)
+
+
+def _get_profile_plots(fitProblem, model_specs: List[ModelSpec]):
+    fig = _create_profile_plots(fitProblem, model_specs)
     output = to_json_compatible_dict(fig.to_dict())
     del fig
     return output
 
 
+@register
+async def get_profile_plots_update(
+    model_specs: List[ModelSpec], version: Optional[str] = None, trace_versions: Optional[List[str]] = None
+):
+    """
+    Return the profile plots, leaving out what the client already has.
+
+    This follows the protocol of :func:`get_plot_data_update`, with
+    *trace_versions* holding a version for the data of each trace.  When
+    *full* is False, the layout holds only the interface markers listed in
+    :data:`PROFILE_LAYOUT_UPDATES`, and each trace holds the fields in
+    :data:`PROFILE_PLOT_UPDATES` if its data has changed, or nothing if the
+    client's copy is current.
+    """
+    if state.problem is None or state.problem.fitProblem is None:
+        return None
+    kind = f"profile_plots_update:{model_specs}:{version}:{trace_versions}"
+    args = model_specs, version, trace_versions
+    return await _evaluate(kind, _get_profile_plots_update, state.problem.fitProblem, *args)
+
+
+def _get_profile_plots_update(fitProblem, model_specs: List[ModelSpec], version, trace_versions):
+    fig = _create_profile_plots(fitProblem, model_specs).to_dict()
+    data, layout = fig["data"], fig["layout"]
+    result = {
+        "version": _version(
+            [_without(layout, PROFILE_LAYOUT_UPDATES), [_without(trace, PROFILE_PLOT_UPDATES) for trace in data]]
+        ),
+        "trace_versions": [_version(_only(trace, PROFILE_PLOT_UPDATES)) for trace in data],
+    }
+    result["full"] = result["version"] != version
+    if result["full"]:
+        result.update(data=data, layout=layout)
+    else:
+        result["layout"] = _only(layout, PROFILE_LAYOUT_UPDATES)
+        known = trace_versions if trace_versions is not None else []
+        known = list(known) + [None] * (len(data) - len(known))
+        result["data"] = [
+            {} if current == previous else _only(trace, PROFILE_PLOT_UPDATES)
+            for trace, current, previous in zip(data, result["trace_versions"], known)
+        ]
+    return to_json_compatible_dict(result)
+
+
+def _only(item: dict, fields):
+    return {k: item[k] for k in fields if k in item}
+
+
+def _without(item: dict, fields):
+    return {k: v for k, v in item.items() if k not in fields}
+
+
+def _version(static) -> str:
+    """
+    Return a short digest identifying the static part of a plot.
+    """
+    digest = hashlib.blake2b(digest_size=8)
+
+    def walk(obj):
+        if isinstance(obj, dict):
+            digest.update(b"{")
+            for k in sorted(obj):
+                digest.update(str(k).encode())
+                walk(obj[k])
+            digest.update(b"}")
+        elif isinstance(obj, (list, tuple)):
+            digest.update(b"[")
+            for v in obj:
+                walk(v)
+            digest.update(b"]")
+        elif isinstance(obj, np.ndarray) and obj.dtype.kind != "O":
+            digest.update(f"{obj.dtype.str}{obj.shape}".encode())
+            digest.update(np.ascontiguousarray(obj).tobytes())
+        elif isinstance(obj, np.ndarray):
+            walk(obj.tolist())
+        else:
+            digest.update(repr(obj).encode())
+
+    walk(static)
+    return digest.hexdigest()
+
+
 def get_single_probe_data(theory, probe, substrate=None, surface=None, polarization=""):
-    fresnel_calculator = probe.fresnel(substrate, surface)
-    direction_multiplier = -1.0 if probe.back_reflectivity else 1.0
-    calc_Q = probe.calc_Q
-    Q, FQ = probe.apply_beam(calc_Q, fresnel_calculator(calc_Q * direction_multiplier))
+    _, FQ = probe.fresnel_curve(substrate, surface, flip=probe.back_reflectivity)
     Q, R = theory
     output: Dict[str, Union[str, np.ndarray]]
     assert isinstance(FQ, np.ndarray)
@@ -0,0 +1,67 @@
+import numpy as np
+
+from refl1d.experiment import Experiment
+from refl1d.names import SLD
+from refl1d.probe import NeutronProbe, PolarizedNeutronProbe, ProbeSet, QProbe
+from refl1d.probe.data_loaders.binary import BINARY_EXTENSION, load_probe, read_binary
+from refl1d.probe.data_loaders.load4 import load4
+
+
+def neutron_probe(R=0.5):
+    T = np.linspace(0.2, 2.0, 20)
+    probe = NeutronProbe(T=T, dT=0.01, L=4.75, dL=0.04, data=(R * np.exp(-T), 0.01 * np.ones_like(T)), name="n")
+    probe.intensity.value = 0.9
+    return probe
+
+
+def check_probe(copy, probe):
+    assert type(copy) is type(probe)
+    for attr in ("Q", "dQ", "R", "dR", "calc_Q"):
+        assert np.array_equal(getattr(copy, attr), getattr(probe, attr))
+    assert copy.intensity.value == probe.intensity.value
+
+
+def test_roundtrip(tmp_path):
+    path = str(tmp_path / ("probe" + BINARY_EXTENSION))
+
+    probe = neutron_probe()
+    probe.oversample(n=5, seed=1)
+    probe.write_data(path)
+    copy = load4(path)
+    check_probe(copy, probe)
+    assert isinstance(copy.R, np.memmap)
+    assert np.array_equal(
+        copy.apply_beam(copy.calc_Q, np.ones_like(copy.calc_Q)),
+        probe.apply_beam(probe.calc_Q, np.ones_like(probe.calc_Q)),
+    )
+
+    Q = np.linspace(0.01, 0.2, 15)
+    probe = QProbe(Q, 0.001 * Q, R=np.exp(-Q), dR=0.01 * Q)
+    probe.save(path, theory=(Q, np.exp(-Q)))
+    check_probe(load_probe(path, mmap=False), probe)
+
+    probe = ProbeSet([neutron_probe(0.5), neutron_probe(0.7)])
+    probe.save(path, theory=(np.hstack([p.Q for p in probe.probes]), np.hstack([p.R for p in probe.probes])))
+    copy = load_probe(path)
+    for p, q in zip(copy.probes, probe.probes):
+        check_probe(p, q)
+
+    probe = PolarizedNeutronProbe([neutron_probe(0.5), None, None, neutron_probe(0.7)], H=0.3)
+    Experiment(probe=probe, sample=SLD(rho=2.07)(0, 5) | SLD(rho=0)(0, 0)).write_data(path)
+    copy = load_probe(path)
+    assert copy.xs[1] is None and copy.xs[2] is None
+    check_probe(copy.xs[0], probe.xs[0])
+    check_probe(copy.xs[3], probe.xs[3])
+    assert copy.H.value == 0.3
+
+
+def test_experiment_save(tmp_path):
+    M = Experiment(probe=neutron_probe(), sample=SLD(rho=2.07)(0, 5) | SLD(rho=0)(0, 0))
+    M.binary_output = True
+    basename = str(tmp_path / "model")
+    M.save_refl(basename)
+    copy = load_probe(basename + "-refl" + BINARY_EXTENSION)
+    check_probe(copy, M.probe)
+    header, sections = read_binary(basename + "-refl" + BINARY_EXTENSION)
+    Q, R = M.reflectivity()
+    assert np.array_equal(sections[0][1]["theory"], R)
@@ -0,0 +1,44 @@
+import numpy as np
+
+from refl1d.probe import PolarizedNeutronProbe
+from refl1d.probe.data_loaders.bulk import load_many, load_probeset
+from refl1d.probe.data_loaders.load4 import load4
+from refl1d.utils.timing import StageTimer
+
+
+def write_files(path, n):
+    files = []
+    for k in range(n):
+        Q = np.linspace(0.005, 0.2, 50 + k)
+        filename = str(path / ("run%02d.refl" % k))
+        np.savetxt(filename, np.c_[Q, np.exp(-30 * Q), 0.01 * np.exp(-30 * Q), 0.001 + 0 * Q])
+        files.append(filename)
+    return files
+
+
+def test_load_many(tmp_path):
+    files = write_files(tmp_path, 8)
+    serial = [load4(f, L=4.75, dL=0.01) for f in files]
+
+    timer = StageTimer()
+    for probes in (
+        load_many(str(tmp_path / "run*.refl"), L=4.75, dL=0.01, workers=4, timer=timer),
+        load_many(files, L=4.75, dL=0.01, processes=True, workers=2),
+    ):
+        assert len(probes) == len(serial)
+        for p, q in zip(probes, serial):
+            assert np.array_equal(p.Q, q.Q) and np.array_equal(p.R, q.R)
+    assert list(timer.summary().keys()) == files
+
+    timer = StageTimer()
+    xs = [(files[0], None, None, files[1]), (files[2], files[3], files[4], files[5])]
+    probes = load_many(xs, L=4.75, dL=0.01, H=0.5, timer=timer)
+    assert all(isinstance(p, PolarizedNeutronProbe) for p in probes)
+    assert probes[0].mp is None and probes[1].mp is not None
+    assert probes[0].pp.intensity is probes[0].mm.intensity
+    assert probes[1].H.value == 0.5
+    assert len(probes[1].Q) == len(np.unique(np.hstack([p.Q for p in probes[1].xs])))
+    assert timer.summary()["polarized"]["calls"] == 2
+
+    probeset = load_probeset(files[:3], L=4.75, dL=0.01)
+    assert len(probeset.probes) == 3
@@ -3,11 +3,12 @@ from collections import namedtuple
 
 # third-party imports
 import numpy as np
-from orsopy.fileio.orso import load_orso, save_nexus
+from orsopy.fileio.orso import OrsoDataset, load_orso, save_nexus, save_orso
 import pytest
 
 # refl1d imports
-from refl1d.probe.data_loaders.load4 import parse_orso
+from refl1d.probe.data_loaders.load4 import load4, parse_orso
+from refl1d.probe.data_loaders.orsodata import index_orso
 
 
 OrsoFiles = namedtuple("OrsoFiles", ["ort", "orb"])
@@ -129,3 +130,32 @@ def test_parse_orso(orsofiles):
     header_other, data_other = orbset[0]
     assert header == header_other
     assert np.allclose(data, data_other)
+
+
+def test_orso_data_sets(orsofiles, tmp_path):
+    # Build a bundle of datasets at two angles and two polarization states
+    base = load_orso(orsofiles.ort)[0]
+    datasets = []
+    for k, (angle, pol) in enumerate([(0.1, "pp"), (0.1, "mm"), (0.2, "pp"), (0.2, "mm")]):
+        info = base.info.__class__.from_dict(base.info.to_dict())
+        info.data_set = k
+        info.data_source.measurement.instrument_settings.incident_angle.magnitude = angle
+        info.data_source.measurement.instrument_settings.polarization = pol
+        datasets.append(OrsoDataset(info, base.data * (k + 1)))
+    ort, orb = str(tmp_path / "bundle.ort"), str(tmp_path / "bundle.orb")
+    save_orso(datasets, ort)
+    save_nexus(datasets, orb)
+
+    for filename in (ort, orb):
+        entries = index_orso(filename)
+        assert [e.polarization for e in entries] == ["++", "--", "++", "--"]
+        assert [e.angle for e in entries] == [0.1, 0.1, 0.2, 0.2]
+        assert all(e.size == 17 for e in entries)
+
+        selected = parse_orso(filename, data_sets=lambda e: e.angle == 0.2)
+        assert len(selected) == 2
+        assert np.allclose(selected[1][1], base.data.T * 4)
+        assert np.allclose(parse_orso(filename, data_sets=[1])[0][1], base.data.T * 2)
+
+        probe = load4(filename, data_sets=[2, 3])
+        assert probe.pp is not None and probe.mm is not None and probe.pm is None
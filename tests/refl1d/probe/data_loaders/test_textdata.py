@@ -0,0 +1,40 @@
+import numpy as np
+from bumps import data
+
+from refl1d.probe.data_loaders.textdata import parse_file, parse_multi
+
+SAMPLE = """\
+# "title": "sample"
+
+# "polarization": "++"
+# "columns": ["Q", "R", "dR", "dQ"]
+0.01 0.9 0.01 0.001
+#0.02 0.8 0.01 0.001
+0.03 0.7 0.01 0.001  # trailing comment
+0.04 inf nan 0.001
+0.045
+
+# "polarization": "--"
+0.01 0.5 0.01 0.001
+0.02 0.4 0.01 0.001
+"""
+
+
+def check(actual, expected):
+    assert len(actual) == len(expected)
+    for (header, values), (ref_header, ref_values) in zip(actual, expected):
+        assert header.keys() == ref_header.keys()
+        for key, value in header.items():
+            assert np.array_equal(value, ref_header[key])
+        assert np.array_equal(values, ref_values, equal_nan=True)
+
+
+def test_parse_multi(tmp_path):
+    path = tmp_path / "sample.refl"
+    path.write_text(SAMPLE)
+    parts = parse_multi(str(path), keysep=":")
+    check(parts, data.parse_multi(str(path), keysep=":"))
+    assert len(parts) == 2 and parts[0][1].shape == (4, 3) and "bins" in parts[0][0]
+
+    path.write_text(SAMPLE.split('\n\n# "polarization": "--"')[0])
+    check([parse_file(str(path), keysep=":")], [data.parse_file(str(path), keysep=":")])
@@ -0,0 +1,74 @@
+import numpy as np
+
+from refl1d.probe import NeutronProbe, PolarizedNeutronProbe
+from refl1d.probe.probe import Qmeasurement_union
+from refl1d.probe.resolution import TL2Q
+
+
+def test_calc_Q_theta_offset():
+    # Time-of-flight measurement at three angles, so the Q order of the
+    # calculation points changes with theta_offset
+    T = np.repeat([0.5, 1.2, 3.0], 200)
+    L = np.tile(np.linspace(2, 12, 200), 3)
+    probe = NeutronProbe(T=T, dT=0.01, L=L, dL=0.04)
+    probe.oversample(n=5, seed=2)
+    for offset in (0.01, -0.03, 0.2, 0.2, -0.5, 0.0, 0.05):
+        probe.theta_offset.value = offset
+        target = np.unique(TL2Q(T=probe.calc_T + offset, L=probe.calc_L))
+        assert np.array_equal(probe.calc_Q, target)
+    # Cached for repeated calls at the same offset
+    assert probe.calc_Q is probe.calc_Q
+
+
+def test_Qmeasurement_union():
+    T = np.linspace(0.2, 4.0, 300)
+    xs = [
+        NeutronProbe(T=T, dT=0.01, L=4.75, dL=0.04),
+        None,
+        NeutronProbe(T=T[::3], dT=0.02, L=4.75, dL=0.04),
+        NeutronProbe(T=T[::2], dT=0.01, L=4.75, dL=0.04),
+    ]
+    Qset = set()
+    for x in xs:
+        if x is not None:
+            Qset |= set(zip(x.Q, x.dQ))
+    Q, dQ, index = Qmeasurement_union(xs, return_index=True)
+    assert np.array_equal(np.c_[Q, dQ], np.array(sorted(Qset)))
+    assert index[1] is None
+    for x, k in zip(xs, index):
+        if x is not None:
+            assert np.array_equal(Q[k], x.Q) and np.array_equal(dQ[k], x.dQ)
+
+    # Measurement points are picked directly from the calculation points
+    probe = PolarizedNeutronProbe(xs)
+    R = [np.exp(-100 * probe.calc_Q)] * 4
+    for x, r, xs_R in zip(xs, R, probe.apply_beam(probe.calc_Q, R, resolution=False)):
+        if x is not None:
+            assert np.array_equal(xs_R[1], x.apply_beam(probe.calc_Q, r, resolution=False)[1])
+
+
+def test_fresnel_curve():
+    from refl1d.names import SLD
+
+    Si, D2O = SLD("Si", rho=2.07), SLD("D2O", rho=6.3, irho=0.01)
+    for back in (False, True):
+        D2O.rho.value = 6.3
+        probe = NeutronProbe(T=np.linspace(0.1, 4.0, 200), dT=0.02, L=4.75, dL=0.04, back_reflectivity=back)
+        probe.sample_broadening.value = 0.01
+        for flip in (False, True):
+            Q, F = probe.fresnel_curve(Si, D2O, flip=flip)
+            calc_Q = probe.calc_Q
+            target = probe.apply_beam(calc_Q, probe.fresnel(Si, D2O)(-calc_Q if flip else calc_Q))
+            assert np.array_equal(Q, target[0]) and np.array_equal(F, target[1])
+            # Cached until the beam or materials change
+            assert probe.fresnel_curve(Si, D2O, flip=flip)[1] is F
+        probe.intensity.value = 0.9
+        assert np.allclose(probe.fresnel_curve(Si, D2O, flip=flip)[1], 0.9 * F)
+        D2O.rho.value = 6.0
+        assert not np.allclose(probe.fresnel_curve(Si, D2O, flip=flip)[1], 0.9 * F)
+
+    # The data and the interpolated theory curves are cached separately.
+    data, theory = probe.fresnel_curve(Si, D2O), probe.fresnel_curve(Si, D2O, interpolation=10)
+    assert len(theory[0]) > len(data[0])
+    assert probe.fresnel_curve(Si, D2O)[1] is data[1]
+    assert probe.fresnel_curve(Si, D2O, interpolation=10)[1] is theory[1]
@@ -0,0 +1,51 @@
+import numpy as np
+
+from refl1d.experiment import Experiment
+from refl1d.names import SLD
+from refl1d.probe.data_loaders.snsdata import Liquids
+from refl1d.probe.simulation import MeasurementDesign, _spectrum
+
+
+def test_simulate_batch():
+    instrument = Liquids()
+    samples = [SLD(rho=2.07)(0, 5) | SLD(rho=4)(L, 5) | SLD(rho=0)(0, 0) for L in (80, 160)]
+    configurations = [dict(T=T, slits=T, theta_offset=0.01) for T in (0.3, 1.2)]
+    sim = instrument.simulate_batch(samples, configurations, times=[1e3, 1e5], realizations=3, seed=1)
+    assert sim.R.shape == sim.dR.shape == (2, 2, 3, len(sim.Q))
+    np.testing.assert_allclose(sim.incident[1], 100 * sim.incident[0])
+    for k, sample in enumerate(samples):
+        for theory, kw in zip(sim.split(sim.theory[k]), configurations):
+            _, R = Experiment(probe=instrument.probe(**kw), sample=sample).reflectivity()
+            np.testing.assert_allclose(theory, R, rtol=1e-12)
+    probe = sim.probe(sample=1, configuration=1, scheme=1, realization=2)
+    assert np.array_equal(probe.R, sim.split(sim.R)[1][1, 1, 2])
+
+
+def test_measurement_design():
+    instrument = Liquids()
+    sample = SLD(rho=2.07)(0, 5) | SLD(rho=4)(120, 5) | SLD(rho=0)(0, 0)
+    sample[1].thickness.range(50, 200)
+    sample[1].material.rho.range(0, 8)
+    configurations = [dict(T=T, slits=T) for T in (0.3, 0.8, 2.0)]
+    design = MeasurementDesign(instrument, sample, configurations, flux=1e3)
+    assert design.information.shape == (3, 2, 2)
+    widths = {id(sample[1].thickness): 150, id(sample[1].material.rho): 8}
+    np.testing.assert_allclose(design.fisher([0, 0, 0]), np.diag([12 / widths[id(p)] ** 2 for p in design.pars]))
+
+    # Information from a single configuration matches finite differences
+    M = Experiment(probe=instrument.probe(**configurations[1]), sample=sample)
+    R = M.reflectivity()[1]
+    J = []
+    for p in design.pars:
+        value = p.value
+        p.value = value * (1 + 1e-6)
+        M.update()
+        J.append((M.reflectivity()[1] - R) / (value * 1e-6))
+        p.value = value
+    J = np.array(J).T
+    weight = 1e3 * _spectrum(instrument, M.probe, {}) / ((R + 1) * R)
+    np.testing.assert_allclose(design.information[1], J.T @ (weight[:, None] * J), rtol=1e-4)
+
+    gain = design.extend([1, 0, 0], [1, 10])
+    assert gain.shape == (3, 2) and (gain[:, 1] > gain[:, 0]).all()
+    assert gain[0, 0] == design.score([1, 0, 0], [1, 0, 0])
@@ -0,0 +1,64 @@
+import warnings
+
+import numpy as np
+import pytest
+from scipy.special import erf
+
+from refl1d.sample import flayer
+from refl1d.sample.flayer import FunctionalMagnetism, FunctionalProfile
+
+
+def tanh_profile(z, rho1=1.0, rho2=4.0, width=10.0, center=[20.0, 60.0]):
+    if width <= 0:
+        raise ValueError("width must be positive")
+    return rho1 + (rho2 - rho1) * 0.5 * (np.tanh((z - center[0]) / width) - np.tanh((z - center[1]) / width))
+
+
+def spiral_profile(z, rhoM=1.0, period=50.0):
+    return rhoM * np.cos(z / period), 270.0 + 360.0 * z / period
+
+
+def test_jit_profile():
+    z = np.linspace(0, 100, 51)
+    python = FunctionalProfile(100, 0, profile=tanh_profile)
+    jit = FunctionalProfile(100, 0, profile=tanh_profile, jit=True)
+    assert np.allclose(python._eval(z), jit._eval(z))
+    assert np.isclose(python.end.rho.value, jit.end.rho.value)
+
+    values = [{"rho1": 0.0}, {"center": [10.0, 50.0]}, {}]
+    batch = jit.eval_batch(z, values)
+    # The parameter sets are evaluated in one compiled loop.
+    assert tanh_profile in flayer._BATCH_CACHE
+    assert batch.shape == (3, len(z))
+    assert np.allclose(batch, python.eval_batch(z, values))
+    assert np.allclose(batch[2], python._eval(z))
+    python.center[0].value, python.center[1].value = 10.0, 50.0
+    assert np.allclose(batch[1], python._eval(z))
+
+    # Errors raised by the profile reach the caller without turning off jit.
+    with pytest.raises(ValueError):
+        jit.eval_batch(z, [{"width": -1.0}])
+    assert flayer._JIT_CACHE[tanh_profile] is not None
+
+    python = FunctionalMagnetism(profile=spiral_profile, thickness=100)
+    jit = FunctionalMagnetism(profile=spiral_profile, thickness=100, jit=True)
+    values = [{"rhoM": 2.0}, {"period": 20.0}]
+    rhoM, thetaM = jit.eval_batch(z, values)
+    assert rhoM.shape == thetaM.shape == (2, len(z))
+    expected = python.eval_batch(z, values)
+    assert np.allclose(rhoM, expected[0]) and np.allclose(thetaM, expected[1])
+
+
+def test_jit_fallback():
+    def erf_profile(z, rho=1.0):
+        return rho * erf(z)
+
+    z = np.linspace(0, 10, 11)
+    layer = FunctionalProfile(10, 0, profile=erf_profile, rho=2.0, jit=True)
+    # Profiles which numba cannot compile use the python function.
+    with warnings.catch_warnings(record=True) as caught:
+        warnings.simplefilter("always")
+        batch = layer.eval_batch(z, [{}, {"rho": 3.0}])
+    assert caught and flayer._JIT_CACHE[erf_profile] is None
+    assert np.allclose(batch, [2 * erf(z), 3 * erf(z)])
+    assert np.allclose(layer._eval(z), 2 * erf(z))
@@ -0,0 +1,47 @@
+import numpy as np
+from numpy import nan
+
+from refl1d.names import SLD, Material, Mixture, NeutronProbe
+from refl1d.sample.material import ProbeCache
+
+
+def test_mixture_cache():
+    probe = NeutronProbe(T=np.linspace(0.1, 5, 20), dT=0.02, L=4.75, dL=0.0475)
+    D2O, H2O = Material("D2O", density=1.1), Material("H2O", density=1.0)
+    x = SLD("x", rho=2, irho=0.1)
+    byvolume = Mixture.byvolume(D2O, H2O, 30, x, 10)
+    bymass = Mixture.bymass("Si", "SiO2@2.2", 40)
+    nested = Mixture.byvolume(byvolume, "Au", 5)
+    Si, SiO2, Au = bymass.base, bymass.material[0], nested.material[0]
+
+    def mix(parts):
+        # Volume weighted sum of the component SLDs, [(volume %, (rho, irho)), ...].
+        if any(v < 0 for v, _ in parts):
+            return nan, nan
+        return tuple(sum(0.01 * v * np.asarray(sld[k]) for v, sld in parts) for k in (0, 1))
+
+    cache = ProbeCache(probe)
+    for fraction in (30, 50, 95):
+        byvolume.fraction[0].value = fraction
+        bymass.fraction[0].value = fraction
+        cache.update()
+        water = mix([(90 - fraction, D2O.sld(probe)), (fraction, H2O.sld(probe)), (10, x.sld(probe))])
+        # Mass fractions become volume fractions using the component densities.
+        volume = np.array([100 - fraction, fraction]) / [Si.density.value, SiO2.density.value]
+        volume *= 100 / np.sum(volume)
+        expected = {
+            byvolume: water,
+            bymass: mix([(volume[0], Si.sld(probe)), (volume[1], SiO2.sld(probe))]),
+            nested: mix([(95, water), (5, Au.sld(probe))]),
+        }
+        for m in (byvolume, bymass, nested):
+            assert np.allclose(m.sld(cache), expected[m], equal_nan=True)
+            assert np.allclose(m.sld(probe), expected[m], equal_nan=True)
+
+    # The volume fractions for the base and the parts add up to 100%.
+    rho, _ = byvolume.sld(probe)
+    assert np.isnan(rho)
+    byvolume.fraction[0].value = 0
+    rho, irho = byvolume.sld(probe)
+    D2O_rho, D2O_irho = D2O.sld(probe)
+    assert np.isclose(rho, 0.9 * D2O_rho + 0.2) and np.isclose(irho, 0.9 * D2O_irho + 0.01)
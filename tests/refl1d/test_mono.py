@@ -0,0 +1,26 @@
+import numpy as np
+
+from refl1d.names import SLD, Experiment, NeutronProbe
+from refl1d.sample.mono import FreeInterface
+
+
+def test_render_memo():
+    Si, D2O = SLD("Si", 2.07), SLD("D2O", 6.3)
+    layer = FreeInterface(below=Si, above=D2O, thickness=40, dz=[1, 2, 1], dp=[1, 3, 1])
+    probe = NeutronProbe(T=np.linspace(0.1, 5, 50), dT=0.01, L=4.75, dL=0.0475)
+    M = Experiment(probe=probe, sample=Si(0, 5) | layer | D2O, dz=1)
+    rho = M.smooth_profile()[1].copy()
+
+    # changing a parameter renders a new profile; restoring it reuses the old one
+    layer.dp[1].value = 2
+    M.update()
+    assert not np.array_equal(M.smooth_profile()[1], rho)
+    layer.dp[1].value = 3
+    M.update()
+    assert np.array_equal(M.smooth_profile()[1], rho)
+    assert len(layer._render_cache) == 2
+
+    # the key includes the probe SLDs of the bounding materials
+    D2O.rho.value = 6.0
+    M.update()
+    assert not np.array_equal(M.smooth_profile()[1], rho)
@@ -2255,6 +2255,91 @@ def PolymerBrush_test():
     check(result, data)
 
 
+def smear_test():
+    from refl1d.sample import polymer
+
+    z = np.linspace(0, 5000, 10001)
+    P = np.where(z < 2000, 0.7 * (1 - (z / 2000) ** 2), 0.0)
+    direct = polymer.smear(z, P, 10)
+    fft = polymer.smear(z, P, 200)
+    saved = polymer.SMEAR_FFT_WORK
+    try:
+        polymer.SMEAR_FFT_WORK = np.inf
+        check(polymer.smear(z, P, 200), fft, atol=1e-12)
+        polymer.SMEAR_FFT_WORK = 0
+        check(polymer.smear(z, P, 10), direct, atol=1e-12)
+    finally:
+        polymer.SMEAR_FFT_WORK = saved
+    check(fft[-100:], 0.0, atol=1e-12)
+
+
+def SCFbatch_test():
+    from collections import OrderedDict
+
+    from refl1d.sample.polymer import SCFbatch
+
+    cache = OrderedDict()
+    members = [(0.5, 0.3, 1.5, 15 / mn, 0, mn) for mn in (190, 200, 210, 200)]
+    batch = SCFbatch(members, cache=cache)
+    assert batch[1] is batch[3]
+    for p, phi in zip(members, batch):
+        # each member is in the cache and matches a direct solve
+        assert SCFcache(*p, cache=cache) is phi
+        n = min(len(phi), 40)
+        check(phi[:n], SCFsolve(*p)[:n], atol=1e-5)
+
+
+def batch_mapper_test(monkeypatch):
+    from bumps.fitproblem import FitProblem
+
+    from refl1d.experiment import batch_mapper, prepare_points
+    from refl1d.names import SLD, Experiment, NeutronProbe
+    from refl1d.sample import polymer
+    from refl1d.uncertainty import calc_errors
+
+    etp = EndTetheredPolymer(
+        thickness=100,
+        interface=0,
+        polymer=PS,
+        solvent=CHEXd,
+        chi=0.45,
+        chi_s=0.3,
+        h_dry=15,
+        l_lat=1,
+        mn=180,
+        m_lat=1,
+        pdi=1.5,
+    )
+    etp.chi.range(0.4, 0.5)
+    etp.h_dry.range(10, 20)
+    sample = SLD("Si", rho=2.07)(0, 2) | etp | CHEXd
+    probe = NeutronProbe(T=np.linspace(0.1, 3, 30), dT=0.01, L=4.75, dL=0.0475)
+    problem = FitProblem(Experiment(sample=sample, probe=probe))
+    points = [[chi, h] for chi in (0.43, 0.45, 0.47) for h in (14.0, 15.0)]
+
+    batches, walks = [], []
+    SCFbatch, SCFwalk = polymer.SCFbatch, polymer._SCFwalk
+    monkeypatch.setattr(polymer, "SCFbatch", lambda inputs: batches.append(inputs) or SCFbatch(inputs))
+    monkeypatch.setattr(polymer, "_SCFwalk", lambda *args: walks.append(args) or SCFwalk(*args))
+
+    # The population is solved in one batch, and evaluating it hits the cache.
+    start = problem.getp()
+    nllf = batch_mapper(problem)(points)
+    assert len(batches) == 1 and len(batches[0]) == len(points)
+    solved = len(walks)
+    assert solved <= len(points) and np.all(np.isfinite(nllf))
+    assert nllf == [problem.nllf(p) for p in points] and len(walks) == solved
+
+    # Preparing the points leaves the problem at its current point.
+    problem.setp(start)
+    prepare_points(problem, points)
+    assert np.array_equal(problem.getp(), start) and len(batches) == 2
+
+    # Uncertainty draws go through the batch solver as well.
+    calc_errors(problem, [[0.44, 16.0], [0.46, 16.0]])
+    assert len(batches) == 3 and len(batches[2]) == 2 and len(walks) <= solved + 2
+
+
 if __name__ == "__main__":
     calc_g_zs_ta_test()
     calc_g_zs_ngts_u_test()
@@ -2264,7 +2349,9 @@ if __name__ == "__main__":
     SCFeqns_test()
     SCFsolve_test()
     # SCFcache_test()
+    SCFbatch_test()
     SCFprofile_test()
     EndTetheredPolymer_test()
     PolymerMushroom_test()
     PolymerBrush_test()
+    smear_test()
@@ -0,0 +1,93 @@
+from importlib import import_module
+
+import numpy as np
+import pytest
+
+from refl1d.names import SLD, Experiment, NeutronProbe
+from refl1d.profile import Microslabs
+from refl1d.utils.workspace import Workspace
+
+
+@pytest.mark.parametrize("backend", ["python", "numba"])
+def test_build_profile_window(backend):
+    kernel = import_module(f"refl1d.lib.{backend}.build_profile")
+    rng = np.random.default_rng(42)
+
+    def check(z, offset, roughness, value):
+        NP, NZ = value.shape[0], len(z)
+        contrast = (value[:, 1:] - value[:, :-1]).ravel(order="C")
+        initial_value = value[:, 0].copy()
+        windowed, full = np.zeros(NP * NZ), np.zeros((NP, NZ))
+        kernel.build_profile(z, offset, roughness, contrast, initial_value, windowed)
+        kernel._build_profile_full(z, offset, roughness, contrast.reshape((NP, -1)), initial_value, full)
+        assert np.allclose(windowed.reshape((NP, NZ)), full, rtol=0, atol=1e-12)
+
+    z = np.linspace(-50, 250, 1001)
+    for _ in range(5):
+        # Random interfaces, including some which are past the ends of z.
+        offset = np.sort(rng.uniform(-80, 280, 8))
+        roughness = rng.uniform(0, 15, 8)
+        check(z, offset, roughness, rng.normal(size=(3, 9)))
+
+    # Step interfaces, with some falling exactly on the z grid.
+    offset = np.array([-100.0, 0.0, 10.15, 100.0, 400.0])
+    check(z, offset, np.zeros(5), rng.normal(size=(2, 6)))
+
+    # Interfaces much closer together than the blend window, in any order.
+    offset = np.array([100.0, 100.0, 101.0, 99.5, 103.0, 100.2])
+    roughness = np.array([5.0, 0.0, 3.0, 8.0, 0.5, 12.0])
+    check(z, offset, roughness, rng.normal(size=(2, 7)))
+
+    # Unsorted z falls back to the full calculation.
+    check(rng.permutation(z), offset, roughness, rng.normal(size=(2, 7)))
+
+
+def test_microslabs_buffers():
+    slabs = Microslabs(2, dz=1)
+    slabs.append(w=0, sigma=1, rho=[1, 2], irho=[0, 0.1])
+    capacity = [len(slabs._slabs)]
+    for n in range(1, 6):
+        slabs.extend(w=np.full(50 * n, 2.0), sigma=0.5, rho=np.full((2, 50 * n), 3.0), irho=0.0)
+        if len(slabs._slabs) != capacity[-1]:
+            capacity.append(len(slabs._slabs))
+    # The slab arrays grow geometrically, keeping the slabs already rendered.
+    assert capacity[0] == 64 and all(b >= 2 * a for a, b in zip(capacity[:-1], capacity[1:]))
+    assert len(slabs) == 751 and len(slabs._slabs) >= len(slabs)
+    assert np.all(slabs.rho[:, 0] == [1, 2]) and np.all(slabs.rho[:, 1:] == 3.0)
+    assert slabs.sigma[0] == 1 and np.all(slabs.w[1:] == 2.0)
+
+    # The space is kept after clear, so smaller models reuse it.
+    buffers = slabs._slabs, slabs._slabs_rho
+    slabs.clear()
+    slabs.extend(w=np.ones(700), sigma=0, rho=np.zeros((2, 700)), irho=0.0)
+    assert slabs._slabs is buffers[0] and slabs._slabs_rho is buffers[1]
+
+    # Scratch space comes from the workspace if there is one.
+    assert not np.shares_memory(slabs._scratch("a", (2, 3)), slabs._scratch("a", (2, 3)))
+    slabs.workspace = Workspace()
+    a = slabs._scratch("a", (2, 30))
+    assert np.shares_memory(slabs._scratch("a", (3, 20)), a)
+    assert not np.shares_memory(slabs._scratch("b", (3, 20)), a)
+    assert slabs._scratch("a", (200,)).shape == (200,) and slabs.workspace.nbytes >= 8 * (200 + 60)
+
+
+def test_step_interface_workspace():
+    probe = NeutronProbe(T=np.linspace(0.1, 5, 50), dT=0.01, L=4.75, dL=0.0475)
+    sample = SLD(name="Si", rho=2.07)(0, 5) | SLD(name="Cu", rho=6.5)(130, 15) | SLD(name="air", rho=0)
+    expt = Experiment(probe=probe, sample=sample, step_interfaces=True, dz=0.5)
+    reference = Experiment(probe=probe, sample=sample, step_interfaces=True, dz=0.5)
+    reference._slabs.workspace = None
+    buffers = None
+    for thickness in (130, 120, 100, 125):
+        sample["Cu"].thickness.value = thickness
+        expt.update()
+        reference.update()
+        # Results computed in the workspace match freshly allocated ones.
+        assert np.array_equal(expt.reflectivity()[1], reference.reflectivity()[1])
+        current = dict(expt._workspace._buffers)
+        current["slabs"] = expt._slabs._slabs
+        if buffers is not None:
+            # Models no larger than the first reuse the same buffers.
+            assert current.keys() == buffers.keys()
+            assert all(current[name] is buffers[name] for name in buffers)
+        buffers = current
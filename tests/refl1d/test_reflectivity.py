@@ -0,0 +1,44 @@
+import numpy as np
+
+from refl1d.sample.reflectivity import magnetic_amplitude, reflectivity_amplitude
+
+
+def test_single_precision():
+    kz = np.linspace(-0.15, -0.001, 300)
+    depth = [0, 130, 50, 0]
+    rho = [2.07, 6.5, 4.0, 0]
+    irho = [0, 0.01, 0, 0]
+    sigma = [5, 3, 2]
+    r = reflectivity_amplitude(kz, depth, rho, irho, sigma)
+    r_single = reflectivity_amplitude(kz, depth, rho, irho, sigma, precision="single", R_floor=0)
+    R, R_single = abs(r) ** 2, abs(r_single) ** 2
+    assert np.max(abs(R_single / R - 1)) < 1e-3
+    assert np.any(r_single != r)
+
+    # points below the floor are computed in double precision
+    r_guard = reflectivity_amplitude(kz, depth, rho, irho, sigma, precision="single", R_floor=1e-4)
+    low = r_single.real**2 + r_single.imag**2 < 1e-4
+    assert low.any() and np.all(r_guard[low] == r[low])
+    # thick stacks are computed in double precision
+    r_thick = reflectivity_amplitude(kz, depth, rho, irho, sigma, precision="single", max_phase=1)
+    assert np.all(r_thick == r)
+
+
+def test_output_buffer():
+    kz = np.linspace(-0.15, -0.001, 300)
+    depth = [0, 130, 50, 0]
+    rho = [2.07, 6.5, 4.0, 0]
+    irho = [0, 0.01, 0, 0]
+    sigma = [5, 3, 2]
+    for precision in ("double", "single"):
+        out = np.full(kz.shape, np.nan, "D")
+        r = reflectivity_amplitude(kz, depth, rho, irho, sigma, precision=precision, out=out)
+        assert r is out
+        assert np.array_equal(r, reflectivity_amplitude(kz, depth, rho, irho, sigma, precision=precision))
+
+    rhoM, thetaM = [0, 0, 1.5, 0], [270, 270, 200, 270]
+    out = np.full((4,) + kz.shape, np.nan, "D")
+    xs = magnetic_amplitude(kz, depth, rho, irho, rhoM, thetaM, sigma, H=0.5, out=out)
+    assert all(np.shares_memory(r, out) for r in xs)
+    expected = magnetic_amplitude(kz, depth, rho, irho, rhoM, thetaM, sigma, H=0.5)
+    assert all(np.array_equal(r, r_expected) for r, r_expected in zip(xs, expected))
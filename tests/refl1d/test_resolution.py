@@ -3,6 +3,7 @@ from math import asin, degrees, log, pi, radians, sin, sqrt, tan
 import numpy as np
 from numpy.linalg import norm
 
+from refl1d.probe import NeutronProbe, QProbe
 from refl1d.probe import instrument as inst
 from refl1d.probe import resolution as res
 from refl1d.probe.data_loaders import ncnrdata, snsdata
@@ -154,5 +155,32 @@ def test():
             print(s)
 
 
+def test_cached_resolution():
+    T = np.linspace(0.1, 4, 50)
+    slits = res.slit_widths(T=T, slits_at_Tlo=0.2, Tlo=0.5, slits_below=0.1)
+    expected = [s.copy() for s in slits]
+    slits[0][:] = 0  # callers own the returned arrays
+    again = res.slit_widths(T=T.copy(), slits_at_Tlo=0.2, Tlo=0.5, slits_below=0.1)
+    assert all(np.array_equal(a, b) for a, b in zip(again, expected))
+
+    # Memoised resolution goes straight to the compiled kernels
+    L = np.full_like(T, 4.75)
+    probe = QProbe(res.TL2Q(T, L), res.dTdL2dQ(T=T, dT=0.01, L=L, dL=0.04))
+    Q, R = probe.apply_beam(probe.calc_Q, np.exp(-10 * probe.calc_Q))
+    assert np.all(np.isfinite(R))
+
+    dQ = res.dTdL2dQ(T=T, dT=0.01, L=4.75, dL=0.04)
+    table = res.BroadeningTable(dQ=dQ, L=4.75, T=T, dT=0.01)
+    for width in (0.02, -0.005):
+        expected = res.dQ_broadening(dQ=dQ, L=4.75, T=T, dT=0.01, width=width)
+        assert norm(table(width) - expected) < 1e-14 * norm(expected)
+
+    # The cached dQ for a broadened probe goes straight to the compiled kernels
+    probe = NeutronProbe(T=T, dT=0.01, L=4.75, dL=0.04)
+    probe.sample_broadening.value = 0.02
+    Q, R = probe.apply_beam(probe.calc_Q, np.exp(-10 * probe.calc_Q))
+    assert probe.dQ is probe.dQ and np.all(np.isfinite(R))
+
+
 if __name__ == "__main__":
     test()
@@ -4,9 +4,11 @@ from copy import deepcopy
 import dill
 import cloudpickle
 
+import numpy as np
 from bumps.serialize import deserialize, serialize
 
-from refl1d.names import SLD, Slab
+from refl1d.names import SLD, Material, NeutronProbe, Slab, Stack
+from refl1d.profile import Microslabs
 
 
 def test_stack_serialization():
@@ -81,3 +83,29 @@ def test_repeat_serialization():
     assert thickness_plus.value == 340
     sample.stack[0].thickness.value += 40
     assert thickness_plus.value == 500
+
+
+def test_slab_stack_render():
+    """slab-only stacks are rendered in one step, matching per-layer rendering"""
+    probe = NeutronProbe(T=np.linspace(0.1, 5, 20), dT=0.01, L=np.linspace(2, 6, 20), dL=0.02)
+    Ni, Ti, air = Material("Ni"), SLD("Ti", rho=-1.9, irho=0.1), SLD("air", rho=0)
+    stack = Stack([Slab(SLD("Si", rho=2.07), 0, 3)] + [Slab(M, 50 + k, 3 + k % 3) for k, M in enumerate([Ni, Ti] * 10)])
+    stack.add(air)
+
+    def check():
+        slabs, target = Microslabs(len(probe.unique_L)), Microslabs(len(probe.unique_L))
+        stack.render(probe, slabs)
+        for layer in stack.layers:
+            layer.render(probe, target)
+        for attr in ("w", "sigma", "rho", "irho"):
+            assert np.array_equal(getattr(slabs, attr), getattr(target, attr))
+
+    check()
+    assert stack._slab_table.slabs_only and len(stack._slab_table.materials) == 4
+    stack[3].thickness.value = 20
+    stack[5].material = SLD("Cr", rho=3.0)
+    check()
+    assert len(stack._slab_table.materials) == 5
+    stack.insert(4, (Slab(SLD("Au", rho=4.5), 30) | Slab(SLD("Cu", rho=6.5), 40)) * 2)
+    check()
+    assert not stack._slab_table.slabs_only
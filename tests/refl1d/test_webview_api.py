@@ -0,0 +1,100 @@
+import asyncio
+import time
+
+import pytest
+from bumps.fitproblem import FitProblem
+
+from refl1d.names import SLD, Experiment, NeutronProbe, air
+from refl1d.webview.server import api
+
+
+def test_evaluate_supersedes():
+    sample = SLD("Si", rho=2.07)(0, 3) | SLD("Ni", rho=9.4)(100, 5) | air
+    sample[1].thickness.range(50, 200)
+    problem = FitProblem(Experiment(sample=sample, probe=NeutronProbe(T=[0.5, 1, 2], dT=0.01, L=4.75, dL=0.04)))
+    started = []
+
+    def work(copy, tag):
+        started.append(tag)
+        time.sleep(0.1)
+        return tag, copy.getp()[0], copy is problem
+
+    async def requests():
+        tasks = []
+        for k, thickness in enumerate((60, 70, 80, 90)):
+            problem.setp([thickness])
+            tasks.append(asyncio.create_task(api._evaluate("test", work, problem, k)))
+            await asyncio.sleep(0.01)
+        results = await asyncio.gather(*tasks)
+
+        # Cancelling the caller still cancels the caller
+        task = asyncio.create_task(api._evaluate("test", work, problem, 4))
+        await asyncio.sleep(0.01)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        await asyncio.sleep(0.2)
+        return results
+
+    results = asyncio.run(requests())
+    # The first request was running, the next two were dropped from the queue
+    assert started == [0, 3, 4]
+    # Every caller gets the newest result, evaluated on a copy of the problem
+    assert results == [(3, 90, False)] * 4
+    assert not api._latest_evaluation
+
+
+def _merge(old, new):
+    return [{**a, **b} for a, b in zip(old, new)]
+
+
+def test_plot_updates():
+    import numpy as np
+
+    assert api._version({"a": np.arange(3.0), "b": "x"}) == api._version({"b": "x", "a": np.arange(3.0)})
+    assert api._version([np.arange(3.0)]) != api._version([np.arange(3.0) + 1e-12])
+    assert api._only({"x": 1, "y": 2, "z": 3}, ("x", "z", "w")) == {"x": 1, "z": 3}
+    assert api._without({"x": 1, "y": 2, "z": 3}, ("x", "z", "w")) == {"y": 2}
+
+    models = []
+    for k in range(3):
+        T = np.linspace(0.1, 5, 50)
+        probe = NeutronProbe(T=T, dT=0.01, L=4.75, dL=0.02, data=(np.exp(-T), 0.01 * np.exp(-T)))
+        sample = SLD("Si", rho=2.07)(0, 3) | SLD("Ni", rho=9.4)(100 + 10 * k, 5) | air
+        models.append(Experiment(sample=sample, probe=probe))
+    problem = FitProblem(models)
+    thickness, intensity = models[0].sample[1].thickness, models[0].probe.intensity
+
+    # Reflectivity: static data once, then the theory, with Fresnel only on change
+    full = api._get_plot_data_update(problem, None, None)
+    assert full["full"] and full == {**api._get_plot_data(problem), **_only_versions(full)}
+    thickness.value = 120
+    problem.model_update()
+    update = api._get_plot_data_update(problem, full["version"], full["fresnel_version"])
+    assert not update["full"] and update["fresnel_version"] == full["fresnel_version"]
+    assert all(set(xs) == {"theory", "intensity", "background"} for model in update["plotdata"] for xs in model)
+    merged = [_merge(a, b) for a, b in zip(full["plotdata"], update["plotdata"])]
+    assert merged == api._get_plot_data(problem)["plotdata"]
+    intensity.value = 0.9
+    problem.model_update()
+    update = api._get_plot_data_update(problem, full["version"], full["fresnel_version"])
+    assert update["fresnel_version"] != full["fresnel_version"]
+    merged = [_merge(a, b) for a, b in zip(full["plotdata"], update["plotdata"])]
+    assert merged == api._get_plot_data(problem)["plotdata"]
+
+    # Profiles: only the traces of the changed model are sent
+    specs = [dict(model_index=k, sample_index=0) for k in range(3)]
+    full = api._get_profile_plots_update(problem, specs, None, None)
+    assert full["full"] and full["data"] == api._get_profile_plots(problem, specs)["data"]
+    thickness.value = 130
+    problem.model_update()
+    update = api._get_profile_plots_update(problem, specs, full["version"], full["trace_versions"])
+    assert not update["full"] and set(update["layout"]) <= {"shapes", "annotations"}
+    assert [bool(trace) for trace in update["data"]] == [True, True, False, False, False, False]
+    target = api._get_profile_plots(problem, specs)
+    assert _merge(full["data"], update["data"]) == target["data"]
+    assert {**full["layout"], **update["layout"]} == target["layout"]
+
+
+def _only_versions(result):
+    return {k: result[k] for k in ("version", "fresnel_version", "full")}
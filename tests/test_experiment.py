@@ -6,6 +6,7 @@ import os
 import unittest
 
 import numpy as np
+from bumps import parameter
 
 from refl1d.names import QProbe, Slab, SLD, Parameter, Experiment, NeutronProbe, PolarizedNeutronProbe, Magnetism
 
@@ -130,6 +131,20 @@ class ExperimentMagneticSimulateTest(unittest.TestCase):
         self.assertAlmostEqual(ratio_i, 0.025)
         self.assertAlmostEqual(ratio_f, 0.025)
 
+    def test_fused_reflectivity(self):
+        """Polarized reflectivity matches the separate magnitude and resolution steps"""
+        from refl1d.experiment import _amplitude_to_magnitude
+
+        probe = self.expt.probe
+        probe.mp.intensity.value = 0.8
+        probe.pm.resolution = "uniform"
+        self.expt.update()
+        calc_q, calc_r = self.expt._reflamp()
+        expected = probe.apply_beam(calc_q, _amplitude_to_magnitude(calc_r, ismagnetic=True, polarized=True))
+        for (Q, R), (Q_expected, R_expected) in zip(self.expt.reflectivity(), expected):
+            np.testing.assert_array_equal(Q, Q_expected)
+            np.testing.assert_allclose(R, R_expected, rtol=1e-12)
+
     # unittest.skip("ambiguous interface not supported")
     def not_test_noise_array_with_mag(self):
         """Provide a dR array with a magnetic sample"""
@@ -182,6 +197,7 @@ class ExperimentNonMagSimulateTest(unittest.TestCase):
         )
 
         sample["Cu"].thickness.range(90.0, 200.0)
+        self.sample = sample
 
         probe.intensity = Parameter(value=1.0, name="normalization")
         probe.background = Parameter(value=0.0, name="background")
@@ -221,6 +237,95 @@ class ExperimentNonMagSimulateTest(unittest.TestCase):
         self.assertAlmostEqual(ratio_i, 0.01)
         self.assertAlmostEqual(ratio_f, 0.11)
 
+    def test_reflamp_workspace(self):
+        """The cached amplitude is not overwritten by the next evaluation"""
+        expt = self.expt
+        expt.update()
+        _, calc_r = expt._reflamp()
+        self.assertIs(expt._reflamp()[1], calc_r)
+        self.assertFalse(np.shares_memory(calc_r, expt._workspace.get("calc_r", calc_r.shape, "D")))
+        before = calc_r.copy()
+
+        self.sample["Cu"].thickness.value = 100
+        expt.update()
+        _, r = expt._reflamp()
+        # A result kept from before the update is unchanged.
+        np.testing.assert_array_equal(calc_r, before)
+        self.assertFalse(np.allclose(r, before))
+        thinner = r.copy()
+
+        # Going back to the original model gives the original amplitude.
+        self.sample["Cu"].thickness.value = 130
+        expt.update()
+        np.testing.assert_array_equal(expt._reflamp()[1], before)
+        np.testing.assert_array_equal(r, thinner)
+
+
+class ExperimentTimingTest(unittest.TestCase):
+    """Test the stage timing instrumentation"""
+
+    def test_timings(self):
+        """Timing is off by default and records each stage when enabled"""
+        probe = NeutronProbe(T=np.linspace(0.1, 5, 50), dT=0.01, L=4.75, dL=0.0475)
+        sample = SLD(name="Si", rho=2.07)(0, 5) | SLD(name="Cu", rho=6.5)(130, 15) | SLD(name="air", rho=0)
+        expt = Experiment(probe=probe, sample=sample)
+        expt.nllf()
+        self.assertEqual(expt.timings(), {})
+
+        expt.enable_timing()
+        for _ in range(3):
+            expt.update()
+            expt.nllf()
+        timings = expt.timings()
+        for stage in ("render", "finalize", "contract", "kernel", "magnitude", "apply_beam", "residuals"):
+            self.assertEqual(timings[stage]["calls"], 3)
+        self.assertIn("Timings", expt.webview_plots)
+
+        expt.enable_timing(False)
+        self.assertEqual(expt.timings(), {})
+        self.assertNotIn("Timings", expt.webview_plots)
+
+
+class ExperimentJacobianTest(unittest.TestCase):
+    """Test the residual jacobian"""
+
+    def test_jacobian(self):
+        """Analytic slab derivatives match central differences"""
+        probe = NeutronProbe(T=np.linspace(0.1, 5, 80), dT=0.02, L=4.75, dL=0.0475)
+        sample = (
+            SLD(name="Si", rho=2.07)(0, 5)
+            | SLD(name="Cu", rho=6.5, irho=0.05)(130, 15)
+            | SLD(name="Ni", rho=9.4)(40, 8)
+            | SLD(name="air", rho=0)
+        )
+        sample["Cu"].thickness.range(90, 200)
+        sample["Cu"].interface.range(0, 30)
+        sample["Cu"].material.rho.range(5, 8)
+        sample["Cu"].material.irho.range(0, 1)
+        sample["Si"].interface.range(0, 10)
+        sample["Ni"].material.rho.range(8, 10)
+        probe.intensity.range(0.5, 2)
+        expt = Experiment(probe=probe, sample=sample)
+        expt.simulate_data(noise=5)
+        sample["Cu"].thickness.value = 125
+        expt.update()
+
+        pars = parameter.varying(parameter.unique(expt.parameters()))
+        self.assertEqual(len(expt._slab_roles(pars)), len(pars) - 1)
+        J = expt.jacobian(pars)
+        for k, p in enumerate(pars):
+            value, h = p.value, 1e-6 * max(abs(p.value), 1)
+            p.value = value + h
+            expt.update()
+            upper = expt.residuals()
+            p.value = value - h
+            expt.update()
+            lower = expt.residuals()
+            p.value = value
+            expt.update()
+            fd = (upper - lower) / (2 * h)
+            self.assertLess(np.max(abs(J[:, k] - fd)), 1e-6 * np.max(abs(fd)), str(p))
+
 
 if __name__ == "__main__":
     unittest.main()